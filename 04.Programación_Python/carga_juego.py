@@ -0,0 +1,168 @@
+# Librerías
+import argparse
+import asyncio
+import multiprocessing as mp
+import os
+import signal
+import socket
+import tempfile
+import time
+
+import numpy as np
+
+import servidor_juego as sj
+from simulador_juego import ESTRATEGIAS
+
+
+async def _conectar(host, puerto):
+    reader, writer = await asyncio.open_connection(host, puerto)
+
+    async def enviar(*partes):
+        writer.write((' '.join(map(str, partes)) + '\n').encode())
+        await writer.drain()
+
+    async def leer():
+        linea = await reader.readline()
+        if not linea:
+            raise ConnectionError('Conexión cerrada por el servidor.')
+        return linea.decode().split()
+
+    return writer, enviar, leer
+
+
+async def _adivinar(host, puerto, nombre, rol, dificultad, estrategia, rng, latencias):
+    """
+    Sesión de quien adivina: juega con la estrategia dada y guarda la latencia de cada jugada (segundos).
+    """
+    writer, enviar, leer = await _conectar(host, puerto)
+    try:
+        await enviar('JUGAR', nombre, rol, dificultad)
+        minimo = maximo = None
+        while True:
+            partes = await leer()
+            if partes[0] == 'PIDE':
+                if minimo is None:
+                    minimo, maximo = int(partes[4]), int(partes[5])
+                numero = int(estrategia(np.array([minimo]), np.array([maximo]), rng)[0])
+                inicio = time.perf_counter()
+                await enviar('INTENTO', numero)
+                respuesta = await leer()
+                latencias.append(time.perf_counter() - inicio)
+                if respuesta[0] == 'RESULTADO' and respuesta[2] == 'MAYOR':
+                    minimo = numero + 1
+                elif respuesta[0] == 'RESULTADO' and respuesta[2] == 'MENOR':
+                    maximo = numero - 1
+                elif respuesta[0] == 'FIN':
+                    return respuesta[1]
+            elif partes[0] == 'FIN':
+                return partes[1]
+    finally:
+        writer.close()
+
+
+async def _elegir(host, puerto, nombre, dificultad, rng):
+    """
+    Sesión de quien elige: envía un número secreto aleatorio y espera al final de la partida.
+    """
+    writer, enviar, leer = await _conectar(host, puerto)
+    try:
+        await enviar('JUGAR', nombre, 'ELIGE', dificultad)
+        while True:
+            partes = await leer()
+            if partes[:2] == ['PIDE', 'SECRETO']:
+                await enviar('SECRETO', int(rng.integers(int(partes[2]), int(partes[3]) + 1)))
+            elif partes[0] == 'FIN':
+                return partes[1]
+    finally:
+        writer.close()
+
+
+async def medir_carga(host='127.0.0.1', puerto=8765, n_sesiones=2000, concurrencia=500, dificultad=2,
+                      modo='parejas', estrategia='biseccion', semilla=0):
+    """
+    Lanza 'n_sesiones' partidas contra el servidor con como mucho 'concurrencia' partidas a la vez y devuelve
+    un diccionario con sesiones/segundo y los percentiles de latencia por jugada (ms).
+    * modo='parejas': cada partida son dos conexiones (quien elige y quien adivina) emparejadas por el servidor.
+    * modo='solo': cada partida es una conexión en modo solitario.
+    """
+    estrategia = ESTRATEGIAS.get(estrategia, estrategia)
+    rng = np.random.default_rng(semilla)
+    semaforo = asyncio.Semaphore(concurrencia)
+    latencias = []
+    resultados = []
+
+    async def una_sesion(i):
+        async with semaforo:
+            try:
+                if modo == 'parejas':
+                    resultado, _ = await asyncio.gather(_adivinar(host, puerto, f'a{i}', 'ADIVINA', dificultad, estrategia, rng, latencias),
+                                                        _elegir(host, puerto, f'e{i}', dificultad, rng))
+                else:
+                    resultado = await _adivinar(host, puerto, f's{i}', 'SOLO', dificultad, estrategia, rng, latencias)
+            except (ConnectionError, OSError) as error:
+                resultado = f'ERROR {error.__class__.__name__}'
+            resultados.append(resultado)
+
+    inicio = time.perf_counter()
+    await asyncio.gather(*(una_sesion(i) for i in range(n_sesiones)))
+    segundos = time.perf_counter() - inicio
+
+    latencias_ms = np.array(latencias) * 1000
+    percentiles = np.percentile(latencias_ms, [50, 99]) if latencias_ms.size else (np.nan, np.nan)
+    return {'sesiones': n_sesiones,
+            'segundos': segundos,
+            'sesiones_por_segundo': n_sesiones / segundos,
+            'jugadas': latencias_ms.size,
+            'latencia_p50_ms': percentiles[0],
+            'latencia_p99_ms': percentiles[1],
+            'ganadas': resultados.count('GANADA'),
+            'perdidas': resultados.count('PERDIDA'),
+            'errores': sum(1 for resultado in resultados if resultado not in ('GANADA', 'PERDIDA'))}
+
+
+def _esperar_puerto(host, puerto, timeout=10):
+    limite = time.perf_counter() + timeout
+    while time.perf_counter() < limite:
+        try:
+            socket.create_connection((host, puerto), timeout=0.5).close()
+            return
+        except OSError:
+            time.sleep(0.05)
+    raise TimeoutError(f'El servidor no responde en {host}:{puerto}')
+
+
+def main(argv=None):
+    """
+    Línea de comandos: python carga_juego.py --sesiones 5000 --concurrencia 1000 --lanzar-servidor
+    """
+    parser = argparse.ArgumentParser(description='Generador de carga para servidor_juego.')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--puerto', type=int, default=8765)
+    parser.add_argument('--sesiones', type=int, default=2000)
+    parser.add_argument('--concurrencia', type=int, default=500)
+    parser.add_argument('--dificultad', type=int, choices=[1, 2, 3], default=2)
+    parser.add_argument('--modo', choices=['parejas', 'solo'], default='parejas')
+    parser.add_argument('--estrategia', choices=list(ESTRATEGIAS), default='biseccion')
+    parser.add_argument('--lanzar-servidor', action='store_true',
+                        help='Arranca servidor_juego en otro proceso (estadísticas en una base de datos temporal).')
+    args = parser.parse_args(argv)
+
+    proceso = None
+    if args.lanzar_servidor:
+        ruta_db = os.path.join(tempfile.mkdtemp(), 'carga_juego.db')
+        proceso = mp.Process(target=sj.main, args=(['--host', args.host, '--puerto', str(args.puerto), '--db', ruta_db],))
+        proceso.start()
+        _esperar_puerto(args.host, args.puerto)
+    try:
+        resultado = asyncio.run(medir_carga(args.host, args.puerto, args.sesiones, args.concurrencia,
+                                            args.dificultad, args.modo, args.estrategia))
+    finally:
+        if proceso is not None:
+            os.kill(proceso.pid, signal.SIGINT)  # el servidor escribe las partidas pendientes antes de salir
+            proceso.join()
+    for clave, valor in resultado.items():
+        print(f'{clave:>22}: {valor:,.3f}' if isinstance(valor, float) else f'{clave:>22}: {valor:,}')
+
+
+if __name__ == '__main__':
+    main()
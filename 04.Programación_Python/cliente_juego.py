@@ -0,0 +1,97 @@
+# Librerías
+import argparse
+import socket
+
+import funciones_juego as fj
+
+
+def conectar(host='127.0.0.1', puerto=8765):
+    """
+    Devuelve el socket conectado al servidor y un archivo de texto para leer/escribir líneas.
+    """
+    conexion = socket.create_connection((host, puerto))
+    return conexion, conexion.makefile('rw', encoding='utf-8', newline='\n')
+
+
+def enviar(archivo, *partes):
+    """
+    Envía una línea al servidor con las partes separadas por espacios.
+    """
+    archivo.write(' '.join(map(str, partes)) + '\n')
+    archivo.flush()
+
+
+def jugar(archivo, nombre, rol, dificultad):
+    """
+    Juega una partida en el servidor pidiendo los números por terminal, con las mismas validaciones
+    que el juego local (getpass para el número secreto).
+    """
+    enviar(archivo, 'JUGAR', nombre, rol, dificultad)
+    for linea in archivo:
+        partes = linea.split()
+        if not partes:
+            continue
+        orden = partes[0]
+        if orden == 'ESPERANDO':
+            print('⏳ Esperando a un rival...')
+        elif orden == 'EMPAREJADO':
+            print(f'🙌🏼 Partida contra {partes[1]}.')
+        elif orden == 'PIDE' and partes[1] == 'SECRETO':
+            minimo, maximo = int(partes[2]), int(partes[3])
+            print('\n👀 ¡Tu turno para decidir el número a adivinar!')
+            enviar(archivo, 'SECRETO', fj.obtener_numero_2jugadores(minimo, maximo))
+        elif orden == 'PIDE' and partes[1] == 'INTENTO':
+            num_intento, total_intentos, minimo, maximo = map(int, partes[2:6])
+            enviar(archivo, 'INTENTO', fj.obtener_numero_adivinado(minimo, maximo, num_intento, total_intentos))
+        elif orden == 'RESULTADO':
+            numero, resultado = partes[1], partes[2]
+            if resultado == 'MAYOR':
+                print(f'¡El número secreto es mayor que {numero}!\n')
+            elif resultado == 'MENOR':
+                print(f'¡El número secreto es menor que {numero}!\n')
+            else:
+                print(f'\n🥳¡Enhorabuena, el número secreto es {numero}!🥳')
+        elif orden == 'FIN':
+            if partes[1] == 'ABANDONO':
+                print('😞 El rival ha abandonado la partida.')
+            elif partes[1] == 'PERDIDA':
+                print(f'Se acabaron los intentos. El número secreto es {partes[2]}.')
+            else:
+                print(f'Partida ganada en {partes[3]} intento/s.')
+            return partes[1]
+        elif orden == 'ERROR':
+            print('⚠️', ' '.join(partes[1:]))
+    raise ConnectionError('El servidor ha cerrado la conexión.')
+
+
+def main(argv=None):
+    """
+    Línea de comandos: python cliente_juego.py --puerto 8765
+    """
+    parser = argparse.ArgumentParser(description='Cliente de terminal del juego de la adivinanza de número.')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--puerto', type=int, default=8765)
+    args = parser.parse_args(argv)
+
+    conexion, archivo = conectar(args.host, args.puerto)
+    with conexion, archivo:
+        nombre = input('🙋‍♂️ Introduzca su nombre: ').lower()
+        while nombre == 'total' or not nombre or ' ' in nombre:
+            nombre = input("Nombre no válido ('total' está reservado y no se admiten espacios): ").lower()
+        while True:
+            print('1. Adivinar el número (contra otro jugador)')
+            print('2. Elegir el número (contra otro jugador)')
+            print('3. Adivinar en modo solitario')
+            rol = ['ADIVINA', 'ELIGE', 'SOLO'][fj.validar_num(1, 3) - 1]
+            print()
+            fj.mostrar_sub_menu()
+            dificultad = fj.validar_num(1, 3)
+            jugar(archivo, nombre, rol, dificultad)
+            if fj.obtener_respuesta() == 'no':
+                enviar(archivo, 'SALIR')
+                print('✨ ¡Gracias por jugar! Espero que hayas disfrutado del juego ✨')
+                break
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,457 @@
+# Librerías
+import abc
+import os
+import sqlite3
+import time
+from collections import Counter
+
+import matplotlib.pyplot as plt
+import numpy as np
+import openpyxl
+import pandas as pd
+
+import funciones_juego as fj
+
+
+DIFICULTADES = {1: 'Fácil', 2: 'Medio', 3: 'Difícil'}
+JUGADOR_TOTAL = 'total'
+
+_ESQUEMA = """
+CREATE TABLE IF NOT EXISTS partidas (
+    id         INTEGER PRIMARY KEY,
+    instante   REAL    NOT NULL,
+    jugador    TEXT    NOT NULL,
+    dificultad INTEGER NOT NULL,
+    ganada     INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS agregados (
+    jugador    TEXT    NOT NULL,
+    dificultad INTEGER NOT NULL,
+    jugadas    INTEGER NOT NULL,
+    ganadas    INTEGER NOT NULL,
+    PRIMARY KEY (jugador, dificultad)
+);
+"""
+
+_UPSERT_AGREGADOS = """
+INSERT INTO agregados (jugador, dificultad, jugadas, ganadas) VALUES (?, ?, ?, ?)
+ON CONFLICT (jugador, dificultad) DO UPDATE SET
+    jugadas = jugadas + excluded.jugadas,
+    ganadas = ganadas + excluded.ganadas
+"""
+
+
+class AlmacenEstadisticas(abc.ABC):
+    """
+    Interfaz común de los almacenes de estadísticas del juego.
+    Las estadísticas de un jugador son un diccionario {'Fácil', 'Medio', 'Difícil', 'All'} -> (jugadas, ganadas).
+    Un almacén que no implemente los métodos abstractos no se puede crear.
+    """
+    @abc.abstractmethod
+    def registrar_partida(self, jugador, opcion_dificultad, ganada=True):
+        """
+        Registra una partida terminada del jugador.
+        """
+
+    @abc.abstractmethod
+    def obtener_estadisticas(self, jugador):
+        """
+        Devuelve las estadísticas del jugador ('total' para las agregadas de todos los jugadores).
+        """
+
+    @abc.abstractmethod
+    def jugadores(self):
+        """
+        Devuelve la lista de nombres de jugadores (sin 'total') en orden de aparición.
+        """
+
+    def obtener_todas(self):
+        """
+        Devuelve un diccionario jugador -> estadísticas, empezando por 'total'.
+        """
+        return {nombre: self.obtener_estadisticas(nombre) for nombre in [JUGADOR_TOTAL] + self.jugadores()}
+
+    def modelo_lectura(self):
+        """
+        Devuelve el ModeloLectura del almacén: se construye una vez y después se actualiza con cada partida registrada.
+        """
+        if getattr(self, '_modelo', None) is None:
+            self._modelo = ModeloLectura.desde_estadisticas(self.obtener_todas())
+        return self._modelo
+
+    def _actualizar_modelo(self, jugador, opcion_dificultad, ganada):
+        if getattr(self, '_modelo', None) is not None:
+            self._modelo.registrar(jugador, opcion_dificultad, ganada)
+
+    def vaciar(self):
+        """
+        Escribe las partidas pendientes (si el almacén las agrupa en lotes).
+        """
+
+    def cerrar(self):
+        """
+        Escribe las partidas pendientes y libera los recursos del almacén.
+        """
+        self.vaciar()
+
+    def exportar_excel(self, ruta=None):
+        """
+        Devuelve una instantánea de las estadísticas en un workbook de openpyxl con la estructura
+        de siempre (hoja 'total' + una hoja por jugador) y la guarda en 'ruta' si se indica.
+        """
+        workbook = openpyxl.Workbook()
+        workbook.active.title = JUGADOR_TOTAL
+        for nombre, estadisticas in self.obtener_todas().items():
+            if nombre != JUGADOR_TOTAL:
+                workbook.create_sheet(nombre)
+            fj.crear_estructura_hoja_inicial(workbook, nombre)
+            for columna, (jugadas, ganadas) in zip('BCDE', estadisticas.values()):
+                workbook[nombre][f'{columna}2'].value = jugadas
+                workbook[nombre][f'{columna}3'].value = ganadas
+        if ruta is not None:
+            workbook.save(ruta)
+        return workbook
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.cerrar()
+
+
+class AlmacenSQLite(AlmacenEstadisticas):
+    """
+    Almacén en SQLite (modo WAL): un registro de partidas de solo inserción ('partidas') y una tabla de
+    agregados por jugador/dificultad ('agregados', incluida la fila 'total') que se actualiza de forma
+    incremental con UPSERT en la misma transacción.
+    Las partidas se escriben por lotes de 'tam_lote'; varias sesiones/procesos pueden compartir el archivo.
+    Si se indica 'excel_inicial' y la base de datos todavía no tiene partidas, se importa una única vez
+    el historial de ese excel (ver importar_excel).
+    """
+    def __init__(self, ruta_db, tam_lote=64, excel_inicial=None):
+        self.ruta_db = ruta_db
+        self.tam_lote = tam_lote
+        self._pendientes = []
+        self.conexion = sqlite3.connect(ruta_db, timeout=30, isolation_level=None, check_same_thread=False)
+        self.conexion.execute('PRAGMA journal_mode=WAL')
+        self.conexion.execute('PRAGMA synchronous=NORMAL')
+        self.conexion.executescript(_ESQUEMA)
+        if excel_inicial is not None and os.path.exists(excel_inicial) and self._vacia():
+            self.importar_excel(excel_inicial)
+
+    def _vacia(self):
+        return self.conexion.execute('SELECT 1 FROM partidas LIMIT 1').fetchone() is None
+
+    def importar_excel(self, ruta):
+        """
+        Migración del almacenamiento original: importa el historial de un excel con la estructura de siempre
+        (hoja 'total' + una hoja por jugador) al registro de partidas, con instante 0 (desconocido), y a los agregados.
+        La hoja 'total' se recalcula a partir de las hojas de los jugadores. Devuelve el número de partidas importadas.
+        """
+        workbook = openpyxl.load_workbook(ruta)
+        partidas = []
+        for nombre in workbook.sheetnames:
+            if nombre == JUGADOR_TOTAL:
+                continue
+            hoja = workbook[nombre]
+            for columna, dificultad in zip('BCD', DIFICULTADES):
+                jugadas = int(hoja[f'{columna}2'].value or 0)
+                ganadas = int(hoja[f'{columna}3'].value or 0)
+                partidas += [(0.0, nombre, dificultad, 1)] * ganadas + [(0.0, nombre, dificultad, 0)] * (jugadas - ganadas)
+        self.vaciar()
+        self._pendientes = partidas
+        self.vaciar()  # una sola transacción
+        self._modelo = None
+        return len(partidas)
+
+    def registrar_partida(self, jugador, opcion_dificultad, ganada=True):
+        if opcion_dificultad not in DIFICULTADES:
+            raise ValueError(f'Dificultad no válida: {opcion_dificultad}')
+        if jugador == JUGADOR_TOTAL:
+            raise ValueError(f"El nombre '{JUGADOR_TOTAL}' está reservado.")
+        self._pendientes.append((time.time(), jugador, opcion_dificultad, int(bool(ganada))))
+        self._actualizar_modelo(jugador, opcion_dificultad, ganada)
+        if len(self._pendientes) >= self.tam_lote:
+            self.vaciar()
+
+    def vaciar(self):
+        if not self._pendientes:
+            return
+        partidas, self._pendientes = self._pendientes, []
+
+        # Un único UPSERT por (jugador, dificultad) del lote, más la fila 'total'.
+        jugadas = Counter()
+        ganadas = Counter()
+        for _, jugador, dificultad, ganada in partidas:
+            for clave in ((jugador, dificultad), (JUGADOR_TOTAL, dificultad)):
+                jugadas[clave] += 1
+                ganadas[clave] += ganada
+        deltas = [(jugador, dificultad, n, ganadas[(jugador, dificultad)]) for (jugador, dificultad), n in jugadas.items()]
+
+        try:
+            self.conexion.execute('BEGIN IMMEDIATE')
+            self.conexion.executemany('INSERT INTO partidas (instante, jugador, dificultad, ganada) VALUES (?, ?, ?, ?)', partidas)
+            self.conexion.executemany(_UPSERT_AGREGADOS, deltas)
+            self.conexion.execute('COMMIT')
+        except Exception:
+            if self.conexion.in_transaction:
+                self.conexion.execute('ROLLBACK')
+            self._pendientes = partidas + self._pendientes
+            raise
+
+    def obtener_estadisticas(self, jugador):
+        self.vaciar()
+        filas = self.conexion.execute('SELECT dificultad, jugadas, ganadas FROM agregados WHERE jugador = ?', (jugador,))
+        return _estadisticas_desde_filas(filas)
+
+    def obtener_todas(self):
+        self.vaciar()
+        filas = self.conexion.execute("""
+            SELECT jugador, dificultad, jugadas, ganadas FROM agregados
+            ORDER BY jugador != ?, MIN(rowid) OVER (PARTITION BY jugador)
+        """, (JUGADOR_TOTAL,)).fetchall()
+        por_jugador = {JUGADOR_TOTAL: []}
+        for jugador, dificultad, jugadas, ganadas in filas:
+            por_jugador.setdefault(jugador, []).append((dificultad, jugadas, ganadas))
+        return {jugador: _estadisticas_desde_filas(filas) for jugador, filas in por_jugador.items()}
+
+    def modelo_lectura(self):
+        """
+        Devuelve el ModeloLectura del almacén. Solo se reconstruye si otra conexión ha escrito en la base de datos
+        (PRAGMA data_version); las partidas de esta conexión lo actualizan de forma incremental.
+        """
+        version = self.conexion.execute('PRAGMA data_version').fetchone()[0]
+        if getattr(self, '_modelo', None) is None or version != self._version_modelo:
+            self.vaciar()
+            filas = self.conexion.execute('SELECT jugador, dificultad, jugadas, ganadas FROM agregados WHERE jugador != ? ORDER BY rowid',
+                                          (JUGADOR_TOTAL,)).fetchall()
+            self._modelo = ModeloLectura.desde_filas(filas)
+            self._version_modelo = self.conexion.execute('PRAGMA data_version').fetchone()[0]
+        return self._modelo
+
+    def jugadores(self):
+        self.vaciar()
+        filas = self.conexion.execute('SELECT jugador FROM agregados WHERE jugador != ? GROUP BY jugador ORDER BY MIN(rowid)',
+                                      (JUGADOR_TOTAL,))
+        return [jugador for (jugador,) in filas]
+
+    def reconstruir_agregados(self):
+        """
+        Recalcula la tabla de agregados desde el registro de partidas (fuente de verdad).
+        """
+        self.vaciar()
+        self.conexion.execute('BEGIN IMMEDIATE')
+        try:
+            self.conexion.execute('DELETE FROM agregados')
+            self.conexion.execute("""
+                INSERT INTO agregados (jugador, dificultad, jugadas, ganadas)
+                SELECT jugador, dificultad, COUNT(*), SUM(ganada) FROM partidas GROUP BY jugador, dificultad ORDER BY MIN(id)
+            """)
+            self.conexion.execute("""
+                INSERT INTO agregados (jugador, dificultad, jugadas, ganadas)
+                SELECT ?, dificultad, COUNT(*), SUM(ganada) FROM partidas GROUP BY dificultad
+            """, (JUGADOR_TOTAL,))
+            self.conexion.execute('COMMIT')
+        except Exception:
+            self.conexion.execute('ROLLBACK')
+            raise
+
+    def cerrar(self):
+        self.vaciar()
+        self.conexion.close()
+
+
+class AlmacenExcel(AlmacenEstadisticas):
+    """
+    Adaptador del almacenamiento original: modifica celda a celda un workbook de openpyxl
+    y lo guarda en 'ruta' (si se indica) al vaciar/cerrar.
+    """
+    def __init__(self, objeto_workbook, ruta=None):
+        self.workbook = objeto_workbook
+        self.ruta = ruta
+        if JUGADOR_TOTAL not in self.workbook.sheetnames:
+            self.workbook.active.title = JUGADOR_TOTAL
+            fj.crear_estructura_hoja_inicial(self.workbook, JUGADOR_TOTAL)
+
+    def registrar_partida(self, jugador, opcion_dificultad, ganada=True):
+        if jugador not in self.workbook.sheetnames:
+            self.workbook.create_sheet(jugador)
+            fj.crear_estructura_hoja_inicial(self.workbook, jugador)
+        fj.actualizar_estadisticas(self.workbook, jugador, opcion_dificultad, ganada)
+        self._actualizar_modelo(jugador, opcion_dificultad, ganada)
+
+    def obtener_estadisticas(self, jugador):
+        hoja = self.workbook[jugador]
+        return {hoja[f'{columna}1'].value: (hoja[f'{columna}2'].value, hoja[f'{columna}3'].value) for columna in 'BCDE'}
+
+    def jugadores(self):
+        return [nombre for nombre in self.workbook.sheetnames if nombre != JUGADOR_TOTAL]
+
+    def vaciar(self):
+        if self.ruta is not None:
+            self.workbook.save(self.ruta)
+
+    def exportar_excel(self, ruta=None):
+        if ruta is not None:
+            self.workbook.save(ruta)
+        return self.workbook
+
+
+class ModeloLectura:
+    """
+    Modelo de lectura materializado de las estadísticas: contadores en un array de numpy
+    (jugador x [jugadas, ganadas] x dificultad, fila 0 = 'total') que se actualizan de forma incremental
+    con cada partida. Las clasificaciones calculadas se guardan en caché hasta la siguiente escritura.
+    """
+    def __init__(self, capacidad=1024):
+        self.nombres = [JUGADOR_TOTAL]
+        self._filas = {JUGADOR_TOTAL: 0}
+        self.contadores = np.zeros((max(capacidad, 1), 2, len(DIFICULTADES)), dtype=np.int64)
+        self._cache = {}
+
+    @classmethod
+    def desde_filas(cls, filas):
+        """
+        Devuelve el modelo construido a partir de filas (jugador, dificultad, jugadas, ganadas) sin la fila 'total'.
+        """
+        jugadores, dificultades, jugadas, ganadas = (list(columna) for columna in zip(*filas)) if filas else ([], [], [], [])
+        codigos, nombres = pd.factorize(pd.Series(jugadores, dtype=object))
+        modelo = cls(capacidad=2 * (len(nombres) + 1))
+        modelo.nombres.extend(nombres)
+        modelo._filas.update({nombre: fila for fila, nombre in enumerate(modelo.nombres)})
+        indice = (codigos + 1, np.asarray(dificultades, dtype=np.int64) - 1)
+        np.add.at(modelo.contadores[:, 0, :], indice, np.asarray(jugadas, dtype=np.int64))
+        np.add.at(modelo.contadores[:, 1, :], indice, np.asarray(ganadas, dtype=np.int64))
+        modelo.contadores[0] = modelo.contadores[1:len(modelo.nombres)].sum(axis=0)
+        return modelo
+
+    @classmethod
+    def desde_estadisticas(cls, estadisticas):
+        """
+        Devuelve el modelo construido a partir de un diccionario jugador -> estadísticas (como obtener_todas).
+        """
+        filas = [(jugador, dificultad, *valores[nombre])
+                 for jugador, valores in estadisticas.items() if jugador != JUGADOR_TOTAL
+                 for dificultad, nombre in DIFICULTADES.items()]
+        return cls.desde_filas(filas)
+
+    def _fila(self, jugador):
+        fila = self._filas.get(jugador)
+        if fila is None:
+            fila = len(self.nombres)
+            if fila == len(self.contadores):
+                self.contadores = np.concatenate([self.contadores, np.zeros_like(self.contadores)])
+            self.nombres.append(jugador)
+            self._filas[jugador] = fila
+        return fila
+
+    def registrar(self, jugador, opcion_dificultad, ganada=True):
+        """
+        Suma una partida al jugador y a 'total' e invalida las clasificaciones en caché.
+        """
+        fila = self._fila(jugador)
+        columna = opcion_dificultad - 1
+        self.contadores[[fila, 0], 0, columna] += 1
+        if ganada:
+            self.contadores[[fila, 0], 1, columna] += 1
+        self._cache.clear()
+
+    def jugadores(self):
+        return self.nombres[1:]
+
+    def obtener_estadisticas(self, jugador):
+        """
+        Devuelve las estadísticas del jugador con el mismo formato que los almacenes.
+        """
+        jugadas, ganadas = self.contadores[self._filas[jugador]].tolist()
+        estadisticas = {nombre: (jugadas[i], ganadas[i]) for i, nombre in enumerate(DIFICULTADES.values())}
+        estadisticas['All'] = (sum(jugadas), sum(ganadas))
+        return estadisticas
+
+    def _totales(self, opcion_dificultad=None):
+        contadores = self.contadores[1:len(self.nombres)]
+        if opcion_dificultad is None:
+            return contadores[:, 0, :].sum(axis=1), contadores[:, 1, :].sum(axis=1)
+        return contadores[:, 0, opcion_dificultad - 1], contadores[:, 1, opcion_dificultad - 1]
+
+    def clasificacion(self, k=10, criterio='ganadas', opcion_dificultad=None, min_jugadas=1):
+        """
+        Devuelve un DataFrame con los 'k' mejores jugadores según 'criterio' ('ganadas', 'jugadas' o 'tasa'),
+        en una dificultad (1-3) o en todas (None), entre los que tienen al menos 'min_jugadas' partidas.
+        Los empates se deshacen por número de partidas ganadas y después jugadas.
+        """
+        clave = (k, criterio, opcion_dificultad, min_jugadas)
+        if clave in self._cache:
+            return self._cache[clave]
+        jugadas, ganadas = self._totales(opcion_dificultad)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            tasa = ganadas / jugadas
+        valores = {'ganadas': ganadas, 'jugadas': jugadas, 'tasa': tasa}[criterio]
+
+        candidatos = np.flatnonzero(jugadas >= min_jugadas)
+        k = min(k, candidatos.size)
+        if k < candidatos.size:
+            candidatos = candidatos[np.argpartition(-valores[candidatos], k - 1)[:k]]
+            # Completar con los empatados con el último para que el desempate sea correcto.
+            umbral = valores[candidatos].min()
+            candidatos = np.flatnonzero((jugadas >= min_jugadas) & (valores >= umbral))
+        orden = np.lexsort((-jugadas[candidatos], -ganadas[candidatos], -valores[candidatos]))[:k]
+        filas = candidatos[orden]
+        df = pd.DataFrame({'jugador': np.asarray(self.nombres, dtype=object)[filas + 1],
+                           'jugadas': jugadas[filas],
+                           'ganadas': ganadas[filas],
+                           'tasa': tasa[filas]},
+                          index=pd.RangeIndex(1, k + 1, name='posición'))
+        self._cache[clave] = df
+        return df
+
+    def graficar_jugadores(self, jugadores=None, k=20, criterio='ganadas', figsize=None):
+        """
+        Muestra en una sola figura las partidas jugadas y ganadas por dificultad de varios jugadores
+        (por defecto, los 'k' primeros de la clasificación según 'criterio').
+        """
+        if jugadores is None:
+            jugadores = self.clasificacion(k, criterio)['jugador'].tolist()
+        filas = np.array([self._filas[jugador] for jugador in jugadores], dtype=np.int64)
+        jugadas = self.contadores[filas, 0, :]
+        ganadas = self.contadores[filas, 1, :]
+        jugadas = np.column_stack([jugadas, jugadas.sum(axis=1)])
+        ganadas = np.column_stack([ganadas, ganadas.sum(axis=1)])
+
+        titulos = list(DIFICULTADES.values()) + ['All']
+        colores = plt.get_cmap('viridis')(np.linspace(0, 1, len(titulos)))
+        fig, axes = plt.subplots(1, len(titulos), sharey=True,
+                                 figsize=figsize or (14, max(4, 0.3 * len(jugadores) + 1.5)))
+        posiciones = np.arange(len(jugadores))
+        for i, (ax, titulo) in enumerate(zip(axes, titulos)):
+            ax.barh(posiciones, jugadas[:, i], color=colores[i], alpha=0.3, label='Jugadas')
+            ax.barh(posiciones, ganadas[:, i], color=colores[i], alpha=0.8, label='Ganadas')
+            ax.set_title(titulo)
+        axes[0].set_yticks(posiciones, jugadores)
+        axes[0].invert_yaxis()
+        axes[-1].legend(loc='lower right', fontsize='small')
+        plt.tight_layout()
+        plt.show()
+
+
+def abrir_almacen(ruta, **kwargs):
+    """
+    Devuelve el almacén de estadísticas adecuado según la extensión del archivo:
+    '.xlsx' -> AlmacenExcel (se crea o se carga el workbook); cualquier otra -> AlmacenSQLite
+    ('excel_inicial' indica el excel cuyo historial se importa si la base de datos es nueva).
+    """
+    if ruta.endswith('.xlsx'):
+        workbook = openpyxl.load_workbook(ruta) if os.path.exists(ruta) else openpyxl.Workbook()
+        return AlmacenExcel(workbook, ruta=ruta)
+    return AlmacenSQLite(ruta, **kwargs)
+
+
+def _estadisticas_desde_filas(filas):
+    """
+    Devuelve las estadísticas {'Fácil', 'Medio', 'Difícil', 'All'} -> (jugadas, ganadas) de filas (dificultad, jugadas, ganadas).
+    """
+    estadisticas = {nombre: (0, 0) for nombre in DIFICULTADES.values()}
+    for dificultad, jugadas, ganadas in filas:
+        estadisticas[DIFICULTADES[dificultad]] = (jugadas, ganadas)
+    estadisticas['All'] = tuple(map(sum, zip(*estadisticas.values())))
+    return estadisticas
@@ -24,13 +24,29 @@ def mostrar_sub_menu():
     print('2. Medio(12 intentos)')
     print('3. Difícil(5 intentos)')
 
+def es_numero_valido(numero, minimo, maximo):
+    """
+    Devuelve True si el texto introducido es un número (no negativo) dentro del intervalo dado.
+    """
+    return numero.isdigit() and (minimo <= int(numero) <= maximo)
+
+def evaluar_intento(numero_secreto, numero_adivinado):
+    """
+    Devuelve 'mayor' si el número secreto es mayor que el adivinado, 'menor' si es menor y 'acertado' si son iguales.
+    """
+    if numero_secreto > numero_adivinado:
+        return 'mayor'
+    elif numero_secreto < numero_adivinado:
+        return 'menor'
+    return 'acertado'
+
 def validar_num(minimo, maximo):
     """
     Devuelve el número (no negativo) seleccionado que esté en el intervalo dado.
     """
     while True:
         numero = input(f'Introduzca un número entre {minimo} y {maximo}: ')
-        if numero.isdigit() and (minimo <= int(numero) <= maximo):
+        if es_numero_valido(numero, minimo, maximo):
             return int(numero)
 
 def obtener_numero_solitario(minimo, maximo):
@@ -45,7 +61,7 @@ def obtener_numero_2jugadores(minimo, maximo):
     """
     while True:
         numero = getpass(f'Introduzca un número entre {minimo} y {maximo}: ')
-        if numero.isdigit() and (minimo <= int(numero) <= maximo):
+        if es_numero_valido(numero, minimo, maximo):
             return int(numero)
 
 def obtener_numero_intentos(opcion_dificultad):
@@ -75,7 +91,7 @@ def obtener_numero_adivinado(minimo, maximo, num_intento, total_intentos):
     """
     while True:
         numero = input(f'El número secreto está entre el {minimo} y {maximo} (intento número {num_intento} de {total_intentos}): ')
-        if numero.isdigit() and (minimo <= int(numero) <= maximo):
+        if es_numero_valido(numero, minimo, maximo):
             return int(numero)
 
 def crear_estructura_hoja_inicial(objeto_workbook, nombre_hoja):
@@ -108,7 +124,12 @@ def actualizar_estadisticas(objeto_workbook, nombre_hoja, opcion_dificultad, gan
     """
     Actualiza los datos de las hojas de excel correspondientes al nombre del jugador y
     la hoja 'total' según la dificultad del juego y de si la partida ha sido ganada o perdida.
+    También acepta un almacén de estadisticas_juego (p. ej. AlmacenSQLite) en lugar del workbook.
     """
+    if hasattr(objeto_workbook, 'registrar_partida'):
+        objeto_workbook.registrar_partida(nombre_hoja, opcion_dificultad, ganada)
+        return
+
     if opcion_dificultad == 1:
         objeto_workbook[nombre_hoja]['B2'].value += 1      # facil jugadas
         objeto_workbook['total']['B2'].value += 1          # total facil jugadas
@@ -142,28 +163,34 @@ def mostrar_menu_estadisticas():
     """
     print('1. Visualizar estadísticas de forma descriptiva.')
     print('2. Visualizar estadísticas de forma gráfica.')
+    print('3. Visualizar la clasificación de jugadores.')
+    print('4. Exportar las estadísticas a excel.')
+
+def leer_estadisticas(objeto_workbook, nombre_hoja):
+    """
+    Devuelve las estadísticas del jugador/'total' como diccionario {'Fácil', 'Medio', 'Difícil', 'All'} -> (jugadas, ganadas),
+    tanto de un workbook como de un almacén/modelo de lectura de estadisticas_juego.
+    """
+    if hasattr(objeto_workbook, 'obtener_estadisticas'):
+        return objeto_workbook.obtener_estadisticas(nombre_hoja)
+    hoja = objeto_workbook[nombre_hoja]
+    return {hoja[f'{columna}1'].value: (hoja[f'{columna}2'].value, hoja[f'{columna}3'].value) for columna in 'BCDE'}
 
 def visualizar_estadisticas_descriptivas(objeto_workbook, nombre_hoja):
     """
     Muestra las estadísticas totales del jugador/'total' de forma descriptiva (en texto) por la pantalla.
     """
     print("Jugador: ".rjust(9), nombre_hoja)
-    print("Fácil: ".rjust(9), "Del total de", objeto_workbook[nombre_hoja]['B2'].value, "partida/s, se ha/n ganado", objeto_workbook[nombre_hoja]['B3'].value)
-    print("Medio: ".rjust(9), "Del total de", objeto_workbook[nombre_hoja]['C2'].value, "partida/s, se ha/n ganado", objeto_workbook[nombre_hoja]['C3'].value)
-    print("Difícil: ".rjust(9), "Del total de", objeto_workbook[nombre_hoja]['D2'].value, "partida/s, se ha/n ganado", objeto_workbook[nombre_hoja]['D3'].value)
-    print("All: ".rjust(9), "Del total de", objeto_workbook[nombre_hoja]['E2'].value, "partida/s, se ha/n ganado", objeto_workbook[nombre_hoja]['E3'].value)
+    for dificultad, (jugadas, ganadas) in leer_estadisticas(objeto_workbook, nombre_hoja).items():
+        print(f"{dificultad}: ".rjust(9), "Del total de", jugadas, "partida/s, se ha/n ganado", ganadas)
 
 def visualizar_estadisticas_graficas(objeto_workbook, nombre_jugador):
     """
     Muestra las estadísticas totales del jugador/'total' por medio de un gráfico de barras horizontales por la pantalla.
     """
-    df = pd.DataFrame({
-                        nombre_jugador + ': ' + objeto_workbook[nombre_jugador]['B1'].value: [objeto_workbook[nombre_jugador]['B3'].value, objeto_workbook[nombre_jugador]['B2'].value],
-                        nombre_jugador + ': ' + objeto_workbook[nombre_jugador]['C1'].value: [objeto_workbook[nombre_jugador]['C3'].value, objeto_workbook[nombre_jugador]['C2'].value],
-                        nombre_jugador + ': ' + objeto_workbook[nombre_jugador]['D1'].value: [objeto_workbook[nombre_jugador]['D3'].value, objeto_workbook[nombre_jugador]['D2'].value],
-                        nombre_jugador + ': ' + objeto_workbook[nombre_jugador]['E1'].value: [objeto_workbook[nombre_jugador]['E3'].value, objeto_workbook[nombre_jugador]['E2'].value]
-                        },
-                        index=[objeto_workbook[nombre_jugador]['A3'].value, objeto_workbook[nombre_jugador]['A2'].value])
+    df = pd.DataFrame({nombre_jugador + ': ' + dificultad: [ganadas, jugadas]
+                       for dificultad, (jugadas, ganadas) in leer_estadisticas(objeto_workbook, nombre_jugador).items()},
+                      index=['Ganadas', 'Jugadas'])
     
     df.plot.barh(subplots=True,
                 figsize=(8, 6),
@@ -171,4 +198,4 @@ def visualizar_estadisticas_graficas(objeto_workbook, nombre_jugador):
                 cmap='viridis')
     
     plt.tight_layout()
-    plt.show()
\ No newline at end of file
+    plt.show()
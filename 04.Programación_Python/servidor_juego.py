@@ -0,0 +1,302 @@
+# Librerías
+import argparse
+import asyncio
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import funciones_juego as fj
+import estadisticas_juego as ej
+from simulador_juego import Partida
+
+
+# Protocolo de texto, una orden por línea (UTF-8):
+#   cliente -> servidor: JUGAR <nombre> <ADIVINA|ELIGE|SOLO> <dificultad 1-3> | SECRETO <n> | INTENTO <n> | SALIR
+#   servidor -> cliente: ESPERANDO | EMPAREJADO <rival> | PIDE SECRETO <min> <max> | PIDE INTENTO <i> <total> <min> <max>
+#                        RESULTADO <n> <MAYOR|MENOR|ACERTADO> | FIN <GANADA|PERDIDA> <secreto> <intentos> | FIN ABANDONO
+#                        ERROR <mensaje>
+ROLES = {'ADIVINA': 'ELIGE', 'ELIGE': 'ADIVINA', 'SOLO': None}
+
+
+class Sesion:
+    """
+    Conexión de un jugador con el servidor.
+    """
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+        self.nombre = None
+
+    async def enviar(self, *partes):
+        """
+        Envía una línea con las partes separadas por espacios.
+        """
+        if self.writer.is_closing():
+            raise ConnectionError('Conexión cerrada.')
+        self.writer.write((' '.join(map(str, partes)) + '\n').encode())
+        await self.writer.drain()
+
+    async def leer(self):
+        """
+        Devuelve la siguiente línea del cliente separada en partes.
+        """
+        linea = await self.reader.readline()
+        if not linea:
+            raise ConnectionError('Conexión cerrada por el cliente.')
+        return linea.decode(errors='replace').split()
+
+
+class EscritorEstadisticas:
+    """
+    Registra las partidas terminadas con la semántica de actualizar_estadisticas sin bloquear el bucle de eventos:
+    las partidas se encolan y un único hilo las escribe en el almacén por lotes de hasta 'tam_lote'
+    (esperando como mucho 'intervalo' segundos a que se llene el lote).
+    """
+    def __init__(self, almacen, tam_lote=256, intervalo=0.5):
+        self.almacen = almacen
+        self.tam_lote = tam_lote
+        self.intervalo = intervalo
+        self.cola = asyncio.Queue()
+        self.escritas = 0
+        self._hilo = ThreadPoolExecutor(max_workers=1)
+        self._tarea = None
+        self._lote = None  # lote sacado de la cola que aún no se ha entregado al hilo
+
+    def iniciar(self):
+        self._tarea = asyncio.create_task(self._ejecutar())
+
+    def registrar(self, jugador, opcion_dificultad, ganada):
+        self.cola.put_nowait((jugador, opcion_dificultad, ganada))
+
+    def _sacar_lote(self, lote):
+        while len(lote) < self.tam_lote and not self.cola.empty():
+            lote.append(self.cola.get_nowait())
+        return lote
+
+    async def _ejecutar(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            self._lote = self._sacar_lote([await self.cola.get()])
+            if len(self._lote) < self.tam_lote:
+                await asyncio.sleep(self.intervalo)
+                self._sacar_lote(self._lote)
+            lote, self._lote = self._lote, None
+            await loop.run_in_executor(self._hilo, self._escribir, lote)
+
+    def _escribir(self, lote):
+        for jugador, opcion_dificultad, ganada in lote:
+            fj.actualizar_estadisticas(self.almacen, jugador, opcion_dificultad, ganada)
+        self.almacen.vaciar()
+        self.escritas += len(lote)
+
+    async def cerrar(self):
+        """
+        Escribe las partidas todavía encoladas y cierra el almacén.
+        """
+        if self._tarea is not None:
+            self._tarea.cancel()
+            try:
+                await self._tarea
+            except asyncio.CancelledError:
+                pass
+        pendientes = self._sacar_lote(self._lote or [])
+        self._lote = None
+        while pendientes:
+            await asyncio.get_running_loop().run_in_executor(self._hilo, self._escribir, pendientes)
+            pendientes = self._sacar_lote([])
+        await asyncio.get_running_loop().run_in_executor(self._hilo, self.almacen.cerrar)
+        self._hilo.shutdown()
+
+
+class ServidorJuego:
+    """
+    Servidor asyncio del juego de la adivinanza: empareja a quien elige el número con quien lo adivina
+    (por dificultad) y hospeda miles de partidas simultáneas con las mismas reglas que el juego de terminal.
+    """
+    def __init__(self, almacen, minimo=1, maximo=1000, tam_lote=256):
+        self.minimo = minimo
+        self.maximo = maximo
+        self.escritor = EscritorEstadisticas(almacen, tam_lote=tam_lote)
+        self.esperando = {(rol, dificultad): deque() for rol in ('ADIVINA', 'ELIGE') for dificultad in ej.DIFICULTADES}
+        self.partidas_terminadas = 0
+        self.sesiones_activas = 0
+
+    async def iniciar(self, host='127.0.0.1', puerto=8765):
+        """
+        Devuelve el asyncio.Server escuchando en host:puerto.
+        """
+        self.escritor.iniciar()
+        return await asyncio.start_server(self.atender, host, puerto, backlog=4096)
+
+    async def cerrar(self):
+        await self.escritor.cerrar()
+
+    async def atender(self, reader, writer):
+        sesion = Sesion(reader, writer)
+        self.sesiones_activas += 1
+        try:
+            while True:
+                partes = await sesion.leer()
+                if partes[:1] == ['SALIR']:
+                    break
+                orden = self._validar_jugar(partes)
+                if isinstance(orden, str):
+                    await sesion.enviar('ERROR', orden)
+                    continue
+                sesion.nombre, rol, dificultad = orden
+                if rol == 'SOLO':
+                    await self.jugar(sesion, None, dificultad)
+                else:
+                    await self.emparejar(sesion, rol, dificultad)
+        except ConnectionError:
+            pass
+        finally:
+            self.sesiones_activas -= 1
+            writer.close()
+
+    def _validar_jugar(self, partes):
+        """
+        Devuelve (nombre, rol, dificultad) de una orden JUGAR o un mensaje de error.
+        """
+        if len(partes) != 4 or partes[0] != 'JUGAR':
+            return 'Uso: JUGAR <nombre> <ADIVINA|ELIGE|SOLO> <dificultad 1-3>'
+        nombre, rol, dificultad = partes[1].lower(), partes[2].upper(), partes[3]
+        if nombre == ej.JUGADOR_TOTAL:
+            return f"El nombre '{ej.JUGADOR_TOTAL}' está reservado."
+        if rol not in ROLES:
+            return f'Rol no válido: {rol}'
+        if not fj.es_numero_valido(dificultad, 1, 3):
+            return 'La dificultad debe estar entre 1 y 3.'
+        return nombre, rol, int(dificultad)
+
+    async def emparejar(self, sesion, rol, dificultad):
+        """
+        Empareja la sesión con un rival en espera (y juega la partida) o la deja esperando hasta que termine su partida.
+        Mientras espera se vigila la conexión: si el cliente se desconecta (o envía algo) sale de la cola de espera.
+        """
+        cola_rivales = self.esperando[(ROLES[rol], dificultad)]
+        while cola_rivales:
+            rival, terminada, lectura = cola_rivales.popleft()
+            if terminada.done() or rival.writer.is_closing():
+                continue
+            # La lectura de vigilancia del rival debe terminar antes de leer de su conexión.
+            lectura.cancel()
+            await asyncio.wait([lectura])
+            if not lectura.cancelled():  # el rival se desconectó o escribió mientras esperaba
+                continue
+            adivina, elige = (sesion, rival) if rol == 'ADIVINA' else (rival, sesion)
+            try:
+                await self.jugar(adivina, elige, dificultad)
+            finally:
+                if not terminada.done():  # cancelada si la tarea del rival se canceló mientras esperaba
+                    terminada.set_result(None)
+            return
+
+        cola_propia = self.esperando[(rol, dificultad)]
+        entrada = (sesion, asyncio.get_running_loop().create_future(), asyncio.ensure_future(sesion.reader.readline()))
+        _, terminada, lectura = entrada
+        cola_propia.append(entrada)
+        try:
+            await sesion.enviar('ESPERANDO')
+            await asyncio.wait([terminada, lectura], return_when=asyncio.FIRST_COMPLETED)
+            if terminada.done() or lectura.cancelled():  # emparejada: la partida se juega en la tarea del rival
+                await terminada
+                return
+            # Nadie la ha emparejado y el cliente ha cerrado la conexión o ha enviado algo: sale de la cola.
+            if entrada in cola_propia:
+                cola_propia.remove(entrada)
+            terminada.cancel()
+            linea = b'' if lectura.exception() is not None else lectura.result()
+            if not linea or linea.split()[:1] == [b'SALIR']:
+                raise ConnectionError('Conexión cerrada por el cliente.')
+            await sesion.enviar('ERROR', 'No se puede enviar nada mientras se espera rival; vuelva a enviar JUGAR.')
+        finally:
+            if not terminada.done():
+                terminada.cancel()
+                lectura.cancel()
+
+    async def jugar(self, adivina, elige, dificultad):
+        """
+        Juega una partida entre 'adivina' y 'elige' (None: el número lo elige el servidor, como en el modo solitario).
+        """
+        try:
+            if elige is not None:
+                await adivina.enviar('EMPAREJADO', elige.nombre)
+                await elige.enviar('EMPAREJADO', adivina.nombre)
+                secreto = await self._pedir_numero(elige, 'SECRETO', ('SECRETO', self.minimo, self.maximo))
+            else:
+                secreto = fj.obtener_numero_solitario(self.minimo, self.maximo)
+
+            partida = Partida(secreto, fj.obtener_numero_intentos(dificultad), self.minimo, self.maximo)
+            while not partida.terminada:
+                numero = await self._pedir_numero(adivina, 'INTENTO',
+                                                  ('INTENTO', partida.intentos + 1, partida.total_intentos, self.minimo, self.maximo))
+                resultado = ('RESULTADO', numero, partida.intentar(numero).upper())
+                await adivina.enviar(*resultado)
+                if elige is not None:
+                    await elige.enviar(*resultado)
+        except ConnectionError:
+            for sesion in (adivina, elige):
+                if sesion is not None:
+                    try:
+                        await sesion.enviar('FIN', 'ABANDONO')
+                    except ConnectionError:
+                        pass
+            return
+
+        fin = ('FIN', 'GANADA' if partida.ganada else 'PERDIDA', secreto, partida.intentos)
+        self.escritor.registrar(adivina.nombre, dificultad, partida.ganada)
+        self.partidas_terminadas += 1
+        # Cada sesión recibe el final por separado: si una se ha desconectado, la otra (que puede ser la de la tarea
+        # que ejecuta la partida) no debe perder su conexión.
+        for sesion in (adivina, elige):
+            if sesion is not None:
+                try:
+                    await sesion.enviar(*fin)
+                except ConnectionError:
+                    pass
+
+    async def _pedir_numero(self, sesion, orden, pregunta):
+        """
+        Pide a la sesión un número dentro del intervalo del juego hasta que envíe uno válido.
+        """
+        while True:
+            await sesion.enviar('PIDE', *pregunta)
+            partes = await sesion.leer()
+            if len(partes) == 2 and partes[0] == orden and fj.es_numero_valido(partes[1], self.minimo, self.maximo):
+                return int(partes[1])
+            await sesion.enviar('ERROR', f'Se esperaba: {orden} <número entre {self.minimo} y {self.maximo}>')
+
+
+async def servir(host='127.0.0.1', puerto=8765, ruta_db='Tarea_Estadisticas.db', minimo=1, maximo=1000):
+    """
+    Arranca el servidor y lo mantiene hasta que se interrumpa.
+    """
+    servidor_juego = ServidorJuego(ej.abrir_almacen(ruta_db), minimo, maximo)
+    servidor = await servidor_juego.iniciar(host, puerto)
+    print(f'Servidor del juego escuchando en {host}:{puerto} (estadísticas en {ruta_db})', flush=True)
+    try:
+        async with servidor:
+            await servidor.serve_forever()
+    finally:
+        await servidor_juego.cerrar()
+
+
+def main(argv=None):
+    """
+    Línea de comandos: python servidor_juego.py --puerto 8765 --db Tarea_Estadisticas.db
+    """
+    parser = argparse.ArgumentParser(description='Servidor del juego de la adivinanza de número.')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--puerto', type=int, default=8765)
+    parser.add_argument('--db', default='Tarea_Estadisticas.db', help='Almacén de estadísticas (.db o .xlsx).')
+    parser.add_argument('--min', type=int, default=1, dest='minimo')
+    parser.add_argument('--max', type=int, default=1000, dest='maximo')
+    args = parser.parse_args(argv)
+    try:
+        asyncio.run(servir(args.host, args.puerto, args.db, args.minimo, args.maximo))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,206 @@
+# Librerías
+import argparse
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+import funciones_juego as fj
+from estadisticas_juego import DIFICULTADES
+
+
+# Estrategias de adivinanza: reciben los límites conocidos (arrays 'minimos', 'maximos', uno por partida)
+# y un generador de numpy, y devuelven un array con el siguiente número de cada partida.
+
+def estrategia_biseccion(minimos, maximos, rng):
+    """
+    Devuelve el punto medio del intervalo todavía posible (búsqueda binaria).
+    """
+    return (minimos + maximos) // 2
+
+def estrategia_aleatoria(minimos, maximos, rng):
+    """
+    Devuelve un número al azar dentro del intervalo todavía posible.
+    """
+    return rng.integers(minimos, maximos + 1)
+
+ESTRATEGIAS = {'biseccion': estrategia_biseccion, 'aleatoria': estrategia_aleatoria}
+
+# Modos del jugador que elige el número secreto.
+SECRETOS = ('uniforme', 'adversario')
+
+
+class Partida:
+    """
+    Estado de una partida sin entrada/salida: el número secreto, los intentos y los límites conocidos.
+    """
+    def __init__(self, numero_secreto, total_intentos, minimo, maximo):
+        self.numero_secreto = numero_secreto
+        self.total_intentos = total_intentos
+        self.minimo = minimo
+        self.maximo = maximo
+        self.intentos = 0
+        self.ganada = False
+
+    @property
+    def terminada(self):
+        return self.ganada or self.intentos >= self.total_intentos
+
+    def intentar(self, numero_adivinado):
+        """
+        Registra un intento y devuelve 'mayor', 'menor' o 'acertado'.
+        """
+        if self.terminada:
+            raise ValueError('La partida ya ha terminado.')
+        self.intentos += 1
+        resultado = fj.evaluar_intento(self.numero_secreto, numero_adivinado)
+        if resultado == 'mayor':
+            self.minimo = max(self.minimo, numero_adivinado + 1)
+        elif resultado == 'menor':
+            self.maximo = min(self.maximo, numero_adivinado - 1)
+        else:
+            self.ganada = True
+        return resultado
+
+
+def jugar_partida(estrategia, numero_secreto, total_intentos, minimo=1, maximo=1000, rng=None):
+    """
+    Juega una partida completa con la estrategia dada y devuelve el objeto Partida terminado.
+    """
+    estrategia = ESTRATEGIAS.get(estrategia, estrategia)
+    rng = np.random.default_rng() if rng is None else rng
+    partida = Partida(numero_secreto, total_intentos, minimo, maximo)
+    while not partida.terminada:
+        numero = estrategia(np.array([partida.minimo]), np.array([partida.maximo]), rng)[0]
+        partida.intentar(int(numero))
+    return partida
+
+
+def simular_partidas(n_partidas, total_intentos, minimo=1, maximo=1000, estrategia='biseccion', secreto='uniforme', semilla=0):
+    """
+    Simula 'n_partidas' partidas a la vez con arrays de numpy (una ronda por intento) y devuelve
+    un diccionario con 'partidas', 'ganadas' y 'suma_intentos' (intentos usados en las partidas ganadas).
+    * secreto='uniforme': el número secreto es aleatorio en [minimo, maximo].
+    * secreto='adversario': no hay número fijo; quien lo elige responde siempre hacia el lado con más
+      candidatos y solo se rinde cuando queda uno (peor caso para quien adivina).
+    """
+    estrategia = ESTRATEGIAS.get(estrategia, estrategia)
+    if secreto not in SECRETOS:
+        raise ValueError(f'Modo de secreto no válido: {secreto}')
+    rng = np.random.default_rng(semilla)
+    minimos = np.full(n_partidas, minimo, dtype=np.int64)
+    maximos = np.full(n_partidas, maximo, dtype=np.int64)
+    secretos = rng.integers(minimo, maximo + 1, n_partidas) if secreto == 'uniforme' else None
+    activas = np.arange(n_partidas)
+    ganadas = 0
+    suma_intentos = 0
+
+    for intento in range(1, total_intentos + 1):
+        if activas.size == 0:
+            break
+        bajo, alto = minimos[activas], maximos[activas]
+        numeros = estrategia(bajo, alto, rng)
+        if secretos is not None:
+            objetivo = secretos[activas]
+            acierto = numeros == objetivo
+            subir = numeros < objetivo
+            bajar = numeros > objetivo
+        else:
+            acierto = (bajo == alto) & (numeros == bajo)
+            derecha = np.maximum(alto - np.maximum(numeros, bajo - 1), 0)
+            izquierda = np.maximum(np.minimum(numeros, alto + 1) - bajo, 0)
+            subir = ~acierto & (derecha >= izquierda)
+            bajar = ~acierto & ~subir
+        minimos[activas] = np.where(subir, np.maximum(bajo, numeros + 1), bajo)
+        maximos[activas] = np.where(bajar, np.minimum(alto, numeros - 1), alto)
+
+        n_aciertos = int(acierto.sum())
+        ganadas += n_aciertos
+        suma_intentos += n_aciertos * intento
+        activas = activas[~acierto]
+
+    return {'partidas': n_partidas, 'ganadas': ganadas, 'suma_intentos': suma_intentos}
+
+
+def _simular_bloque(argumentos):
+    inicio = time.perf_counter()
+    resultado = simular_partidas(*argumentos)
+    resultado['segundos'] = time.perf_counter() - inicio
+    return resultado
+
+
+def comparar_estrategias(n_partidas=1_000_000,
+                         rangos=((1, 100), (1, 1000)),
+                         estrategias=('biseccion', 'aleatoria'),
+                         secretos=SECRETOS,
+                         dificultades=(1, 2, 3),
+                         n_procesos=None,
+                         tam_bloque=250_000,
+                         semilla=0):
+    """
+    Devuelve un DataFrame con la tasa de victoria por estrategia, modo del secreto, rango y dificultad
+    (intentos de obtener_numero_intentos), simulando 'n_partidas' partidas por combinación.
+    Las partidas se reparten en bloques de 'tam_bloque' entre 'n_procesos' procesos (None o 1: en el proceso actual).
+    'partidas_por_segundo' es el rendimiento de un proceso; el global está en df.attrs['partidas_por_segundo'].
+    """
+    combinaciones = [(estrategia, secreto, rango, dificultad)
+                     for estrategia in estrategias for secreto in secretos
+                     for rango in rangos for dificultad in dificultades]
+    tareas = []
+    for i, (estrategia, secreto, (minimo, maximo), dificultad) in enumerate(combinaciones):
+        tamanos = [tam_bloque] * (n_partidas // tam_bloque) + ([n_partidas % tam_bloque] if n_partidas % tam_bloque else [])
+        semillas = np.random.SeedSequence([semilla, i]).spawn(len(tamanos))
+        for tamano, semilla_bloque in zip(tamanos, semillas):
+            tareas.append((i, (tamano, fj.obtener_numero_intentos(dificultad), minimo, maximo, estrategia, secreto, semilla_bloque)))
+
+    inicio = time.perf_counter()
+    if n_procesos is None or n_procesos == 1:
+        resultados = list(map(_simular_bloque, [argumentos for _, argumentos in tareas]))
+    else:
+        with ProcessPoolExecutor(max_workers=n_procesos) as executor:
+            resultados = list(executor.map(_simular_bloque, [argumentos for _, argumentos in tareas], chunksize=1))
+    segundos_totales = time.perf_counter() - inicio
+
+    totales = pd.DataFrame(resultados).groupby(np.array([i for i, _ in tareas])).sum()
+    df = pd.DataFrame([{'estrategia': estrategia if isinstance(estrategia, str) else estrategia.__name__,
+                        'secreto': secreto,
+                        'rango': f'{minimo}-{maximo}',
+                        'dificultad': DIFICULTADES[dificultad],
+                        'intentos': fj.obtener_numero_intentos(dificultad)}
+                       for estrategia, secreto, (minimo, maximo), dificultad in combinaciones])
+    df['partidas'] = totales['partidas'].to_numpy()
+    df['tasa_victoria'] = totales['ganadas'].to_numpy() / df['partidas']
+    df['intentos_medios'] = totales['suma_intentos'].to_numpy() / totales['ganadas'].replace(0, np.nan).to_numpy()
+    df['partidas_por_segundo'] = df['partidas'] / totales['segundos'].to_numpy()
+    df.attrs['partidas_por_segundo'] = df['partidas'].sum() / segundos_totales
+    return df
+
+
+def main(argv=None):
+    """
+    Línea de comandos: python simulador_juego.py --partidas 1000000 --procesos 4 --rango 1 1000
+    """
+    parser = argparse.ArgumentParser(description='Simulador del juego de la adivinanza de número.')
+    parser.add_argument('--partidas', type=int, default=1_000_000, help='Partidas por combinación.')
+    parser.add_argument('--procesos', type=int, default=None, help='Número de procesos (por defecto, el actual).')
+    parser.add_argument('--rango', type=int, nargs=2, action='append', metavar=('MIN', 'MAX'),
+                        help='Rango del número secreto (se puede repetir). Por defecto 1-100 y 1-1000.')
+    parser.add_argument('--estrategia', choices=list(ESTRATEGIAS), action='append', help='Estrategia (se puede repetir).')
+    parser.add_argument('--secreto', choices=list(SECRETOS), action='append', help='Modo del secreto (se puede repetir).')
+    parser.add_argument('--semilla', type=int, default=0)
+    args = parser.parse_args(argv)
+
+    df = comparar_estrategias(n_partidas=args.partidas,
+                              rangos=[tuple(rango) for rango in args.rango] if args.rango else ((1, 100), (1, 1000)),
+                              estrategias=args.estrategia or tuple(ESTRATEGIAS),
+                              secretos=args.secreto or SECRETOS,
+                              n_procesos=args.procesos,
+                              semilla=args.semilla)
+    with pd.option_context('display.width', 200, 'display.max_rows', None, 'display.float_format', '{:,.4f}'.format):
+        print(df.to_string(index=False))
+    print(f"\n{df['partidas'].sum():,} partidas a {df.attrs['partidas_por_segundo']:,.0f} partidas/segundo")
+
+
+if __name__ == '__main__':
+    main()
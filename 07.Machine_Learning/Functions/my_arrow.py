@@ -0,0 +1,338 @@
+"""
+@author: Hao Qi
+
+Columnar backend of ``my_core``: ``describe_custom``, ``manage_outliers_frame`` and ``get_cramersV`` on Arrow-backed
+inputs (pyarrow Tables/Arrays, Polars DataFrames/Series and pandas objects whose columns are all ``pd.ArrowDtype``)
+computed column by column with ``pyarrow.compute`` kernels on the existing buffers, without building a 2-D NumPy block.
+Polars data is read through its zero-copy ``to_arrow()`` export. pyarrow/polars are only imported when used.
+"""
+
+###############################################################################################################################
+
+import numpy as np
+import pandas as pd
+
+###############################################################################################################################
+
+def backend(obj) -> str | None:
+    """
+    'pyarrow', 'polars' or 'pandas' (every column ``pd.ArrowDtype``) for columnar inputs, None otherwise.
+    """
+    root = type(obj).__module__.split('.')[0]
+    if root in ('pyarrow', 'polars'):
+        return root
+    if isinstance(obj, pd.DataFrame):
+        return 'pandas' if obj.shape[1] and all(isinstance(dtype, pd.ArrowDtype) for dtype in obj.dtypes) else None
+    if isinstance(obj, pd.Series):
+        return 'pandas' if isinstance(obj.dtype, pd.ArrowDtype) else None
+    return None
+
+def _columns(obj) -> tuple[list, list]:
+    """
+    Column labels and ``pa.ChunkedArray`` columns of a table-like columnar input (no copy).
+    """
+    import pyarrow as pa
+    kind = backend(obj)
+    if kind == 'pandas':
+        return list(obj.columns), [_chunked(obj.iloc[:, j].array.__arrow_array__()) for j in range(obj.shape[1])]
+    table = obj.to_arrow() if kind == 'polars' else obj
+    if isinstance(table, pa.RecordBatch):
+        table = pa.Table.from_batches([table])
+    return list(table.column_names), list(table.columns)
+
+def _column(obj) -> tuple[object, object]:
+    """
+    Name and ``pa.ChunkedArray`` of a series-like columnar input (no copy).
+    """
+    kind = backend(obj)
+    if kind == 'pandas':
+        return obj.name, _chunked(obj.array.__arrow_array__())
+    if kind == 'polars':
+        return obj.name, _chunked(obj.to_arrow())
+    if kind == 'pyarrow':
+        return None, _chunked(obj)
+    return obj.name, _chunked(_arrow_from_pandas(obj))
+
+def _chunked(array):
+    import pyarrow as pa
+    return array if isinstance(array, pa.ChunkedArray) else pa.chunked_array([array])
+
+def _rebuild(obj, names, arrays):
+    """
+    Table in the backend of ``obj`` from its labels and (possibly replaced) Arrow columns.
+    """
+    import pyarrow as pa
+    kind = backend(obj)
+    if kind == 'pandas':
+        return pd.DataFrame({name: pd.Series(pd.arrays.ArrowExtensionArray(array), index=obj.index)
+                             for name, array in zip(names, arrays)})
+    table = pa.Table.from_arrays(arrays, names=[str(name) for name in names])
+    if kind == 'polars':
+        import polars as pl
+        return pl.from_arrow(table)
+    return table
+
+def as_pandas(obj):
+    """
+    Zero-copy pandas view (``pd.ArrowDtype`` columns) of a columnar input, e.g. to fingerprint or plot it.
+    """
+    if backend(obj) in (None, 'pandas'):
+        return obj
+    if hasattr(obj, 'num_columns') or hasattr(obj, 'columns'):
+        names, arrays = _columns(obj)
+        return pd.DataFrame({name: pd.arrays.ArrowExtensionArray(array) for name, array in zip(names, arrays)})
+    name, array = _column(obj)
+    return pd.Series(pd.arrays.ArrowExtensionArray(array), name=name)
+
+def _is_numeric(array) -> bool:
+    import pyarrow as pa
+    kind = array.type
+    return pa.types.is_integer(kind) or pa.types.is_floating(kind) or pa.types.is_decimal(kind) or pa.types.is_boolean(kind)
+
+def _numeric(array):
+    """
+    Numeric column with NaN turned into null (pandas treats both as missing); booleans/decimals cast to float64.
+    """
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    if pa.types.is_boolean(array.type) or pa.types.is_decimal(array.type):
+        array = pc.cast(array, pa.float64())
+    if pa.types.is_floating(array.type) and pc.any(pc.is_nan(array)).as_py():
+        array = pc.if_else(pc.is_nan(array), pa.scalar(None, array.type), array)
+    return array
+
+def _count_distinct(array) -> int:
+    """
+    Distinct non-null values. Numeric columns are sorted and adjacent values compared: Arrow's hash-based
+    ``pc.count_distinct`` needs ~350 bytes per distinct value, i.e. GBs for a continuous column of millions of rows.
+    """
+    import pyarrow.compute as pc
+    if not _is_numeric(array):
+        return pc.count_distinct(array, mode='only_valid').as_py()
+    values = pc.drop_null(pc.take(array, pc.sort_indices(array))).combine_chunks()
+    return pc.sum(pc.not_equal(values[1:], values[:-1])).as_py() + 1 if len(values) > 1 else len(values)
+
+def _to_float_numpy(array) -> np.ndarray:
+    """
+    Float64 NumPy copy of a (small) numeric Arrow column with NaN for nulls.
+    """
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    return pc.cast(array, pa.float64()).to_numpy(zero_copy_only=False)
+
+###############################################################################################################################
+
+def describe_columnar(obj, decimals=2, sorted_nunique=True, approx=False, tdigest_delta=200) -> pd.DataFrame:
+    """
+    ``describe_custom`` on a columnar input: same table, computed with Arrow kernels per column.
+    Exact quantiles use ``pc.quantile`` (linear interpolation, like ``np.nanquantile``); with ``approx=True`` they come
+    from ``pc.tdigest``. 'nunique' is always exact.
+    """
+    import pyarrow.compute as pc
+    from my_core import _DESCRIBE_COLUMNS
+    names, arrays = _columns(obj)
+    out = np.full((len(names), len(_DESCRIBE_COLUMNS)), np.nan)
+    for j, array in enumerate(arrays):
+        if not _is_numeric(array):
+            out[j, 0] = pc.count(array).as_py()
+            out[j, 1] = pc.count_distinct(array, mode='only_valid').as_py()
+            continue
+        array = _numeric(array)
+        count = pc.count(array).as_py()
+        out[j, 0] = count
+        out[j, 1] = _count_distinct(array)
+        if count == 0:
+            continue
+        mean = pc.mean(array).as_py()
+        std = pc.stddev(array, ddof=1).as_py() if count > 1 else np.nan
+        with np.errstate(invalid='ignore', divide='ignore'):
+            out[j, 2:5] = mean, std, np.float64(std) / mean
+        if approx is True:
+            out[j, 5:8] = pc.tdigest(array, q=[0.25, 0.50, 0.75], delta=tdigest_delta).to_numpy(zero_copy_only=False)
+        else:
+            out[j, 5:8] = pc.quantile(array, q=[0.25, 0.50, 0.75], interpolation='linear').to_numpy(zero_copy_only=False)
+        min_max = pc.min_max(array)
+        out[j, 8:10] = float(min_max['min'].as_py()), float(min_max['max'].as_py())
+
+    df = pd.DataFrame(out, index=pd.Index(names), columns=_DESCRIBE_COLUMNS).round(decimals)
+    if sorted_nunique is False:
+        return df
+    else:
+        return df.sort_values('nunique', ascending=False)
+
+###############################################################################################################################
+
+def _normality_columnar(array, n, n_rows, normality_test='sample', sample_size=5000, random_state=0) -> tuple:
+    """
+    ``(test, p_value, decision)`` of one column with the rules of ``my_core._normality_test_block``; only the
+    sampled rows (or, for 'full' and n < 50, the column itself) are copied to NumPy.
+    """
+    import pyarrow.compute as pc
+    import scipy.stats as stats
+    from my_core import _MOMENT_LIMITS, _kstest_norm_block, _sample_positions
+    if normality_test not in ['sample', 'full', 'moments']:
+        raise ValueError("normality_test must be one of the list: ['sample', 'full', 'moments']!")
+    if n < 50:
+        values = _to_float_numpy(array.drop_null())
+        return 'shapiro', stats.shapiro(values).pvalue if values.size >= 3 else np.nan, np.nan
+
+    if normality_test == 'moments':
+        deviation = pc.subtract(pc.cast(array, 'float64'), pc.mean(array))
+        m2, m3, m4 = (pc.mean(pc.power(deviation, k)).as_py() for k in (2, 3, 4))
+        with np.errstate(invalid='ignore', divide='ignore'):
+            skew, kurt = np.float64(m3) / np.float64(m2) ** 1.5, np.float64(m4) / np.float64(m2) ** 2 - 3
+        return 'moments', np.nan, float((abs(skew) <= _MOMENT_LIMITS[0]) & (abs(kurt) <= _MOMENT_LIMITS[1]))
+
+    if normality_test == 'sample' and n > sample_size:
+        # Sample among the non-missing values, with the same positions as _sample_valid_block
+        valid = array if n == n_rows else array.drop_null()
+        sub = _to_float_numpy(pc.take(valid, _sample_positions(n, sample_size, random_state)))
+    else:
+        sub = _to_float_numpy(array)
+    n_sub = np.count_nonzero(~np.isnan(sub))
+    return 'KS-sample' if n_sub < n else 'Kolmogo', _kstest_norm_block(sub[:, None], np.array([n_sub]))[0], np.nan
+
+def outliers_columnar(obj,
+                      mode='check',
+                      non_normal_crit='MAD',
+                      n_std=4,
+                      multiplier=4,
+                      MAD_threshold=8,
+                      normal_cols=[],
+                      alpha=0.05,
+                      return_report=False,
+                      normality_test='sample',
+                      sample_size=5000,
+                      random_state=0):
+    """
+    ``manage_outliers_frame`` on a columnar input: same report, computed with Arrow kernels per column.
+    'winsor' and 'miss' modes return a table of the same backend where only the numeric columns are replaced
+    (clipped values keep the column type; removed outliers become nulls).
+    """
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    modes = ['check', 'winsor', 'miss']
+    if mode not in modes:
+        raise ValueError(f"mode must be one of the list: {modes}!")
+    if non_normal_crit not in ['MAD', 'IQR']:
+        raise ValueError("non_normal_crit must be one of the list: ['MAD', 'IQR']!")
+
+    names, arrays = _columns(obj)
+    n_rows = len(arrays[0]) if arrays else 0
+    records = []
+    for j, (name, original) in enumerate(zip(names, arrays)):
+        if not _is_numeric(original) or name == 'outlier_list':
+            continue
+        array = _numeric(original)
+        n = pc.count(array).as_py()
+        record = {'column': name}
+        if n:
+            q1, median, q3 = pc.quantile(array, q=[0.25, 0.50, 0.75]).to_numpy(zero_copy_only=False)
+            mean, std = pc.mean(array).as_py(), pc.stddev(array, ddof=1).as_py() if n > 1 else np.nan
+        else:
+            q1 = median = q3 = mean = std = np.nan
+
+        if name in normal_cols:
+            test, p_value, normal = 'manual', np.nan, True
+        elif n:
+            test, p_value, decision = _normality_columnar(array, n, n_rows, normality_test, sample_size, random_state)
+            normal = bool(p_value >= alpha) if np.isnan(decision) else decision == 1
+        else:
+            test, p_value, normal = 'Kolmogo', np.nan, False
+
+        if normal:
+            lower_bound, upper_bound, criterion = mean - n_std * std, mean + n_std * std, f"std | +-{n_std}"
+        elif non_normal_crit == 'MAD':
+            mad = pc.quantile(pc.abs(pc.subtract(pc.cast(array, 'float64'), median)), q=0.5).to_numpy(zero_copy_only=False)[0] if n else np.nan
+            lower_bound, upper_bound = median - MAD_threshold * mad, median + MAD_threshold * mad
+            criterion = f"MAD | +-{MAD_threshold}"
+        else:
+            lower_bound, upper_bound = q1 - multiplier * (q3 - q1), q3 + multiplier * (q3 - q1)
+            criterion = f"IQR | +-{multiplier}"
+
+        values = pc.cast(array, 'float64')
+        outside = pc.or_(pc.less(values, lower_bound), pc.greater(values, upper_bound))
+        with np.errstate(invalid='ignore', divide='ignore'):
+            lower = np.float64(pc.sum(pc.and_(outside, pc.less(values, q1))).as_py() or 0) / n
+            upper = np.float64(pc.sum(pc.and_(outside, pc.greater(values, q3))).as_py() or 0) / n
+        record.update({'normality': 'normal' if normal else 'non-normal', 'test': test, 'p_value': p_value,
+                       'criterion': criterion, 'lower_bound': lower_bound, 'upper_bound': upper_bound,
+                       'lower (%)': np.round(lower * 100, 2), 'upper (%)': np.round(upper * 100, 2),
+                       'All (%)': np.round((lower + upper) * 100, 2)})
+
+        if mode == 'winsor' and n:
+            # Same limits as manage_outliers: quantile(lower, 'lower') and quantile(1 - upper, 'higher')
+            clip_lo = pc.quantile(array, q=float(np.nan_to_num(lower)), interpolation='lower')[0]
+            clip_hi = pc.quantile(array, q=float(np.nan_to_num(1 - upper)), interpolation='higher')[0]
+            arrays[j] = pc.min_element_wise(pc.max_element_wise(array, clip_lo.cast(array.type), skip_nulls=False),
+                                            clip_hi.cast(array.type), skip_nulls=False)
+            record['winsor_lower'], record['winsor_upper'] = clip_lo.as_py(), clip_hi.as_py()
+        elif mode == 'miss':
+            arrays[j] = pc.if_else(pc.fill_null(outside, False), pa.scalar(None, array.type), array)
+            record['missing_bef'] = n_rows - n
+            record['missing_aft'] = arrays[j].null_count
+        records.append(record)
+
+    report = pd.DataFrame.from_records(records, index='column') if records else pd.DataFrame()
+    report.index.name = None
+    if mode == 'check':
+        return report
+    out = _rebuild(obj, names, arrays)
+    if return_report is True:
+        return out, report
+    return out
+
+###############################################################################################################################
+
+def _codes_columnar(array, n_bins=5) -> tuple[np.ndarray, int]:
+    """
+    Integer codes (-1 for missing) and cardinality of one column, binned like ``get_cramersV``: numeric columns
+    with more than two distinct values get ``pd.cut``'s ``min(nunique, n_bins)`` equal-width right-closed bins,
+    everything else is dictionary-encoded with ``pc.index_in``.
+    """
+    import pyarrow.compute as pc
+    if _is_numeric(array):
+        array = _numeric(array)
+        nunique = _count_distinct(array)
+        if nunique != 2 and nunique > 0:
+            k = min(n_bins, nunique)
+            min_max = pc.min_max(array)
+            low, high = float(min_max['min'].as_py()), float(min_max['max'].as_py())
+            if low == high:
+                low, high = low - 0.001 * abs(low) if low else -0.001, high + 0.001 * abs(high) if high else 0.001
+                edges = np.linspace(low, high, k + 1)
+            else:
+                edges = np.linspace(low, high, k + 1)
+                edges[0] -= (high - low) * 0.001
+            values = _to_float_numpy(array)
+            codes = np.searchsorted(edges, values, side='left') - 1
+            codes[np.isnan(values)] = -1
+            return codes, k
+    uniques = pc.unique(array).drop_null()
+    codes = pc.index_in(array, value_set=uniques, skip_nulls=True)
+    return pc.fill_null(codes, -1).to_numpy(), len(uniques)
+
+def cramersV_columnar(x, y, n_bins=5, return_scalar=False):
+    """
+    ``get_cramersV`` on columnar inputs: both columns encoded to integer codes and crossed with one ``np.bincount``.
+    """
+    from my_core import _cramersV_table
+    name, x_array = _column(x)
+    _, y_array = _column(y)
+    x_codes, x_card = _codes_columnar(x_array, n_bins)
+    y_codes, y_card = _codes_columnar(y_array, n_bins)
+    valid = (x_codes >= 0) & (y_codes >= 0)
+    counts = np.bincount(x_codes[valid].astype(np.int64) * y_card + y_codes[valid], minlength=x_card * y_card)
+    vCramer = _cramersV_table(counts.reshape(x_card, y_card))
+    if return_scalar is True:
+        return vCramer
+    else:
+        return pd.Series({f'CramersV: min(nunique, {n_bins}) bins': vCramer}, name=name)
+
+def _arrow_from_pandas(ser):
+    """
+    Arrow array of a NumPy-backed pandas series (the other side of a mixed pandas/Arrow ``get_cramersV`` call).
+    """
+    import pyarrow as pa
+    values = ser.astype(object) if isinstance(ser.dtype, pd.CategoricalDtype) else ser
+    return pa.array(values.to_numpy(), from_pandas=True)
@@ -0,0 +1,357 @@
+"""
+@author: Hao Qi
+
+Scaling benchmarks of the ``my_funcs`` helpers on seeded synthetic data. Every case runs in a fresh process
+(Agg backend, basemap tiles from an empty offline cache) and records wall time, peak RSS and traced allocations
+into a JSON history; ``compare`` flags regressions between two runs of the history.
+
+Example:
+---
+```
+python my_bench.py run --label baseline
+python my_bench.py run --benchmarks describe_custom manage_outliers --rows 1000 100000
+python my_bench.py compare baseline -1 --threshold 0.15
+```
+"""
+
+###############################################################################################################################
+
+import argparse
+import contextlib
+import functools
+import importlib
+import io
+import json
+import multiprocessing as mp
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+import numpy as np
+import pandas as pd
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+###############################################################################################################################
+
+def make_data(kind, n_rows, n_cols=1, seed=0) -> pd.DataFrame:
+    """
+    Seeded synthetic data for the benchmarks.
+
+    Parameters:
+    ---
+    - `kind (str)`: 'numeric' (normal columns with different scales and 1% NaN), 'skewed' (lognormal columns with 0.5%
+      extreme outliers), 'categorical' (object columns with Zipf-distributed levels) or 'geo' (longitude/latitude
+      clustered around a few cities plus a lognormal 'price').
+    - `n_rows (int)`: Number of rows.
+    - `n_cols (int, optional)`: Number of generated columns (ignored by 'geo') (default is 1).
+    - `seed (int, optional)`: Random seed (default is 0).
+
+    Returns:
+    ---
+    pd.DataFrame: Generated columns plus a 'target' column with three classes related to the first column.
+    """
+    rng = np.random.default_rng(seed)
+    if kind == 'numeric':
+        values = rng.normal(loc=rng.uniform(-10, 10, n_cols), scale=rng.uniform(0.5, 5, n_cols), size=(n_rows, n_cols))
+        values[rng.random((n_rows, n_cols)) < 0.01] = np.nan
+        df = pd.DataFrame(values, columns=[f'num_{i}' for i in range(n_cols)])
+    elif kind == 'skewed':
+        values = rng.lognormal(mean=0, sigma=rng.uniform(0.5, 1.5, n_cols), size=(n_rows, n_cols))
+        outliers = rng.random((n_rows, n_cols)) < 0.005
+        values[outliers] *= rng.uniform(20, 100, outliers.sum())
+        df = pd.DataFrame(values, columns=[f'skew_{i}' for i in range(n_cols)])
+    elif kind == 'categorical':
+        levels = np.array([f'level_{i:02d}' for i in range(30)], dtype=object)
+        probs = 1 / np.arange(1, len(levels) + 1)
+        probs /= probs.sum()
+        df = pd.DataFrame({f'cat_{i}': levels[rng.choice(len(levels), size=n_rows, p=probs)] for i in range(n_cols)})
+    elif kind == 'geo':
+        centres = np.array([[-3.70, 40.42], [-3.60, 40.45], [-3.75, 40.35], [-3.85, 40.50], [-3.68, 40.30]])
+        which = rng.integers(0, len(centres), n_rows)
+        lonlat = centres[which] + rng.normal(scale=0.04, size=(n_rows, 2))
+        df = pd.DataFrame({'longitude': lonlat[:, 0], 'latitude': lonlat[:, 1],
+                           'price': rng.lognormal(mean=12, sigma=0.5, size=n_rows)})
+    else:
+        raise ValueError("kind must be one of the list: ['numeric', 'skewed', 'categorical', 'geo']!")
+
+    first = df.iloc[:, 0]
+    codes = first.rank(method='first', pct=True).fillna(0.5).to_numpy() if kind != 'categorical' else first.factorize()[0] / 30
+    noisy = codes + rng.normal(scale=0.3, size=n_rows)
+    df['target'] = np.array(['class_a', 'class_b', 'class_c'], dtype=object)[np.digitize(noisy, np.quantile(noisy, [0.5, 0.8]))]
+    return df
+
+###############################################################################################################################
+
+def _bench_describe(my, df):
+    my.describe_custom(df.drop(columns='target'))
+
+def _bench_outliers(my, df):
+    df.drop(columns='target').apply(my.manage_outliers, mode='check')
+
+def _bench_cramersV(my, df):
+    for col in df.columns.drop('target'):
+        my.get_cramersV(df[col], df['target'])
+
+def _bench_barh(my, df):
+    my.barh_plot(df.iloc[:, 0])
+
+def _bench_class_balance(my, df):
+    my.class_balance_barhplot(df.iloc[:, 0], df['target'])
+
+def _bench_kde(my, df):
+    my.kdeplot_by_class(df, df.columns[0], 'target')
+
+def _bench_geopoints(my, df, **kwargs):
+    from my_tiles import TileCache
+    cache = TileCache(tempfile.mkdtemp(prefix='my_bench_tiles_'), offline=True)
+    my.geopoints_plot(df['longitude'], df['latitude'], tile_cache=cache, **kwargs)
+
+# name: (data kind, default column counts, function, is a plot)
+BENCHMARKS = {
+    'describe_custom': ('numeric', (10, 100), _bench_describe, False),
+    'manage_outliers': ('skewed', (10, 100), _bench_outliers, False),
+    'get_cramersV': ('categorical', (1, 10), _bench_cramersV, False),
+    'barh_plot': ('categorical', (1,), _bench_barh, True),
+    'class_balance_barhplot': ('categorical', (1,), _bench_class_balance, True),
+    'kdeplot_by_class': ('numeric', (1,), _bench_kde, True),
+    'geopoints_plot': ('geo', (1,), _bench_geopoints, True),
+    'geopoints_plot_raster': ('geo', (1,), functools.partial(_bench_geopoints, raster=True), True),
+}
+ROWS = (10**3, 10**4, 10**5, 10**6, 10**7)
+
+###############################################################################################################################
+
+def _peak_rss_mb():
+    if resource is None:
+        return np.nan
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 2**20 if sys.platform == 'darwin' else peak / 2**10  # bytes on macOS, KB on Linux
+
+def _run_case(name, n_rows, n_cols, repeats, seed) -> dict:
+    """
+    Run one benchmark case (in a fresh worker process): ``repeats`` timed calls, then one call under tracemalloc.
+    """
+    import matplotlib
+    matplotlib.use('Agg', force=True)
+    import matplotlib.pyplot as plt
+    import my_funcs as my
+
+    kind, _, func, is_plot = BENCHMARKS[name]
+    # Import the lazily loaded stacks before the baseline, so 'rss_increase_mb' is the call's own footprint
+    for module in ('scipy.stats', 'my_core') + (('my_plots', 'my_geo') if is_plot else ()):
+        importlib.import_module(module)
+    df = make_data(kind, n_rows, n_cols, seed)
+    rss_before = _peak_rss_mb()
+    record = {'benchmark': name, 'n_rows': n_rows, 'n_cols': n_cols, 'error': None}
+    times = []
+    try:
+        with warnings.catch_warnings(), contextlib.redirect_stdout(io.StringIO()):
+            warnings.simplefilter('ignore')  # plt.show() on Agg, missing offline tiles...
+            for _ in range(repeats):
+                start = time.perf_counter()
+                func(my, df)
+                times.append(time.perf_counter() - start)
+                plt.close('all')
+            rss_after = _peak_rss_mb()
+            tracemalloc.start()
+            func(my, df)
+            _, alloc_peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            plt.close('all')
+    except Exception as error:
+        record['error'] = f'{error.__class__.__name__}: {error}'
+        return record
+    record.update({'wall_s': min(times),
+                   'wall_median_s': statistics.median(times),
+                   'peak_rss_mb': rss_after,
+                   'rss_increase_mb': max(rss_after - rss_before, 0.0),
+                   'alloc_peak_mb': alloc_peak / 2**20})
+    return record
+
+def run_benchmarks(benchmarks=None, rows=ROWS, cols=None, repeats=3, seed=0, max_seconds=30.0, max_cells=2 * 10**8,
+                   verbose=True) -> list:
+    """
+    Sweep row and column counts for each benchmark, one fresh process per case.
+
+    Parameters:
+    ---
+    - `benchmarks (list, optional)`: Names out of ``BENCHMARKS`` (default is None, all of them).
+    - `rows (tuple, optional)`: Row counts to sweep (default is ``ROWS``, 10^3 to 10^7).
+    - `cols (tuple, optional)`: Column counts to sweep (default is None, each benchmark's own counts).
+    - `repeats (int, optional)`: Timed calls per case; the minimum and the median are recorded (default is 3).
+    - `seed (int, optional)`: Seed of the synthetic data (default is 0).
+    - `max_seconds (float, optional)`: Once a case takes longer than this, larger row counts of the same benchmark and
+      column count are skipped (default is 30.0).
+    - `max_cells (int, optional)`: Cases with more than ``n_rows * n_cols`` cells are skipped (default is 2e8).
+    - `verbose (bool, optional)`: Print one line per case (default is True).
+
+    Returns:
+    ---
+    list: One dict per case with 'benchmark', 'n_rows', 'n_cols', 'wall_s', 'wall_median_s', 'peak_rss_mb',
+    'rss_increase_mb', 'alloc_peak_mb' and 'error' (skipped cases are not included).
+    """
+    results = []
+    context = mp.get_context('spawn')
+    for name in (BENCHMARKS if benchmarks is None else benchmarks):
+        for n_cols in (BENCHMARKS[name][1] if cols is None else cols):
+            for n_rows in sorted(rows):
+                if n_rows * n_cols > max_cells:
+                    break
+                with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+                    try:
+                        record = executor.submit(_run_case, name, n_rows, n_cols, repeats, seed).result()
+                    except Exception as error:  # e.g. the worker was killed when running out of memory
+                        record = {'benchmark': name, 'n_rows': n_rows, 'n_cols': n_cols,
+                                  'error': f'{error.__class__.__name__}: {error}'}
+                results.append(record)
+                if verbose:
+                    print(_format_record(record), flush=True)
+                if record['error'] is not None or record['wall_s'] * repeats > max_seconds:
+                    break
+    return results
+
+def _format_record(record) -> str:
+    case = f"{record['benchmark']:<24}{record['n_rows']:>10,} x {record['n_cols']:<5}"
+    if record['error'] is not None:
+        return f"{case} ERROR {record['error']}"
+    return (f"{case}{record['wall_s']:>10.4f} s  rss {record['peak_rss_mb']:>8.1f} MB"
+            f"  (+{record['rss_increase_mb']:.1f})  alloc {record['alloc_peak_mb']:>8.1f} MB")
+
+###############################################################################################################################
+
+def _environment() -> dict:
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {'python': platform.python_version(), 'numpy': np.__version__, 'pandas': pd.__version__,
+            'platform': platform.platform(), 'cpu_count': os.cpu_count(), 'commit': commit}
+
+def load_history(path) -> dict:
+    if not os.path.exists(path):
+        return {'runs': []}
+    with open(path, encoding='utf-8') as file:
+        return json.load(file)
+
+def save_run(results, path, label=None, settings=None) -> dict:
+    """
+    Append a run (results plus environment) to the JSON history at ``path`` and return it.
+    """
+    history = load_history(path)
+    run = {'id': datetime.now().strftime('%Y%m%d-%H%M%S'),
+           'label': label,
+           'environment': _environment(),
+           'settings': settings or {},
+           'results': results}
+    history['runs'].append(run)
+    tmp_path = f'{path}.{os.getpid()}.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as file:
+        json.dump(history, file, indent=1, default=float)
+    os.replace(tmp_path, path)
+    return run
+
+def _find_run(history, ref) -> dict:
+    """
+    Run by id, label or position (e.g. -1 for the latest run).
+    """
+    runs = history['runs']
+    matches = [run for run in runs if ref in (run['id'], run['label'])]
+    if matches:
+        return matches[-1]
+    try:
+        return runs[int(ref)]
+    except (ValueError, IndexError):
+        raise KeyError(f"Run '{ref}' not found in the history ({len(runs)} runs).") from None
+
+def compare_runs(base: dict, new: dict, threshold=0.20, min_seconds=0.005) -> pd.DataFrame:
+    """
+    Compare the cases present in both runs.
+
+    Parameters:
+    ---
+    - `base (dict)`: Reference run (from the history).
+    - `new (dict)`: Run to check.
+    - `threshold (float, optional)`: Relative change flagged as regression/improvement (default is 0.20, i.e. 20%).
+    - `min_seconds (float, optional)`: Wall-time changes smaller than this are never flagged, so timer noise on
+      tiny cases is ignored (default is 0.005).
+
+    Returns:
+    ---
+    pd.DataFrame: One row per case with base/new wall time, peak RSS and allocations, their ratios and a 'status'
+    ('REGRESSION', 'improved' or 'ok'); regressions first.
+    """
+    keys = ['benchmark', 'n_rows', 'n_cols']
+    metrics = ['wall_s', 'peak_rss_mb', 'alloc_peak_mb']
+    frames = []
+    for run in (base, new):
+        df = pd.DataFrame([record for record in run['results'] if record.get('error') is None])
+        frames.append(df.reindex(columns=keys + metrics))
+    df = frames[0].merge(frames[1], on=keys, suffixes=('_base', '_new'))
+    for metric in metrics:
+        df[f'{metric}_ratio'] = df[f'{metric}_new'] / df[f'{metric}_base']
+
+    slower = (df['wall_s_ratio'] > 1 + threshold) & (df['wall_s_new'] - df['wall_s_base'] > min_seconds)
+    heavier = (df['alloc_peak_mb_ratio'] > 1 + threshold) & (df['alloc_peak_mb_new'] - df['alloc_peak_mb_base'] > 1)
+    faster = (df['wall_s_ratio'] < 1 - threshold) & (df['wall_s_base'] - df['wall_s_new'] > min_seconds)
+    df['status'] = np.select([slower | heavier, faster], ['REGRESSION', 'improved'], 'ok')
+    order = df['status'].map({'REGRESSION': 0, 'improved': 1, 'ok': 2})
+    return df.assign(_order=order).sort_values(['_order'] + keys).drop(columns='_order').reset_index(drop=True)
+
+###############################################################################################################################
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Scaling benchmarks of the my_funcs helpers.')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    run = subparsers.add_parser('run', help='Run the benchmark sweep and append it to the history.')
+    run.add_argument('--benchmarks', nargs='+', choices=list(BENCHMARKS), default=None)
+    run.add_argument('--rows', type=lambda v: int(float(v)), nargs='+', default=list(ROWS))
+    run.add_argument('--cols', type=int, nargs='+', default=None)
+    run.add_argument('--repeats', type=int, default=3)
+    run.add_argument('--seed', type=int, default=0)
+    run.add_argument('--max-seconds', type=float, default=30.0)
+    run.add_argument('--max-cells', type=lambda v: int(float(v)), default=2 * 10**8)
+    run.add_argument('--history', default='bench_history.json')
+    run.add_argument('--label', default=None)
+
+    compare = subparsers.add_parser('compare', help='Flag regressions between two runs of the history.')
+    compare.add_argument('base', nargs='?', default='-2', help='Run id, label or position (default is -2).')
+    compare.add_argument('new', nargs='?', default='-1', help='Run id, label or position (default is -1, the latest).')
+    compare.add_argument('--history', default='bench_history.json')
+    compare.add_argument('--threshold', type=float, default=0.20)
+    compare.add_argument('--min-seconds', type=float, default=0.005)
+
+    args = parser.parse_args(argv)
+    if args.command == 'run':
+        settings = {'rows': args.rows, 'cols': args.cols, 'repeats': args.repeats, 'seed': args.seed}
+        results = run_benchmarks(args.benchmarks, args.rows, args.cols, args.repeats, args.seed,
+                                 args.max_seconds, args.max_cells)
+        saved = save_run(results, args.history, args.label, settings)
+        print(f"Run '{saved['id']}' ({len(results)} cases) saved to '{args.history}'")
+        return 0
+
+    history = load_history(args.history)
+    base, new = _find_run(history, args.base), _find_run(history, args.new)
+    df = compare_runs(base, new, args.threshold, args.min_seconds)
+    columns = ['benchmark', 'n_rows', 'n_cols', 'wall_s_base', 'wall_s_new', 'wall_s_ratio', 'alloc_peak_mb_ratio', 'status']
+    print(f"{base['id']} ({base['label']}) -> {new['id']} ({new['label']})")
+    with pd.option_context('display.max_rows', None, 'display.width', 160, 'display.float_format', '{:.4g}'.format):
+        print(df[columns].to_string(index=False))
+    regressions = int((df['status'] == 'REGRESSION').sum())
+    print(f'{regressions} regression(s) over {len(df)} common cases.')
+    return 1 if regressions else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
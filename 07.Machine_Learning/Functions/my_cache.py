@@ -0,0 +1,317 @@
+"""
+@author: Hao Qi
+
+Opt-in result cache for the expensive ``my_funcs`` statistics (``describe_custom``, ``get_cramersV``,
+``manage_outliers(mode='check')``). Results are keyed on a fast content fingerprint of the input columns plus
+the call parameters and kept in an in-memory LRU tier and an optional size-capped on-disk tier.
+Module level imports are limited to the standard library, numpy and pandas.
+"""
+
+###############################################################################################################################
+
+import contextlib
+import functools
+import hashlib
+import inspect
+import io
+import os
+import pickle
+import sys
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+from my_trace import echo
+import my_arrow
+
+###############################################################################################################################
+
+def frame_fingerprint(obj, sample_rows=None, n_blocks=16) -> str:
+    """
+    Fast content fingerprint of a DataFrame/Series/array: shape, names, dtypes and the data of every column.
+
+    Parameters:
+    ---
+    - `obj (pd.DataFrame | pd.Series | np.ndarray)`: Data to fingerprint.
+    - `sample_rows (int, optional)`: Opt-in sampling: objects longer than ``2 * sample_rows`` rows are hashed on
+      ``sample_rows`` rows taken as ``n_blocks`` contiguous blocks spread evenly from the first to the last row;
+      None hashes every row (default is None).
+    - `n_blocks (int, optional)`: Number of contiguous row blocks of the sample (default is 16).
+
+    Returns:
+    ---
+    str: Hex digest.
+
+    Notes:
+    ---
+    - Numeric columns are hashed column by column with blake2b over their raw bytes (without copying the frame);
+      other dtypes go through ``pd.util.hash_pandas_object``.
+    - A sampled fingerprint catches any change of shape, names, dtypes or sampled values (appending, dropping,
+      recasting or reassigning columns), but not an in-place edit of a single row outside the sample, so a cache
+      keyed on it can return stale results for such edits.
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    if isinstance(obj, np.ndarray):
+        obj = pd.DataFrame(obj.reshape(len(obj), -1)) if obj.ndim else pd.Series([obj.item()])
+    frame = obj.to_frame() if isinstance(obj, pd.Series) else obj
+    n = len(frame)
+    digest.update(f'{type(obj).__name__}:{frame.shape}:{getattr(obj, "name", None)!r}'.encode())
+    digest.update(repr(list(zip(frame.columns, map(str, frame.dtypes)))).encode())
+
+    if sample_rows is not None and n > 2 * sample_rows:
+        block = max(sample_rows // n_blocks, 1)
+        starts = np.linspace(0, n - block, n_blocks).astype(np.int64)
+        frame = frame.take((starts[:, None] + np.arange(block)).ravel())
+    digest.update(_values_digest(frame.index))
+
+    for pos, dtype in enumerate(frame.dtypes):
+        if isinstance(dtype, np.dtype) and dtype.kind in 'biufcmM':
+            digest.update(np.ascontiguousarray(frame.iloc[:, pos].to_numpy()).view(np.uint8))
+        else:
+            digest.update(_values_digest(frame.iloc[:, pos]))
+    return digest.hexdigest()
+
+def _values_digest(values) -> bytes:
+    """
+    Digest of one column (or index) of values.
+    """
+    if isinstance(values.dtype, np.dtype) and values.dtype.kind in 'biufcmM':
+        return hashlib.blake2b(np.ascontiguousarray(values.to_numpy()).view(np.uint8), digest_size=16).digest()
+    hashed = pd.util.hash_pandas_object(values.to_series() if isinstance(values, pd.Index) else values, index=False)
+    return hashlib.blake2b(hashed.to_numpy().view(np.uint8), digest_size=16).digest()
+
+###############################################################################################################################
+
+class ResultCache:
+    """
+    Two-tier result cache: an in-memory LRU of pickled results and an optional on-disk tier capped in bytes,
+    where least recently used entries are evicted beyond ``max_bytes``.
+
+    Parameters:
+    ---
+    - `max_items (int, optional)`: Maximum number of results kept in memory (default is 256).
+    - `cache_dir (str, optional)`: Directory of the on-disk tier (created if needed); None keeps the cache in memory only,
+      e.g. for scheduled jobs use a shared path so results survive between runs (default is None).
+    - `max_bytes (int, optional)`: Maximum total size of the on-disk tier (default is 256 MB).
+    - `sample_rows (int, optional)`: Opt-in row sampling of ``frame_fingerprint`` for faster keys on very large inputs,
+      at the cost of missing in-place edits outside the sampled rows (default is None: every row is hashed).
+
+    Example:
+    ---
+    ```python
+    cache = ResultCache(cache_dir='./.my_cache')
+    describe = cached(my.describe_custom, cache)
+    describe(df)          # computed
+    describe(df)          # from cache
+    cache.stats()         # {'hits': 1, 'misses': 1, ...}
+    ```
+    """
+    def __init__(self, max_items=256, cache_dir=None, max_bytes=256 * 2**20, sample_rows=None):
+        self.max_items = max_items
+        self.cache_dir = None if cache_dir is None else os.fspath(cache_dir)
+        self.max_bytes = max_bytes
+        self.sample_rows = sample_rows
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self._memory = OrderedDict()
+        self._size = 0
+        if self.cache_dir is not None:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            self._size = sum(os.path.getsize(path) for path in self._cached_files())
+
+    @property
+    def hits(self) -> int:
+        return self.memory_hits + self.disk_hits
+
+    @property
+    def size_bytes(self) -> int:
+        return self._size
+
+    def stats(self) -> dict:
+        """
+        Hit/miss counters and tier sizes.
+        """
+        lookups = self.hits + self.misses
+        return {'hits': self.hits,
+                'memory_hits': self.memory_hits,
+                'disk_hits': self.disk_hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else np.nan,
+                'memory_items': len(self._memory),
+                'disk_bytes': self._size}
+
+    def make_key(self, namespace, arguments: dict) -> str:
+        """
+        Key of a call: ``namespace`` (function identity) plus every argument, with data arguments replaced
+        by their ``frame_fingerprint``.
+        """
+        digest = hashlib.blake2b(namespace.encode(), digest_size=20)
+        for name, value in arguments.items():
+            digest.update(f'|{name}='.encode())
+            digest.update(self._token(value))
+        return digest.hexdigest()
+
+    def _token(self, value) -> bytes:
+        if type(value).__module__.split('.')[0] in ('pyarrow', 'polars'):
+            value = my_arrow.as_pandas(value)
+        if isinstance(value, (pd.DataFrame, pd.Series, np.ndarray)):
+            return frame_fingerprint(value, self.sample_rows).encode()
+        if isinstance(value, (list, tuple, set, frozenset)):
+            items = sorted(value, key=repr) if isinstance(value, (set, frozenset)) else value
+            return type(value).__name__.encode() + b'[' + b','.join(self._token(item) for item in items) + b']'
+        if isinstance(value, dict):
+            return b'{' + b','.join(self._token(key) + b':' + self._token(item) for key, item in value.items()) + b'}'
+        if callable(value):
+            return f'{getattr(value, "__module__", "")}.{getattr(value, "__qualname__", repr(value))}'.encode()
+        return f'{type(value).__name__}:{value!r}'.encode()
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, key[:2], f'{key}.pkl')
+
+    def _cached_files(self):
+        for root, _, files in os.walk(self.cache_dir):
+            for name in files:
+                if name.endswith('.pkl'):
+                    yield os.path.join(root, name)
+
+    def get(self, key) -> tuple[bool, object]:
+        """
+        Returns (found, value). Every hit returns a fresh copy, so callers may modify it freely.
+        """
+        data = self._memory.get(key)
+        if data is not None:
+            self._memory.move_to_end(key)
+            self.memory_hits += 1
+            return True, pickle.loads(data)
+        if self.cache_dir is not None and os.path.exists(path := self._path(key)):
+            try:
+                with open(path, 'rb') as file:
+                    data = file.read()
+                value = pickle.loads(data)
+            except (OSError, EOFError, pickle.UnpicklingError):
+                data = None  # truncated or evicted by another process: recompute
+            if data is not None:
+                os.utime(path)  # mark as recently used
+                self.disk_hits += 1
+                self._remember(key, data)
+                return True, value
+        self.misses += 1
+        return False, None
+
+    def put(self, key, value):
+        data = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        self._remember(key, data)
+        if self.cache_dir is not None:
+            path = self._path(key)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f'{path}.{os.getpid()}.tmp'
+            with open(tmp_path, 'wb') as file:
+                file.write(data)
+            previous = os.path.getsize(path) if os.path.exists(path) else 0
+            os.replace(tmp_path, path)
+            self._size += len(data) - previous
+            if self._size > self.max_bytes:
+                self.evict()
+
+    def _remember(self, key, data):
+        self._memory[key] = data
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_items:
+            self._memory.popitem(last=False)
+
+    def evict(self, target_bytes=None):
+        """
+        Delete least recently used files until the on-disk tier is below ``target_bytes`` (default 90% of ``max_bytes``).
+        """
+        target_bytes = int(0.9 * self.max_bytes) if target_bytes is None else target_bytes
+        files = sorted(((os.stat(path).st_mtime, os.path.getsize(path), path) for path in self._cached_files()))
+        self._size = sum(size for _, size, _ in files)
+        for _, size, path in files:
+            if self._size <= target_bytes:
+                break
+            os.remove(path)
+            self._size -= size
+
+    def clear(self, disk=False):
+        """
+        Empty the memory tier (and the on-disk tier if ``disk=True``) and reset the counters.
+        """
+        self._memory.clear()
+        self.memory_hits = self.disk_hits = self.misses = 0
+        if disk and self.cache_dir is not None:
+            self.evict(target_bytes=0)
+
+###############################################################################################################################
+
+# Functions worth caching and when a call may be served from the cache (the other modes of manage_outliers
+# return the modified series or modify it in place, so they always run).
+CACHEABLE = {'describe_custom': None,
+             'get_cramersV': None,
+             'manage_outliers': lambda arguments: arguments['mode'] == 'check'}
+
+def cached(func, cache: ResultCache=None, when=None):
+    """
+    Wrap ``func`` so that calls with the same data and parameters are served from ``cache``.
+
+    Parameters:
+    ---
+    - `func (callable)`: Function to memoize; it must return picklable results.
+    - `cache (ResultCache, optional)`: Cache to use (default is a new memory-only ``ResultCache``).
+    - `when (callable, optional)`: Predicate on the bound arguments (dict) deciding whether a call is cacheable
+      (default is ``CACHEABLE[func.__name__]`` if defined there, otherwise every call).
+
+    Returns:
+    ---
+    callable: Wrapped function with the ``cache`` and the original function (``__wrapped__``) as attributes.
+
+    Notes:
+    ---
+    - Output printed by ``func`` on a miss (e.g. the normality decision of ``manage_outliers``) is stored with the result
+      and printed again (through ``my_trace.echo``) on every hit.
+    - The key includes a hash of ``func``'s bytecode, so on-disk results are not reused after the function changes.
+    """
+    cache = ResultCache() if cache is None else cache
+    when = CACHEABLE.get(func.__name__) if when is None else when
+    signature = inspect.signature(func)
+    code = getattr(inspect.unwrap(func), '__code__', None)
+    namespace = f'{func.__module__}.{func.__qualname__}:' + (hashlib.blake2b(code.co_code, digest_size=8).hexdigest() if code else '')
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        bound = signature.bind(*args, **kwargs)
+        bound.apply_defaults()
+        if when is not None and not when(bound.arguments):
+            return func(*args, **kwargs)
+
+        key = cache.make_key(namespace, bound.arguments)
+        found, entry = cache.get(key)
+        if found:
+            value, printed = entry
+            if printed:
+                echo(printed, end='')
+            return value
+
+        buffer = io.StringIO()
+        with contextlib.redirect_stdout(_Tee(sys.stdout, buffer)):
+            value = func(*args, **kwargs)
+        cache.put(key, (value, buffer.getvalue()))
+        return value
+
+    wrapper.cache = cache
+    return wrapper
+
+class _Tee(io.TextIOBase):
+    """
+    Text stream writing to several streams.
+    """
+    def __init__(self, *streams):
+        self.streams = streams
+
+    def write(self, text):
+        for stream in self.streams:
+            stream.write(text)
+        return len(text)
+
+    def flush(self):
+        for stream in self.streams:
+            stream.flush()
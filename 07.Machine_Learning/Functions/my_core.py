@@ -0,0 +1,1465 @@
+"""
+@author: Hao Qi
+
+Compute core of ``my_funcs``: describe, outlier, association and feature-importance helpers.
+Module level imports are limited to numpy/pandas; scipy is imported inside the functions that use it.
+"""
+
+###############################################################################################################################
+
+import functools
+import hashlib
+import os
+import time
+import warnings
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import numpy as np
+import pandas as pd
+from typing import Literal
+from my_sketches import TDigest, HyperLogLog, DescribeAccumulator
+from my_trace import span, traced, traced_iter, echo
+import my_arrow
+
+###############################################################################################################################
+
+@traced()
+def describe_custom(df,
+                    decimals=2,
+                    sorted_nunique=True,
+                    approx=False,
+                    block_size=64,
+                    tdigest_delta=200,
+                    hll_p=14
+                    ) -> pd.DataFrame:
+    """
+    Generate a custom summary statistics DataFrame for the input DataFrame.
+
+    Parameters:
+    ---
+    - `df (pd.DataFrame)`: Input DataFrame for which summary statistics are calculated. Arrow-backed inputs
+      (pyarrow Table, Polars DataFrame or a DataFrame of ``pd.ArrowDtype`` columns) are summarised in place with
+      Arrow compute kernels (see ``my_arrow``).
+    - `decimals (int, optional)`: Number of decimal places to round the results to (default is 2).
+    - `sorted_nunique (bool, optional)`: If True, sort the result DataFrame based on the 'nunique' column
+      in descending order; if False, return the DataFrame without sorting (default is True).
+    - `approx (bool, optional)`: If True, quantiles come from a t-digest and 'nunique' from a HyperLogLog sketch,
+      so no column is ever fully sorted (default is False, exact results).
+    - `block_size (int, optional)`: Number of numeric columns converted to a single NumPy block at a time (default is 64).
+    - `tdigest_delta (int, optional)`: Compression of the t-digest used when ``approx=True`` (default is 200).
+    - `hll_p (int, optional)`: Precision bits of the HyperLogLog used when ``approx=True`` (default is 14).
+
+    Returns:
+    ---
+    pd.DataFrame: A summary statistics DataFrame with counts, unique counts, minimum, 25th percentile,
+    median (50th percentile), mean, standard deviation, coefficient of variation, 75th percentile, and maximum.
+
+    Notes:
+    ---
+    - Numeric columns are processed in blocks: one pass for counts, moments and min/max, and a single
+      ``np.nanquantile`` call for all three percentiles.
+    - Non-numeric columns only get 'count' and 'nunique' (the remaining statistics are NaN).
+    """
+    if my_arrow.backend(df) is not None:
+        return my_arrow.describe_columnar(df, decimals, sorted_nunique, approx, tdigest_delta)
+    stats_df = pd.DataFrame(np.nan, index=df.columns, columns=_DESCRIBE_COLUMNS)
+
+    numeric_mask = np.array([pd.api.types.is_numeric_dtype(dtype) for dtype in df.dtypes])
+    numeric_pos = np.flatnonzero(numeric_mask)
+    for start in range(0, len(numeric_pos), block_size):
+        block_pos = numeric_pos[start:start + block_size]
+        with span('describe_custom.numeric_block', rows=len(df), cols=len(block_pos)):
+            block = df.iloc[:, block_pos].to_numpy(dtype=np.float64, na_value=np.nan)
+            stats_df.iloc[block_pos] = _describe_block(block, approx, tdigest_delta, hll_p)
+
+    with span('describe_custom.non_numeric', rows=len(df), cols=int((~numeric_mask).sum())):
+        for pos in np.flatnonzero(~numeric_mask):
+            ser = df.iloc[:, pos]
+            stats_df.iloc[pos, 0] = ser.count()
+            stats_df.iloc[pos, 1] = _nunique(ser.to_numpy(), approx, hll_p)
+
+    df = stats_df.round(decimals)
+    if sorted_nunique is False:
+        return df
+    else:
+        return df.sort_values('nunique', ascending=False)
+
+_DESCRIBE_COLUMNS = ['count', 'nunique', 'mean', 'std', 'CV', 'q1_25', 'q2_50', 'q3_75', 'min', 'max']
+
+def _nunique(values, approx=False, hll_p=14):
+    """
+    Number of distinct non-missing values: hash-based (no sort) or HyperLogLog estimate.
+    """
+    if approx is True:
+        return np.round(HyperLogLog(p=hll_p).update(values).estimate())
+    return pd.Series(values).nunique()
+
+def _describe_block(block, approx=False, tdigest_delta=200, hll_p=14):
+    """
+    Summary statistics of a 2-D float block (rows x columns) in the column order of ``_DESCRIBE_COLUMNS``.
+    """
+    n_cols = block.shape[1]
+    out = np.full((n_cols, len(_DESCRIBE_COLUMNS)), np.nan)
+    valid = ~np.isnan(block)
+    count = valid.sum(axis=0)
+    has_data = count > 0
+    out[:, 0] = count
+
+    # Single pass for the moments and range (NaNs replaced by neutral values instead of copying per statistic)
+    filled = np.where(valid, block, 0.0)
+    total = filled.sum(axis=0)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean = total / count
+        sq_dev = np.where(valid, block - mean, 0.0)
+        std = np.sqrt((sq_dev * sq_dev).sum(axis=0) / (count - 1))
+        out[:, 2] = mean
+        out[:, 3] = np.where(count > 1, std, np.nan)
+        out[:, 4] = out[:, 3] / mean
+    out[has_data, 8] = np.where(valid, block, np.inf).min(axis=0)[has_data]
+    out[has_data, 9] = np.where(valid, block, -np.inf).max(axis=0)[has_data]
+
+    quantiles = [0.25, 0.50, 0.75]
+    if approx is True:
+        for j in range(n_cols):
+            out[j, 5:8] = TDigest(delta=tdigest_delta).update(block[:, j]).quantile(quantiles)
+    elif has_data.any():
+        out[has_data, 5:8] = np.nanquantile(block[:, has_data], quantiles, axis=0).T
+
+    for j in range(n_cols):
+        out[j, 1] = _nunique(block[:, j], approx, hll_p)
+    return out
+
+###############################################################################################################################
+
+@traced()
+def describe_custom_stream(source,
+                           decimals=2,
+                           sorted_nunique=True,
+                           chunksize=100_000,
+                           columns=None,
+                           n_jobs=None,
+                           return_accumulator=False,
+                           tdigest_delta=200,
+                           hll_p=14,
+                           **read_kwargs
+                           ) -> pd.DataFrame | DescribeAccumulator:
+    """
+    Streaming version of ``describe_custom`` for sources that don't fit in memory.
+
+    Parameters:
+    ---
+    - `source`: A CSV or Parquet file path, a list of such paths, a DataFrame, an iterable of DataFrame chunks,
+      or a list of ``DescribeAccumulator`` objects (partial results) to be merged.
+    - `decimals (int, optional)`: Number of decimal places to round the results to (default is 2).
+    - `sorted_nunique (bool, optional)`: If True, sort the result by 'nunique' in descending order (default is True).
+    - `chunksize (int, optional)`: Rows read per chunk; peak memory is bounded by one chunk (default is 100_000).
+    - `columns (list, optional)`: Subset of columns to read (default is None, all columns).
+    - `n_jobs (int, optional)`: If ``source`` is a list of paths, number of worker processes, each one
+      summarising whole files; partial results are merged at the end (default is None, sequential).
+    - `return_accumulator (bool, optional)`: Return the mergeable ``DescribeAccumulator`` instead of the table,
+      e.g. to send partial results back from a worker process (default is False).
+    - `**read_kwargs`: Extra keyword arguments passed to ``pd.read_csv``.
+
+    Returns:
+    ---
+    pd.DataFrame: Same columns as ``describe_custom``. Quantiles come from a t-digest and 'nunique'
+    from a HyperLogLog, so both are approximate.
+
+    Example:
+    ---
+    ```python
+    # Summary of a CSV that does not fit in memory
+    describe_custom_stream('training_values.csv', chunksize=500_000)
+
+    # Partial results computed elsewhere
+    parts = [describe_custom_stream(path, return_accumulator=True) for path in paths]
+    describe_custom_stream(parts)
+    ```
+    """
+    accumulator_kwargs = dict(tdigest_delta=tdigest_delta, hll_p=hll_p)
+
+    if isinstance(source, list) and source and all(isinstance(acc, DescribeAccumulator) for acc in source):
+        partials = source
+    elif isinstance(source, list) and source and all(isinstance(path, (str, os.PathLike)) for path in source):
+        task = functools.partial(describe_custom_stream, chunksize=chunksize, columns=columns,
+                                 return_accumulator=True, **accumulator_kwargs, **read_kwargs)
+        if n_jobs is None or n_jobs == 1:
+            partials = [task(path) for path in source]
+        else:
+            with ProcessPoolExecutor(max_workers=n_jobs) as executor:
+                partials = list(executor.map(task, source))
+    else:
+        partials = [DescribeAccumulator(**accumulator_kwargs)]
+        for chunk in traced_iter(_iter_chunks(source, chunksize, columns, **read_kwargs), 'describe_custom_stream.read'):
+            with span('describe_custom_stream.update', rows=chunk.shape[0], cols=chunk.shape[1]):
+                partials[0].update(chunk)
+
+    accumulator = functools.reduce(lambda acc, other: acc.merge(other), partials[1:], partials[0])
+    if return_accumulator is True:
+        return accumulator
+
+    df = accumulator.result().round(decimals)
+    if sorted_nunique is False:
+        return df
+    else:
+        return df.sort_values('nunique', ascending=False)
+
+def _iter_chunks(source, chunksize=100_000, columns=None, **read_kwargs):
+    """
+    Yield DataFrame chunks from a file path, a DataFrame or an iterable of DataFrames.
+    """
+    if isinstance(source, (str, os.PathLike)):
+        path = os.fspath(source)
+        if path.endswith(('.parquet', '.pq')):
+            import pyarrow.parquet as pq
+            for batch in pq.ParquetFile(path).iter_batches(batch_size=chunksize, columns=columns):
+                yield batch.to_pandas()
+        else:
+            with pd.read_csv(path, chunksize=chunksize, usecols=columns, **read_kwargs) as reader:
+                yield from reader
+    elif isinstance(source, pd.DataFrame):
+        source = source if columns is None else source[columns]
+        for start in range(0, len(source), chunksize):
+            yield source.iloc[start:start + chunksize]
+    else:
+        for chunk in source:
+            yield chunk if columns is None else chunk[columns]
+
+###############################################################################################################################
+
+def _category_counts(series: pd.Series) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Counts of every observed category (missing values excluded) in order of appearance
+    (categories order for categorical dtype), with a single ``np.bincount`` on integer codes.
+    """
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        codes, labels = series.cat.codes.to_numpy(), series.cat.categories.to_numpy()
+    else:
+        codes, labels = pd.factorize(series)
+        labels = np.asarray(labels)
+    values = np.bincount(codes[codes >= 0], minlength=len(labels))
+    observed = values > 0
+    return values[observed], labels[observed]
+
+###############################################################################################################################
+
+def _binned_kde_by_class(x: pd.Series, y: pd.Series, gridsize=512, cut=3) -> tuple:
+    """
+    Binned Gaussian KDE of ``x`` for every class of ``y`` on one shared grid.
+    Returns ``(grid_centers, densities (classes x gridsize), classes, hist (classes x gridsize), edges)``.
+    """
+    valid = x.notna() & y.notna()
+    values = x[valid].to_numpy(dtype=np.float64)
+    y = y[valid]
+    if isinstance(y.dtype, pd.CategoricalDtype):
+        codes, classes = y.cat.codes.to_numpy(), y.cat.categories
+    else:
+        codes, classes = pd.factorize(y, sort=pd.api.types.is_numeric_dtype(y))
+    n_classes = len(classes)
+
+    class_n = np.bincount(codes, minlength=n_classes)
+    sums = np.bincount(codes, weights=values, minlength=n_classes)
+    sq_sums = np.bincount(codes, weights=values * values, minlength=n_classes)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        means = sums / class_n
+        stds = np.sqrt(np.maximum(sq_sums / class_n - means ** 2, 0) * class_n / np.maximum(class_n - 1, 1))
+        bandwidths = stds * class_n ** (-1 / 5)  # Scott's rule
+    bandwidths = np.where(np.isfinite(bandwidths) & (bandwidths > 0), bandwidths, np.nan)
+
+    cut_width = cut * np.nanmax(bandwidths) if np.isfinite(bandwidths).any() else 0.5
+    lower, upper = values.min() - cut_width, values.max() + cut_width
+    bin_width = (upper - lower) / gridsize
+    bins = np.clip(((values - lower) / bin_width).astype(np.int64), 0, gridsize - 1)
+    hist = np.bincount(codes.astype(np.int64) * gridsize + bins,
+                       minlength=n_classes * gridsize).reshape(n_classes, gridsize).astype(np.float64)
+
+    densities = np.zeros_like(hist)
+    for k in range(n_classes):
+        if class_n[k] == 0:
+            continue
+        sigma = bandwidths[k] / bin_width if np.isfinite(bandwidths[k]) else 0.5
+        densities[k] = _gaussian_smooth_fft(hist[k], max(sigma, 0.5))
+    densities /= values.size * bin_width
+
+    edges = lower + bin_width * np.arange(gridsize + 1)
+    return (edges[:-1] + edges[1:]) / 2, densities, classes, hist, edges
+
+def _binned_quantiles(hist, edges, q) -> np.ndarray:
+    """
+    Quantile ``q`` of every row of a histogram (classes x bins), interpolating linearly inside the bins.
+    """
+    cum = np.cumsum(hist, axis=1)
+    target = q * cum[:, -1:]
+    idx = np.minimum((cum < target).sum(axis=1), hist.shape[1] - 1)
+    rows = np.arange(hist.shape[0])
+    before = np.where(idx > 0, cum[rows, np.maximum(idx - 1, 0)], 0.0)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        fraction = np.clip((target[:, 0] - before) / hist[rows, idx], 0, 1)
+    result = edges[idx] + fraction * (edges[1] - edges[0])
+    return np.where(cum[:, -1] > 0, result, np.nan)
+
+###############################################################################################################################
+
+def _contingency_counts(x: pd.Series, y: pd.Series) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Contingency table of two categorical series with one ``np.bincount`` on integer codes.
+    Like ``pd.crosstab``: rows with missing values are dropped, labels are sorted and empty rows/columns removed.
+    Returns ``(counts, x_labels, y_labels)``.
+    """
+    x_codes, x_labels = _sorted_codes(x)
+    y_codes, y_labels = _sorted_codes(y)
+    valid = (x_codes >= 0) & (y_codes >= 0)
+    combined = x_codes[valid].astype(np.int64) * len(y_labels) + y_codes[valid]
+    counts = np.bincount(combined, minlength=len(x_labels) * len(y_labels)).reshape(len(x_labels), len(y_labels))
+    rows, cols = counts.sum(axis=1) > 0, counts.sum(axis=0) > 0
+    return counts[rows][:, cols], np.asarray(x_labels)[rows], np.asarray(y_labels)[cols]
+
+def _sorted_codes(ser: pd.Series) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Integer codes (-1 for missing) of a series with labels in sorted (or categorical) order.
+    """
+    if isinstance(ser.dtype, pd.CategoricalDtype):
+        return ser.cat.codes.to_numpy(), ser.cat.categories.to_numpy()
+    codes, labels = pd.factorize(ser, sort=True)
+    return codes, np.asarray(labels)
+
+###############################################################################################################################
+
+def _bin_points_2d(x, y, weights=None, grid_size=512, extent=None) -> tuple[np.ndarray, tuple]:
+    """
+    2-D histogram (grid_size x grid_size, rows = y) of points by quantizing the coordinates and one ``np.bincount``.
+    Returns the grid and its extent ``(x_min, x_max, y_min, y_max)``; points with missing coordinates are dropped.
+    """
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    valid = ~(np.isnan(x) | np.isnan(y))
+    if weights is not None:
+        weights = np.asarray(weights, dtype=np.float64)
+        valid &= ~np.isnan(weights)
+        weights = weights[valid]
+    x, y = x[valid], y[valid]
+    if extent is None:
+        extent = (x.min(), x.max(), y.min(), y.max()) if x.size else (0.0, 1.0, 0.0, 1.0)
+    x_min, x_max, y_min, y_max = extent
+    x_span = (x_max - x_min) or 1.0
+    y_span = (y_max - y_min) or 1.0
+    ix = np.clip(((x - x_min) / x_span * grid_size).astype(np.int64), 0, grid_size - 1)
+    iy = np.clip(((y - y_min) / y_span * grid_size).astype(np.int64), 0, grid_size - 1)
+    grid = np.bincount(iy * grid_size + ix, weights=weights, minlength=grid_size * grid_size)
+    return grid.reshape(grid_size, grid_size).astype(np.float64), extent
+
+def _scott_bandwidth_bins(x, y, extent, grid_size) -> np.ndarray:
+    """
+    Scott's rule bandwidth for a 2-D Gaussian KDE, expressed in grid bins (x, y).
+    """
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    n = np.count_nonzero(~(np.isnan(x) | np.isnan(y)))
+    factor = max(n, 1) ** (-1 / 6)
+    spans = np.array([(extent[1] - extent[0]) or 1.0, (extent[3] - extent[2]) or 1.0])
+    return np.maximum(np.array([np.nanstd(x), np.nanstd(y)]) * factor / spans * grid_size, 0.5)
+
+def _gaussian_smooth_fft(grid, sigma, truncate=4.0) -> np.ndarray:
+    """
+    Convolve a binned grid (any number of dimensions) with a Gaussian kernel of std ``sigma`` bins
+    per axis using FFT: the binned-KDE approximation, O(grid log grid) regardless of the number of points.
+    """
+    import scipy.signal as signal
+    kernel = np.ones((1,) * grid.ndim)
+    for axis, s in enumerate(np.broadcast_to(sigma, (grid.ndim,))):
+        radius = max(int(np.ceil(truncate * s)), 1)
+        offsets = np.arange(-radius, radius + 1)
+        k = np.exp(-0.5 * (offsets / s) ** 2)
+        shape = [1] * grid.ndim
+        shape[axis] = k.size
+        kernel = kernel * (k / k.sum()).reshape(shape)
+    return np.clip(signal.fftconvolve(grid, kernel, mode='same'), 0.0, None)
+
+###############################################################################################################################
+
+@traced()
+def manage_outliers(series: pd.Series,
+                       mode: Literal['check', 'return', 'winsor', 'miss']='check',
+                       non_normal_crit: Literal['MAD', 'IQR']='MAD',
+                       n_std=4,
+                       multiplier=4,
+                       MAD_threshold=8,
+                       normal_cols: list=[],
+                       alpha=0.05,
+                       n_ljust=30,
+                       normality_test: Literal['sample', 'full', 'moments']='sample',
+                       sample_size=5000,
+                       random_state=0
+                       ) -> pd.Series:
+   """
+    Detect and manage outliers in a given numeric series.
+    Often use the following way: ``df.apply(manage_outliers, mode='check')``
+
+    Parameters
+    ---
+    - ``series (pd.Series)``: Input data series containing numeric values (a pyarrow array or Polars Series
+    is wrapped zero-copy as a ``pd.ArrowDtype`` series).
+    - ``mode (str)``: Specifies the operation mode. Possible values: 'check' (default), 'return', 'winsor', 'miss'.
+    Only essential for ``'return'`` mode!
+    - ``n_std (float)``: Number of standard deviation away from the mean (normal distributions). Default is 4.
+    - ``alpha (float)``: Significance level for normality tests (default=0.05).
+    - ``multiplier (float)``: Multiplier for IQR-based outlier detection (default=4).
+    - ``MAD_threshold (float)``: Threshold for Median Absolute Deviation (MAD)-based outlier detection (default=8).
+    - ``normal_cols (list)``: List of cols assummed to be normal (default=[]).
+    - ``n_ljust (int)``: Text alignment that displays determination method. (Default=30).
+    - ``normality_test (str)``: How normality is decided for n >= 50 (n < 50 always uses Shapiro-Wilk):
+    ``'sample'`` (default) KS test on a seeded random subsample of at most ``sample_size`` rows,
+    ``'full'`` KS test on the whole series, ``'moments'`` skewness/kurtosis screen without any sort.
+    Decisions are cached per column data fingerprint, so ``check`` -> ``winsor`` -> ``miss`` tests only once.
+    - ``sample_size (int)``: Maximum rows used by the ``'sample'`` KS test (default=5000).
+    - ``random_state (int)``: Seed of the ``'sample'`` subsample (default=0).
+    
+    Notes
+    ---
+    - For ``'check' mode``: pd.Series with lower, upper, and combined percentage of outliers (subset).
+    - For ``'return' mode``: printed messages with a series of outlier values for each series/variable.
+    Follow by using the ``function add_outliers_col()`` to get a new 'outlier col with list as values'.
+    - For ``'winsor' mode``: Winsorized series based on lower and upper limits (df).
+    - For ``'miss' mode``: Series with outliers replaced by NaN and information about missing values (series inplace change!).
+   """
+   import scipy.stats as stats
+   # Check if mode is correct
+   modes = ['check', 'winsor', 'return', 'miss']
+   if mode not in modes:
+       return f"Choose: {modes}"
+   
+   if my_arrow.backend(series) in ('pyarrow', 'polars'):
+       series = my_arrow.as_pandas(series)
+
+   # Condición de asimetría y aplicación de criterio 1 según el caso
+   if series.name == 'outlier_list':
+       return series
+   
+   with span('manage_outliers.quantiles', rows=len(series)):
+       # Calcular primer cuartil     
+       q1 = series.quantile(0.25)  
+       # Calcular tercer cuartil  
+       q3 = series.quantile(0.75)
+   # Calculo de IQR
+   IQR=q3-q1
+   
+   if series.name in normal_cols:
+       message = f"'\033[1m{series.name}\033[0m':".ljust(n_ljust) + f"    normal (manual  | +-{n_std} std)"
+       criterio1 = abs((series-series.mean())/series.std())>n_std
+   else:
+       with span('manage_outliers.normality_test', rows=len(series), test=normality_test):
+           method, p_value, is_normal = _normality_test(series.to_numpy(dtype=np.float64, na_value=np.nan),
+                                                        normality_test, sample_size, random_state)
+       if is_normal is None:
+           is_normal = p_value >= alpha
+        
+       if is_normal:
+            message = f"'\033[1m{series.name}\033[0m':".ljust(n_ljust) + f"    normal ({method} | +-{n_std} std)"
+            criterio1 = abs((series-series.mean())/series.std())>n_std
+       else:
+            if non_normal_crit == 'MAD':
+                message = f"'\033[1m{series.name}\033[0m':".ljust(n_ljust) + f"non-normal ({method} | +-{MAD_threshold} MAD)"
+                criterio1 = abs((series-series.median())/stats.median_abs_deviation(series.dropna()))>MAD_threshold
+            elif non_normal_crit == 'IQR':
+                message = f"'\033[1m{series.name}\033[0m':".ljust(n_ljust) + f"non-normal ({method} | +-{multiplier} IQR)"
+                criterio1 = (series<(q1 - multiplier*IQR))|(series>(q3 + multiplier*IQR))
+   
+   lower = series[criterio1&(series<q1)].count()/series.dropna().count()
+   upper = series[criterio1&(series>q3)].count()/series.dropna().count()
+   
+   # Salida según el tipo deseado
+   if mode == 'check':
+       echo(message)
+       ser = pd.Series({
+           'lower (%)': np.round(lower*100, 2),
+           'upper (%)': np.round(upper*100, 2),
+           'All (%)': np.round((lower+upper)*100, 2)})
+       return ser
+   
+   elif mode == 'return':
+       echo(f"\n---------------- \033[1m{series.name}\033[0m ----------------")
+       echo(series[criterio1].value_counts().sort_index())
+       return None
+   
+   elif mode == 'winsor':
+       winsored_series = series.clip(lower=series.quantile(lower, interpolation='lower'),
+                                  upper=series.quantile(1 - upper, interpolation='higher'))
+       return winsored_series
+   
+   elif mode == 'miss':
+       missing_bef = series.isna().sum()
+       series.loc[criterio1] = np.nan
+       missing_aft = series.isna().sum()
+      
+   if missing_bef != missing_aft:
+        echo(series.name)
+        echo('Missing_bef: ' + str(missing_bef))
+        echo('Missing_aft: ' + str(missing_aft) +'\n')
+        return (series)
+
+###############################################################################################################################
+
+@traced()
+def manage_outliers_frame(df: pd.DataFrame,
+                          mode: Literal['check', 'winsor', 'miss']='check',
+                          non_normal_crit: Literal['MAD', 'IQR']='MAD',
+                          n_std=4,
+                          multiplier=4,
+                          MAD_threshold=8,
+                          normal_cols: list=[],
+                          alpha=0.05,
+                          return_report=False,
+                          normality_test: Literal['sample', 'full', 'moments']='sample',
+                          sample_size=5000,
+                          random_state=0
+                          ) -> pd.DataFrame | tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Frame-level, vectorized version of ``manage_outliers`` for all numeric columns at once.
+    Replaces ``df.apply(manage_outliers, mode=...)``: statistics, normality tests and outlier masks
+    are computed on a single 2-D NumPy block and the result is returned as a report instead of printed.
+
+    Parameters
+    ---
+    - ``df (pd.DataFrame)``: Input data. Non-numeric columns (and 'outlier_list') are left untouched.
+    Arrow-backed inputs (pyarrow Table, Polars DataFrame or ``pd.ArrowDtype`` columns) are processed column by column
+    with Arrow compute kernels and 'winsor'/'miss' results are returned in the same backend (see ``my_arrow``).
+    - ``mode (str)``: 'check' (default), 'winsor' or 'miss', with the same semantics as ``manage_outliers``.
+    - ``non_normal_crit (str)``: 'MAD' (default) or 'IQR' criterion for non-normal columns.
+    - ``n_std (float)``: Number of standard deviation away from the mean (normal distributions). Default is 4.
+    - ``multiplier (float)``: Multiplier for IQR-based outlier detection (default=4).
+    - ``MAD_threshold (float)``: Threshold for Median Absolute Deviation (MAD)-based outlier detection (default=8).
+    - ``normal_cols (list)``: List of cols assummed to be normal (default=[]).
+    - ``alpha (float)``: Significance level for normality tests (default=0.05).
+    - ``return_report (bool)``: For 'winsor'/'miss' modes, also return the report (default=False).
+    - ``normality_test``, ``sample_size``, ``random_state``: Normality decision stage, see ``manage_outliers``.
+
+    Notes
+    ---
+    - For ``'check' mode``: report DataFrame (one row per numeric column) with the normality decision, test, p-value,
+    criterion, outlier bounds and lower, upper and combined percentage of outliers.
+    - For ``'winsor' mode``: copy of ``df`` winsorized per column based on lower and upper outlier proportions.
+    - For ``'miss' mode``: copy of ``df`` with outliers replaced by NaN (the report adds missing counts before/after).
+    - Unlike ``manage_outliers``, NaNs are dropped before the normality tests.
+    """
+    if my_arrow.backend(df) is not None:
+        return my_arrow.outliers_columnar(df, mode, non_normal_crit, n_std, multiplier, MAD_threshold, normal_cols,
+                                          alpha, return_report, normality_test, sample_size, random_state)
+    modes = ['check', 'winsor', 'miss']
+    if mode not in modes:
+        raise ValueError(f"mode must be one of the list: {modes}!")
+
+    num_cols = [col for col in df.columns
+                if pd.api.types.is_numeric_dtype(df[col]) and col != 'outlier_list']
+    block = df[num_cols].to_numpy(dtype=np.float64, na_value=np.nan)
+    out = _outlier_stats(block, num_cols, non_normal_crit, n_std, multiplier, MAD_threshold, normal_cols, alpha,
+                         normality_test, sample_size, random_state)
+
+    mask = (block < out['lower_bound']) | (block > out['upper_bound'])
+    n_valid = out['n']
+    with np.errstate(invalid='ignore', divide='ignore'):
+        lower = (mask & (block < out['q1'])).sum(axis=0) / n_valid
+        upper = (mask & (block > out['q3'])).sum(axis=0) / n_valid
+
+    report = pd.DataFrame({
+        'normality': np.where(out['normal'], 'normal', 'non-normal'),
+        'test': out['test'],
+        'p_value': out['p_value'],
+        'criterion': out['criterion'],
+        'lower_bound': out['lower_bound'],
+        'upper_bound': out['upper_bound'],
+        'lower (%)': np.round(lower * 100, 2),
+        'upper (%)': np.round(upper * 100, 2),
+        'All (%)': np.round((lower + upper) * 100, 2),
+    }, index=pd.Index(num_cols))
+
+    if mode == 'check':
+        return report
+
+    if mode == 'winsor':
+        # Same limits as manage_outliers: quantile(lower, 'lower') and quantile(1 - upper, 'higher')
+        sorted_block = np.sort(block, axis=0)
+        last = np.maximum(n_valid - 1, 0)
+        lo_idx = np.floor(np.nan_to_num(lower) * last).astype(np.int64)
+        hi_idx = np.ceil(np.nan_to_num(1 - upper) * last).astype(np.int64)
+        clip_lo = np.take_along_axis(sorted_block, lo_idx[None, :], axis=0)[0]
+        clip_hi = np.take_along_axis(sorted_block, hi_idx[None, :], axis=0)[0]
+        new_block = np.clip(block, clip_lo, clip_hi)
+        report['winsor_lower'] = clip_lo
+        report['winsor_upper'] = clip_hi
+
+    elif mode == 'miss':
+        new_block = np.where(mask, np.nan, block)
+        report['missing_bef'] = np.isnan(block).sum(axis=0)
+        report['missing_aft'] = np.isnan(new_block).sum(axis=0)
+
+    df_out = df.copy()
+    df_out[num_cols] = new_block
+    if return_report is True:
+        return df_out, report
+    return df_out
+
+class OutlierTransformer:
+    """
+    Fit/transform version of ``manage_outliers``: outlier criteria and limits are learnt once on training data
+    and re-applied unchanged to new batches (train/serve consistency).
+
+    Parameters
+    ---
+    - ``mode (str)``: Default transform: 'winsor' (clip to the learnt winsor limits) or 'miss' (outliers to NaN).
+    - ``non_normal_crit``, ``n_std``, ``multiplier``, ``MAD_threshold``, ``normal_cols``, ``alpha``,
+    ``normality_test``, ``sample_size``, ``random_state``: same meaning as in ``manage_outliers``.
+
+    Attributes (after ``fit``)
+    ---
+    - ``columns_ (np.ndarray)``: Names (as str) of the fitted numeric columns.
+    - ``method_ (np.ndarray)``: Per-column criterion code: 0 = normal (std), 1 = MAD, 2 = IQR (see ``METHODS``).
+    - ``bounds_ (np.ndarray)``: (n_columns, 2) outlier bounds used by 'miss'.
+    - ``clip_ (np.ndarray)``: (n_columns, 2) winsor limits used by 'winsor'.
+
+    Example
+    ---
+    ```python
+    transformer = OutlierTransformer(mode='winsor').fit(X_train)
+    transformer.save('outliers.npz')
+
+    # scoring process
+    X_batch = OutlierTransformer.load('outliers.npz').transform(X_batch)
+    ```
+    """
+    METHODS = np.array(['std', 'MAD', 'IQR'])
+
+    def __init__(self,
+                 mode: Literal['winsor', 'miss']='winsor',
+                 non_normal_crit: Literal['MAD', 'IQR']='MAD',
+                 n_std=4,
+                 multiplier=4,
+                 MAD_threshold=8,
+                 normal_cols: list=[],
+                 alpha=0.05,
+                 normality_test: Literal['sample', 'full', 'moments']='sample',
+                 sample_size=5000,
+                 random_state=0
+                 ):
+        self.mode = mode
+        self.non_normal_crit = non_normal_crit
+        self.n_std = n_std
+        self.multiplier = multiplier
+        self.MAD_threshold = MAD_threshold
+        self.normal_cols = normal_cols
+        self.alpha = alpha
+        self.normality_test = normality_test
+        self.sample_size = sample_size
+        self.random_state = random_state
+
+    def fit(self, df: pd.DataFrame, y=None):
+        """
+        Learn the per-column criterion, outlier bounds and winsor limits from ``df``.
+        """
+        _, report = manage_outliers_frame(df,
+                                          mode='winsor',
+                                          non_normal_crit=self.non_normal_crit,
+                                          n_std=self.n_std,
+                                          multiplier=self.multiplier,
+                                          MAD_threshold=self.MAD_threshold,
+                                          normal_cols=self.normal_cols,
+                                          alpha=self.alpha,
+                                          return_report=True,
+                                          normality_test=self.normality_test,
+                                          sample_size=self.sample_size,
+                                          random_state=self.random_state)
+        self.columns_ = report.index.astype(str).to_numpy(dtype=str)
+        self.method_ = np.where(report['normality'] == 'normal', 0, 1 if self.non_normal_crit == 'MAD' else 2).astype(np.int8)
+        self.bounds_ = report[['lower_bound', 'upper_bound']].to_numpy(dtype=np.float64)
+        self.clip_ = report[['winsor_lower', 'winsor_upper']].to_numpy(dtype=np.float64)
+        return self
+
+    def transform(self, df: pd.DataFrame, mode: Literal['winsor', 'miss']=None) -> pd.DataFrame:
+        """
+        Apply the fitted limits to a new batch with a single vectorized clip/mask. Returns a copy.
+        """
+        mode = self.mode if mode is None else mode
+        positions = {str(col): i for i, col in enumerate(df.columns)}
+        missing = [col for col in self.columns_ if col not in positions]
+        if missing:
+            raise KeyError(f"Columns seen in fit are missing from the batch: {missing}")
+        pos = [positions[col] for col in self.columns_]
+        block = df.iloc[:, pos].to_numpy(dtype=np.float64, na_value=np.nan)
+
+        if mode == 'winsor':
+            block = np.clip(block, self.clip_[:, 0], self.clip_[:, 1])
+        elif mode == 'miss':
+            block = np.where((block < self.bounds_[:, 0]) | (block > self.bounds_[:, 1]), np.nan, block)
+        else:
+            raise ValueError("mode must be one of the list: ['winsor', 'miss']!")
+
+        # Replace the fitted columns as a whole so they become float64 (as in manage_outliers_frame):
+        # writing floats/NaN into int columns in place would fail or silently keep the int dtype
+        df_out = df.copy()
+        for j, p in enumerate(pos):
+            df_out.isetitem(p, block[:, j])
+        return df_out
+
+    def fit_transform(self, df: pd.DataFrame, y=None, mode: Literal['winsor', 'miss']=None) -> pd.DataFrame:
+        return self.fit(df).transform(df, mode=mode)
+
+    def to_frame(self) -> pd.DataFrame:
+        """
+        Fitted limits as a readable DataFrame (one row per column).
+        """
+        return pd.DataFrame({'method': self.METHODS[self.method_],
+                             'lower_bound': self.bounds_[:, 0],
+                             'upper_bound': self.bounds_[:, 1],
+                             'winsor_lower': self.clip_[:, 0],
+                             'winsor_upper': self.clip_[:, 1]},
+                            index=self.columns_)
+
+    def save(self, path):
+        """
+        Persist the fitted state to a compressed ``.npz`` file.
+        """
+        np.savez_compressed(path,
+                            columns=self.columns_,
+                            method=self.method_,
+                            bounds=self.bounds_,
+                            clip=self.clip_,
+                            mode=np.array(self.mode))
+
+    @classmethod
+    def load(cls, path):
+        """
+        Restore a transformer saved with ``save`` (no statistics are recomputed).
+        """
+        with np.load(path) as data:
+            transformer = cls(mode=str(data['mode']))
+            transformer.columns_ = data['columns']
+            transformer.method_ = data['method']
+            transformer.bounds_ = data['bounds']
+            transformer.clip_ = data['clip']
+        return transformer
+
+def _outlier_stats(block,
+                   columns,
+                   non_normal_crit='MAD',
+                   n_std=4,
+                   multiplier=4,
+                   MAD_threshold=8,
+                   normal_cols=[],
+                   alpha=0.05,
+                   normality_test='sample',
+                   sample_size=5000,
+                   random_state=0
+                   ) -> dict:
+    """
+    Per-column statistics, normality decision and outlier bounds of a 2-D float block (rows x columns).
+    Outliers are the values outside ``[lower_bound, upper_bound]``, which is equivalent to the criteria of ``manage_outliers``.
+    """
+    n_cols = block.shape[1]
+    valid = ~np.isnan(block)
+    n = valid.sum(axis=0)
+
+    with warnings.catch_warnings(), span('outlier_stats.quantiles', rows=block.shape[0], cols=n_cols):
+        warnings.simplefilter('ignore', RuntimeWarning)
+        q1, median, q3 = np.nanquantile(block, [0.25, 0.50, 0.75], axis=0)
+        mean = np.nanmean(block, axis=0)
+        std = np.nanstd(block, axis=0, ddof=1)
+        mad = np.nanmedian(np.abs(block - median), axis=0)
+
+    manual = np.isin(np.asarray(columns, dtype=object), normal_cols)
+    test = np.full(n_cols, 'manual', dtype=object)
+    p_value = np.full(n_cols, np.nan)
+    normal = manual.copy()
+    tested = np.flatnonzero(~manual)
+    if tested.size:
+        with span('outlier_stats.normality_test', rows=block.shape[0], cols=tested.size, test=normality_test):
+            test[tested], p_value[tested], decision = _normality_test_block(block[:, tested], normality_test,
+                                                                            sample_size, random_state)
+        normal[tested] = np.where(np.isnan(decision), p_value[tested] >= alpha, decision == 1)
+
+    with np.errstate(invalid='ignore'):
+        iqr = q3 - q1
+        if non_normal_crit == 'MAD':
+            crit_lo, crit_hi, crit = median - MAD_threshold * mad, median + MAD_threshold * mad, f"MAD | +-{MAD_threshold}"
+        elif non_normal_crit == 'IQR':
+            crit_lo, crit_hi, crit = q1 - multiplier * iqr, q3 + multiplier * iqr, f"IQR | +-{multiplier}"
+        else:
+            raise ValueError("non_normal_crit must be one of the list: ['MAD', 'IQR']!")
+        lower_bound = np.where(normal, mean - n_std * std, crit_lo)
+        upper_bound = np.where(normal, mean + n_std * std, crit_hi)
+    criterion = np.where(normal, f"std | +-{n_std}", crit).astype(object)
+
+    return dict(n=n, q1=q1, median=median, q3=q3, mean=mean, std=std, mad=mad,
+                normal=normal, test=test, p_value=p_value, criterion=criterion,
+                lower_bound=lower_bound, upper_bound=upper_bound)
+
+_NORMALITY_CACHE = OrderedDict()
+_NORMALITY_CACHE_SIZE = 4096
+_MOMENT_LIMITS = (0.5, 1.0)  # max |skewness| and |excess kurtosis| accepted as normal by the 'moments' screen
+
+def _fingerprint(values) -> str:
+    """
+    Fast content hash of a 1-D array (no copy when the array is contiguous).
+    """
+    values = np.ascontiguousarray(values)
+    digest = hashlib.blake2b(values.view(np.uint8), digest_size=16).hexdigest()
+    return f"{values.dtype.str}:{values.size}:{digest}"
+
+def _normality_test(values, normality_test='sample', sample_size=5000, random_state=0) -> tuple:
+    """
+    Normality decision for a single 1-D float array (NaNs ignored).
+    Returns ``(test, p_value, is_normal)``; ``is_normal`` is None when the decision depends on ``alpha`` (p-value tests).
+    """
+    test, p_value, decision = _normality_test_block(np.asarray(values, dtype=np.float64)[:, None],
+                                                    normality_test, sample_size, random_state)
+    return test[0], p_value[0], None if np.isnan(decision[0]) else bool(decision[0])
+
+def _normality_test_block(block, normality_test='sample', sample_size=5000, random_state=0) -> tuple:
+    """
+    Normality decision stage for every column of a 2-D float block, with a per-column cache keyed on a data fingerprint.
+    Returns arrays ``(test, p_value, decision)`` where ``decision`` is 1/0 for the 'moments' screen and NaN otherwise.
+
+    - n < 50: Shapiro-Wilk on the non-missing values.
+    - ``'full'``: one-sample KS against N(0, 1) on all the values.
+    - ``'sample'``: the same KS test on a seeded random subsample of at most ``sample_size`` of the column's
+      non-missing values (p-values on millions of rows collapse to zero anyway, and the sort is bounded).
+    - ``'moments'``: |skewness| and |excess kurtosis| below ``_MOMENT_LIMITS``, no sort at all.
+    """
+    import scipy.stats as stats
+    if normality_test not in ['sample', 'full', 'moments']:
+        raise ValueError("normality_test must be one of the list: ['sample', 'full', 'moments']!")
+
+    n_cols = block.shape[1]
+    test = np.empty(n_cols, dtype=object)
+    p_value = np.full(n_cols, np.nan)
+    decision = np.full(n_cols, np.nan)
+
+    params = (normality_test, sample_size, random_state) if normality_test == 'sample' else (normality_test,)
+    keys = [(_fingerprint(block[:, j]),) + params for j in range(n_cols)]
+    todo = []
+    for j, key in enumerate(keys):
+        if key in _NORMALITY_CACHE:
+            _NORMALITY_CACHE.move_to_end(key)
+            test[j], p_value[j], decision[j] = _NORMALITY_CACHE[key]
+        else:
+            todo.append(j)
+    if not todo:
+        return test, p_value, decision
+
+    todo = np.array(todo)
+    valid = ~np.isnan(block[:, todo])
+    n = valid.sum(axis=0)
+
+    small = todo[n < 50]
+    for j in small:
+        values = block[~np.isnan(block[:, j]), j]
+        test[j] = 'shapiro'
+        p_value[j] = stats.shapiro(values).pvalue if values.size >= 3 else np.nan
+
+    large = todo[n >= 50]
+    if large.size and normality_test == 'moments':
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore', RuntimeWarning)
+            skew = stats.skew(block[:, large], axis=0, nan_policy='omit')
+            kurt = stats.kurtosis(block[:, large], axis=0, nan_policy='omit')
+        test[large] = 'moments'
+        decision[large] = (np.abs(skew) <= _MOMENT_LIMITS[0]) & (np.abs(kurt) <= _MOMENT_LIMITS[1])
+    elif large.size:
+        sub, n_sub = block[:, large], n[n >= 50]
+        if normality_test == 'sample' and n_sub.max() > sample_size:
+            sub, n_sub = _sample_valid_block(sub, n_sub, sample_size, random_state)
+        test[large] = np.where(n_sub < n[n >= 50], 'KS-sample', 'Kolmogo')
+        p_value[large] = _kstest_norm_block(sub, n_sub)
+
+    for j in todo:
+        _NORMALITY_CACHE[keys[j]] = (test[j], p_value[j], decision[j])
+    while len(_NORMALITY_CACHE) > _NORMALITY_CACHE_SIZE:
+        _NORMALITY_CACHE.popitem(last=False)
+    return test, p_value, decision
+
+def _sample_positions(n, sample_size, random_state=0) -> np.ndarray:
+    """
+    Sorted positions, among a column's ``n`` non-missing values, of its 'sample' normality subsample.
+    """
+    return np.sort(np.random.default_rng(random_state).choice(n, size=sample_size, replace=False))
+
+def _sample_valid_block(block, n, sample_size, random_state=0) -> tuple[np.ndarray, np.ndarray]:
+    """
+    'sample' subsample of every column of a block, drawn among that column's ``n`` non-missing values (columns with
+    at most ``sample_size`` of them are kept whole). Returns the NaN-padded (sample_size x columns) block and the
+    per-column sample sizes.
+    """
+    n_rows = block.shape[0]
+    out = np.full((sample_size, block.shape[1]), np.nan)
+    dense = np.flatnonzero(n == n_rows)
+    if dense.size:
+        # Columns without missing values share one row sample
+        out[:, dense] = block[np.ix_(_sample_positions(n_rows, sample_size, random_state), dense)]
+    for j in np.flatnonzero(n < n_rows):
+        values = block[~np.isnan(block[:, j]), j]
+        if values.size > sample_size:
+            values = values[_sample_positions(values.size, sample_size, random_state)]
+        out[:values.size, j] = values
+    return out, np.minimum(n, sample_size)
+
+def _kstest_norm_block(block, n) -> np.ndarray:
+    """
+    Two-sided one-sample KS p-values against N(0, 1) for every column of a block (NaNs ignored),
+    using the exact distribution of the statistic like ``stats.kstest``.
+    """
+    import scipy.stats as stats
+    sorted_block = np.sort(block, axis=0)  # NaNs sorted to the end
+    cdf = stats.norm.cdf(sorted_block)
+    rank = np.arange(1, block.shape[0] + 1)[:, None]
+    inside = rank <= n
+    d_plus = np.where(inside, rank / n - cdf, -np.inf).max(axis=0)
+    d_minus = np.where(inside, cdf - (rank - 1) / n, -np.inf).max(axis=0)
+    d = np.maximum(d_plus, d_minus)
+    return np.clip(stats.kstwo.sf(d, n), 0.0, 1.0)
+
+###############################################################################################################################
+
+@traced()
+def get_cramersV(x,
+                 y,
+                 n_bins=5,
+                 return_scalar=False
+                 ):
+    """
+    - Calculate Cramer's V statistic for the association between two categorical variables.
+    - If either x or y is a continuous variable, the function discretizes it using fixed binning (default is 5 bins).
+
+    Parameters:
+    ---
+    - `x (pd.Series)`: Predictor variable.
+    - `y (pd.Series)`: Response variable.
+    - If either one is Arrow-backed (pyarrow array, Polars Series or ``pd.ArrowDtype`` series), both are encoded with
+      Arrow kernels and crossed with a single ``np.bincount`` (see ``my_arrow``).
+    
+    Notes:
+    ---
+    - Optimal binning is performed using the get_optbinned_x function if opt_binning is True.
+    - The function then computes the Cramer's V statistic for the association between the two categorical variables using the contingency table.
+    - The result is returned as a Pandas Series with the Cramer's V statistic and the variable name as the index.
+    """
+    if my_arrow.backend(x) is not None or my_arrow.backend(y) is not None:
+        return my_arrow.cramersV_columnar(x, y, n_bins, return_scalar)
+    import scipy.stats as stats
+    with span('get_cramersV.discretize', rows=len(x)):
+        # Discretizar x continua
+        if pd.api.types.is_numeric_dtype(x) and (not (x.nunique() == 2)):
+            x= pd.cut(x, bins=min(n_bins, x.nunique()))
+                
+        # Discretizar y continua
+        if pd.api.types.is_numeric_dtype(y) and (not (y.nunique() == 2)):
+            y = pd.cut(y, bins=min(n_bins, y.nunique()))
+    
+    name = f'CramersV: min(nunique, {n_bins}) bins'
+        
+    with span('get_cramersV.crosstab', rows=len(x)):
+        data = pd.crosstab(x, y).values
+    vCramer = stats.contingency.association(data, method='cramer')
+    
+    if return_scalar is True:
+        return vCramer
+    else:
+        return pd.Series({name:vCramer}, name=x.name)
+
+###############################################################################################################################
+
+@traced()
+def cramersV_matrix(df: pd.DataFrame,
+                    n_bins=5,
+                    n_jobs=None,
+                    top_k=None,
+                    progress=None
+                    ) -> pd.DataFrame:
+    """
+    - Calculate the symmetric matrix of Cramer's V statistics between all pairs of columns in ``df``.
+    - Same binning as ``get_cramersV``: continuous columns are discretized using fixed binning (default is 5 bins).
+
+    Parameters:
+    ---
+    - `df (pd.DataFrame)`: Input DataFrame (categorical and/or numeric columns).
+    - `n_bins (int, optional)`: Number of bins for continuous columns, ``min(nunique, n_bins)`` (default is 5).
+    - `n_jobs (int, optional)`: Number of worker processes; None or 1 runs in the current process (default is None).
+    - `top_k (int, optional)`: If given, return a long DataFrame with the ``top_k`` most associated partners
+      of each feature (columns 'feature', 'partner', 'CramersV') instead of the full matrix (default is None).
+    - `progress (callable, optional)`: Called as ``progress(done_pairs, total_pairs, elapsed_seconds)``
+      every time a feature's row of the matrix is finished (default is None).
+
+    Notes:
+    ---
+    - Every column is binned/encoded once into integer codes; each contingency table is a single ``np.bincount``
+      on the combined codes of the pair (rows with a missing value in either column are dropped, like ``pd.crosstab``).
+    - The result matches calling ``get_cramersV(df[a], df[b], return_scalar=True)`` for every pair.
+
+    Example:
+    ---
+    ```python
+    df_V = cramersV_matrix(X_train.select_dtypes('object'), n_jobs=8, progress=lambda d, t, s: print(f'{d}/{t} {s:.1f}s'))
+    sns.heatmap(df_V, cmap='Reds')
+    ```
+    """
+    columns = df.columns
+    with span('cramersV_matrix.encode', rows=df.shape[0], cols=df.shape[1]):
+        codes, cards = _encode_codes(df, n_bins)
+    n_cols = len(columns)
+    total = n_cols * (n_cols - 1) // 2
+    matrix = np.eye(n_cols)
+    start = time.perf_counter()
+    done = 0
+
+    if n_jobs is None or n_jobs == 1:
+        _init_cramersV_worker(codes, cards)
+        rows = map(_cramersV_row, range(n_cols - 1))
+        for i, values in zip(range(n_cols - 1), rows):
+            matrix[i, i + 1:] = values
+            done += len(values)
+            if progress is not None:
+                progress(done, total, time.perf_counter() - start)
+    else:
+        with ProcessPoolExecutor(max_workers=n_jobs, initializer=_init_cramersV_worker, initargs=(codes, cards)) as executor:
+            futures = {executor.submit(_cramersV_row, i): i for i in range(n_cols - 1)}
+            for future in as_completed(futures):
+                i = futures[future]
+                values = future.result()
+                matrix[i, i + 1:] = values
+                done += len(values)
+                if progress is not None:
+                    progress(done, total, time.perf_counter() - start)
+
+    upper = np.triu_indices(n_cols, k=1)
+    matrix[upper[::-1]] = matrix[upper]
+    df_V = pd.DataFrame(matrix, index=columns, columns=columns)
+    if top_k is None:
+        return df_V
+
+    np.fill_diagonal(matrix, -np.inf)
+    k = min(top_k, n_cols - 1)
+    top = np.argpartition(-np.nan_to_num(matrix, nan=-np.inf), k - 1, axis=1)[:, :k]
+    top_values = np.take_along_axis(matrix, top, axis=1)
+    order = np.argsort(-np.nan_to_num(top_values, nan=-np.inf), axis=1, kind='stable')
+    top = np.take_along_axis(top, order, axis=1)
+    return pd.DataFrame({'feature': np.repeat(columns.to_numpy(), k),
+                         'partner': columns.to_numpy()[top.ravel()],
+                         'CramersV': np.take_along_axis(top_values, order, axis=1).ravel()})
+
+def _encode_codes(df: pd.DataFrame, n_bins=5) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Integer codes (rows x columns, -1 for missing) and cardinalities of every column,
+    binning continuous columns exactly like ``get_cramersV``.
+    """
+    codes = np.empty(df.shape, dtype=np.int32, order='F')
+    cards = np.empty(df.shape[1], dtype=np.int64)
+    for j in range(df.shape[1]):
+        codes[:, j], cards[j] = _encode_column(df.iloc[:, j], n_bins)
+    return codes, cards
+
+def _encode_column(x: pd.Series, n_bins=5) -> tuple[np.ndarray, int]:
+    """
+    Integer codes (-1 for missing) and cardinality of a single column.
+    """
+    nunique = x.nunique()
+    if pd.api.types.is_numeric_dtype(x) and (not (nunique == 2)) and nunique > 0:
+        x = pd.cut(x, bins=min(n_bins, nunique))
+        return x.cat.codes.to_numpy(), len(x.cat.categories)
+    if isinstance(x.dtype, pd.CategoricalDtype):
+        return x.cat.codes.to_numpy(), len(x.cat.categories)
+    codes, uniques = pd.factorize(x)
+    return codes, len(uniques)
+
+def _cramersV_table(table: np.ndarray) -> float:
+    """
+    Cramer's V of a contingency table (empty rows/columns removed, like ``pd.crosstab``).
+    """
+    table = table[table.sum(axis=1) > 0][:, table.sum(axis=0) > 0]
+    n = table.sum()
+    min_dim = min(table.shape) - 1
+    if n == 0 or min_dim == 0:
+        return np.nan
+    expected = np.outer(table.sum(axis=1), table.sum(axis=0)) / n
+    chi2 = ((table - expected) ** 2 / expected).sum()
+    return np.sqrt(chi2 / n / min_dim)
+
+_CRAMERSV_CODES = None
+_CRAMERSV_CARDS = None
+
+def _init_cramersV_worker(codes, cards):
+    global _CRAMERSV_CODES, _CRAMERSV_CARDS
+    _CRAMERSV_CODES, _CRAMERSV_CARDS = codes, cards
+
+def _cramersV_row(i) -> np.ndarray:
+    """
+    Cramer's V between column ``i`` and every column ``j > i`` of the encoded worker data.
+    """
+    codes, cards = _CRAMERSV_CODES, _CRAMERSV_CARDS
+    x = codes[:, i].astype(np.int64)
+    x_valid = x >= 0
+    x_complete = x_valid.all()
+    combined = np.empty_like(x)
+    values = np.empty(codes.shape[1] - i - 1)
+    for j in range(i + 1, codes.shape[1]):
+        y = codes[:, j]
+        np.multiply(x, cards[j], out=combined)
+        combined += y
+        if x_complete and (y >= 0).all():
+            counts = np.bincount(combined, minlength=cards[i] * cards[j])
+        else:
+            counts = np.bincount(combined[x_valid & (y >= 0)], minlength=cards[i] * cards[j])
+        values[j - i - 1] = _cramersV_table(counts.reshape(cards[i], cards[j]))
+    return values
+
+###############################################################################################################################
+
+@traced()
+def target_association(X: pd.DataFrame,
+                       y: pd.Series,
+                       methods: list=['pearson', 'spearman', 'cramersV', 'mutual_info'],
+                       n_bins=5,
+                       chunk_size=None
+                       ) -> pd.DataFrame:
+    """
+    - Calculate the association of every predictor in ``X`` with the target ``y`` at once.
+    - Returns the wide-format DataFrame consumed by ``association_barplot`` (one row per metric, one column per predictor).
+
+    Parameters:
+    ---
+    - `X (pd.DataFrame)`: Predictor variables.
+    - `y (pd.Series)`: Response variable.
+    - `methods (list, optional)`: Any of 'pearson', 'spearman', 'cramersV', 'mutual_info' (default is all of them).
+    - `n_bins (int, optional)`: Fixed binning of continuous variables for 'cramersV' and 'mutual_info',
+      same rule as ``get_cramersV`` (default is 5).
+    - `chunk_size (int, optional)`: Number of predictors converted to NumPy at a time, to bound memory on
+      wide data (default is None, all at once).
+
+    Notes:
+    ---
+    - Pearson and Spearman (Pearson on ranks) are computed for all numeric predictors with masked matrix products
+      against the centered target; missing values are dropped pairwise for Pearson, while ranks are taken over the
+      non-missing values of each variable. Non-numeric predictors get NaN.
+    - Cramer's V and mutual information (in nats) come from the same integer-coded ``np.bincount`` contingency table.
+    - Select a metric row to plot it: ``association_barplot(df_assoc.loc[['Pearson']], y, abs_value=True)``.
+    """
+    import scipy.stats as stats
+    names = {'pearson': 'Pearson',
+             'spearman': 'Spearman',
+             'cramersV': f'CramersV: min(nunique, {n_bins}) bins',
+             'mutual_info': f'MutualInfo: min(nunique, {n_bins}) bins'}
+    for method in methods:
+        if method not in names:
+            raise ValueError(f"methods must be in the list: {list(names)}!")
+
+    # Rows with a known target, kept as positions so that only one chunk of X is copied at a time
+    y_valid = y.notna().to_numpy()
+    rows = slice(None) if y_valid.all() else np.flatnonzero(y_valid)
+    y = y[y_valid]
+    result = pd.DataFrame(np.nan, index=[names[method] for method in methods], columns=X.columns)
+
+    numeric_y = pd.api.types.is_numeric_dtype(y) and not pd.api.types.is_bool_dtype(y)
+    if numeric_y:
+        y_num = y.to_numpy(dtype=np.float64)
+        y_rank = stats.rankdata(y_num)
+    if 'cramersV' in methods or 'mutual_info' in methods:
+        y_codes, y_card = _encode_column(y, n_bins)
+        y_codes = y_codes.astype(np.int64)
+
+    chunk_size = chunk_size or max(X.shape[1], 1)
+    for start in range(0, X.shape[1], chunk_size):
+        chunk = X.iloc[rows, start:start + chunk_size]
+        is_num = np.array([pd.api.types.is_numeric_dtype(dtype) for dtype in chunk.dtypes], dtype=bool)
+        num_cols = chunk.columns[is_num]
+
+        if numeric_y and num_cols.size and ('pearson' in methods or 'spearman' in methods):
+            block = chunk[num_cols].to_numpy(dtype=np.float64, na_value=np.nan)
+            if 'pearson' in methods:
+                result.loc[names['pearson'], num_cols] = _masked_pearson(block, y_num)
+            if 'spearman' in methods:
+                ranks = stats.rankdata(block, axis=0, nan_policy='omit')
+                result.loc[names['spearman'], num_cols] = _masked_pearson(ranks, y_rank)
+
+        if 'cramersV' in methods or 'mutual_info' in methods:
+            tables = _contingency_tables(*_encode_codes(chunk, n_bins), y_codes, y_card)
+            if 'cramersV' in methods:
+                result.iloc[methods.index('cramersV'), start:start + chunk_size] = [_cramersV_table(t) for t in tables]
+            if 'mutual_info' in methods:
+                result.iloc[methods.index('mutual_info'), start:start + chunk_size] = [_mutual_info_table(t) for t in tables]
+
+    return result
+
+def _contingency_tables(codes, cards, y_codes, y_card) -> list:
+    """
+    Contingency table against the target of every column of an integer code block (rows x columns, -1 for missing),
+    from a single ``np.bincount``: each column's ``x * y_card + y`` cells are offset past the previous columns' tables.
+    """
+    sizes = cards * y_card
+    offsets = np.concatenate([[0], np.cumsum(sizes)])
+    cells = codes.astype(np.int64) * y_card + y_codes[:, None] + offsets[:-1]
+    valid = (codes >= 0) & (y_codes >= 0)[:, None]
+    counts = np.bincount(cells[valid], minlength=offsets[-1])
+    return [counts[offsets[j]:offsets[j + 1]].reshape(cards[j], y_card) for j in range(len(cards))]
+
+def _masked_pearson(block, y) -> np.ndarray:
+    """
+    Pearson correlation of every column of ``block`` (NaNs dropped pairwise) with a complete vector ``y``.
+    """
+    valid = ~np.isnan(block)
+    weights = valid.astype(np.float64)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        centered = np.where(valid, block - np.nanmean(block, axis=0), 0.0)
+        y_c = y - y.mean()
+        n = weights.sum(axis=0)
+        sum_x = centered.sum(axis=0)
+        sum_y = y_c @ weights
+        cov = y_c @ centered - sum_x * sum_y / n
+        var_x = (centered * centered).sum(axis=0) - sum_x ** 2 / n
+        var_y = (y_c * y_c) @ weights - sum_y ** 2 / n
+        return cov / np.sqrt(var_x * var_y)
+
+def _mutual_info_table(table: np.ndarray) -> float:
+    """
+    Mutual information (natural log) of a contingency table.
+    """
+    n = table.sum()
+    if n == 0:
+        return np.nan
+    p_xy = table / n
+    p_x = p_xy.sum(axis=1, keepdims=True)
+    p_y = p_xy.sum(axis=0, keepdims=True)
+    nonzero = p_xy > 0
+    return float((p_xy[nonzero] * np.log(p_xy[nonzero] / (p_x @ p_y)[nonzero])).sum())
+
+###############################################################################################################################
+
+@traced()
+def aggregate_feature_importances(predictors: list=None,
+                                  cache_path: str=None
+                                  ) -> pd.DataFrame:
+    """
+    - Aggregate ``feature_importances_`` of several fitted predictors (e.g. the fold models of a CV ensemble)
+      aligned by feature name.
+
+    Parameters:
+    ---
+    - `predictors (list, optional)`: Fitted tree-based predictors; features missing from a model count as 0
+      importance for it. If None, the table is read from ``cache_path`` (default is None).
+    - `cache_path (str, optional)`: '.parquet' or '.csv' file. The aggregated table is written there after it is
+      computed, so dashboards can read it without loading any model (default is None).
+
+    Returns:
+    ---
+    pd.DataFrame: Index of features with columns 'feature_importance' (mean importance in %), 'std', 'rank_mean',
+    'rank_std' (rank 1 is the most important feature of a model) and 'n_models' (number of models with the feature),
+    in the order features first appear.
+    """
+    if predictors is None:
+        if cache_path is None:
+            raise ValueError("Either 'predictors' or 'cache_path' must be given!")
+        if cache_path.endswith('.parquet'):
+            return pd.read_parquet(cache_path)
+        return pd.read_csv(cache_path, index_col=0)
+
+    names = [_feature_names(model) for model in predictors]
+    features = pd.Index(np.concatenate(names)).unique()
+    stacked = np.zeros((len(predictors), len(features)))
+    present = np.zeros((len(predictors), len(features)), dtype=bool)
+    for i, (model, model_names) in enumerate(zip(predictors, names)):
+        pos = features.get_indexer(model_names)
+        stacked[i, pos] = model.feature_importances_
+        present[i, pos] = True
+    totals = stacked.sum(axis=1, keepdims=True)
+    stacked = np.divide(stacked, totals, out=np.zeros_like(stacked), where=totals > 0) * 100  # LightGBM counts splits
+
+    ranks = np.argsort(np.argsort(-stacked, axis=1, kind='stable'), axis=1) + 1
+    ddof = 1 if len(predictors) > 1 else 0
+    df_agg = pd.DataFrame({'feature_importance': stacked.mean(axis=0), 'std': stacked.std(axis=0, ddof=ddof),
+                           'rank_mean': ranks.mean(axis=0), 'rank_std': ranks.std(axis=0, ddof=ddof),
+                           'n_models': present.sum(axis=0)}, index=features)
+    df_agg.attrs['model'] = predictors[0].__class__.__name__ if predictors else None
+
+    if cache_path is not None:
+        if cache_path.endswith('.parquet'):
+            df_agg.to_parquet(cache_path)
+        else:
+            df_agg.to_csv(cache_path)
+    return df_agg
+
+def _feature_names(predictor) -> np.ndarray:
+    """
+    Feature names of a fitted predictor (sklearn ``feature_names_in_``, LightGBM ``feature_name_``, else positions).
+    """
+    for attr in ('feature_names_in_', 'feature_name_'):
+        names = getattr(predictor, attr, None)
+        if names is not None:
+            return np.asarray(names, dtype=object)
+    return np.arange(len(predictor.feature_importances_)).astype(object)
+
+def _select_extreme(values: np.ndarray, n: int, bottom=False) -> np.ndarray:
+    """
+    Positions of the ``n`` largest (or smallest) values, sorted, via ``argpartition`` instead of a full sort.
+    """
+    keys = values if bottom else -values
+    if n < len(keys):
+        part = np.argpartition(keys, n - 1)[:n]
+    else:
+        part = np.arange(len(keys))
+    return part[np.argsort(keys[part], kind='stable')]
+
+###############################################################################################################################
+
+@traced()
+def permutation_importance(predictor,
+                           X: pd.DataFrame,
+                           y,
+                           scoring=None,
+                           n_repeats=5,
+                           groups: dict=None,
+                           n_jobs=None,
+                           random_state=0,
+                           early_stop=True,
+                           min_repeats=3,
+                           confidence=0.95
+                           ) -> pd.DataFrame:
+    """
+    - Model-agnostic permutation importance: decrease of the score of a fitted ``predictor`` on (``X``, ``y``)
+      when a feature (or a group of features) is randomly shuffled.
+
+    Parameters:
+    ---
+    - `predictor (object)`: Any fitted estimator or ``Pipeline`` (e.g. LightGBM wrapped in a sklearn ``Pipeline``).
+    - `X (pd.DataFrame)`: Evaluation predictors, in the format the predictor expects.
+    - `y (array-like)`: Evaluation target.
+    - `scoring (str or callable, optional)`: sklearn scorer name (e.g. 'roc_auc', 'neg_mean_absolute_error') or a
+      callable ``scoring(predictor, X, y)``, higher is better (default is None, ``predictor.score``).
+    - `n_repeats (int, optional)`: Maximum number of shuffles per feature (default is 5).
+    - `groups (dict, optional)`: ``{group_name: [columns]}`` permuted jointly with the same shuffle (e.g. the one-hot
+      columns of a variable, or highly correlated features); the remaining columns are permuted alone (default is None).
+    - `n_jobs (int, optional)`: Number of worker processes; None or 1 runs in the current process (default is None).
+    - `random_state (int, optional)`: Seed; each feature gets its own stream so results do not depend on ``n_jobs``
+      (default is 0).
+    - `early_stop (bool, optional)`: Stop shuffling a feature after ``min_repeats`` once its confidence interval
+      excludes 0 (or the shuffles have no effect at all) (default is True).
+    - `min_repeats (int, optional)`: Minimum number of shuffles before early stopping (default is 3).
+    - `confidence (float, optional)`: Level of the t-based confidence interval (default is 0.95).
+
+    Returns:
+    ---
+    pd.DataFrame: Index of features/groups with columns 'feature_importance' (mean score decrease), 'std',
+    'ci_low', 'ci_high' and 'n_repeats', sorted by importance. ``attrs`` hold 'baseline_score' and 'scoring'.
+
+    Notes:
+    ---
+    - Each worker gets one private copy of ``X``: homogeneous numeric frames are backed by a single Fortran-ordered
+      NumPy buffer whose column is shuffled in place and restored after scoring; other frames only swap the
+      permuted column(s), using a preallocated buffer for NumPy dtypes. The frame is never copied per feature.
+    """
+    import scipy.stats as stats
+    columns = list(X.columns)
+    positions = {col: j for j, col in enumerate(columns)}
+    groups = {} if groups is None else groups
+    grouped = {col for cols in groups.values() for col in cols}
+    missing = grouped - set(columns)
+    if missing:
+        raise ValueError(f'Columns in groups not found in X: {sorted(missing, key=str)}')
+    names = list(groups) + [col for col in columns if col not in grouped]
+    tasks = [[positions[col] for col in cols] for cols in groups.values()] + [[positions[col]] for col in columns if col not in grouped]
+
+    min_repeats = max(2, min(min_repeats, n_repeats))
+    settings = {'n_repeats': n_repeats, 'min_repeats': min_repeats, 'early_stop': early_stop,
+                't_crit': stats.t.ppf((1 + confidence) / 2, np.arange(n_repeats)), 'random_state': random_state}
+    scorer = _get_scorer(scoring)
+    baseline = scorer(predictor, X, y)
+    scoring_name = scoring if isinstance(scoring, str) else getattr(scoring, '__name__', 'score')
+
+    initargs = (predictor, X, y, scoring, baseline, tasks, settings)
+    if n_jobs is None or n_jobs == 1:
+        _init_permutation_worker(*initargs)
+        results = list(map(_permutation_task, range(len(tasks))))
+        _init_permutation_worker(*(None,) * len(initargs))
+    else:
+        results = [None] * len(tasks)
+        with ProcessPoolExecutor(max_workers=n_jobs, initializer=_init_permutation_worker, initargs=initargs) as executor:
+            futures = {executor.submit(_permutation_task, i): i for i in range(len(tasks))}
+            for future in as_completed(futures):
+                results[futures[future]] = future.result()
+
+    repeats = np.array([len(drops) for drops in results])
+    mean = np.array([drops.mean() for drops in results])
+    std = np.array([drops.std(ddof=1) if len(drops) > 1 else np.nan for drops in results])
+    half = settings['t_crit'][repeats - 1] * std / np.sqrt(repeats)
+    df_imp = pd.DataFrame({'feature_importance': mean, 'std': std, 'ci_low': mean - half, 'ci_high': mean + half,
+                           'n_repeats': repeats}, index=pd.Index(names))
+    df_imp = df_imp.sort_values('feature_importance', ascending=False)
+    df_imp.attrs.update({'baseline_score': baseline, 'scoring': scoring_name})
+    return df_imp
+
+def _default_score(predictor, X, y) -> float:
+    return predictor.score(X, y)
+
+def _get_scorer(scoring):
+    if scoring is None:
+        return _default_score
+    if isinstance(scoring, str):
+        from sklearn.metrics import get_scorer
+        return get_scorer(scoring)
+    return scoring
+
+_PERMUTATION_STATE = None
+
+def _init_permutation_worker(predictor, X, y, scoring, baseline, tasks, settings):
+    global _PERMUTATION_STATE
+    if X is None:
+        _PERMUTATION_STATE = None
+        return
+    dtypes = X.dtypes.unique()
+    if len(dtypes) == 1 and isinstance(dtypes[0], np.dtype) and dtypes[0].kind in 'biuf':
+        # Single Fortran buffer: shuffling a column is an in-place write the frame sees without copies.
+        buffer = np.asfortranarray(X.to_numpy(copy=True))
+        frame = pd.DataFrame(buffer, index=X.index, columns=X.columns, copy=False)
+    else:
+        buffer = None
+        frame = X.copy()
+    _PERMUTATION_STATE = {'predictor': predictor, 'frame': frame, 'buffer': buffer, 'y': y,
+                          'scorer': _get_scorer(scoring), 'baseline': baseline, 'tasks': tasks, 'settings': settings}
+
+def _permutation_task(i) -> np.ndarray:
+    """
+    Score decreases of the worker predictor for up to ``n_repeats`` shuffles of the ``i``-th feature group.
+    """
+    state = _PERMUTATION_STATE
+    settings = state['settings']
+    frame, buffer = state['frame'], state['buffer']
+    cols = state['tasks'][i]
+    rng = np.random.default_rng([settings['random_state'], i])
+
+    if buffer is not None:
+        saved = buffer[:, cols].copy(order='F')
+    else:
+        names = frame.columns[cols]
+        saved = [frame[name].to_numpy() if isinstance(frame[name].dtype, np.dtype) else frame[name].array for name in names]
+        scratch = [np.empty_like(arr) if isinstance(arr, np.ndarray) else None for arr in saved]
+
+    drops = []
+    try:
+        for r in range(settings['n_repeats']):
+            perm = rng.permutation(frame.shape[0])
+            if buffer is not None:
+                for k, j in enumerate(cols):
+                    np.take(saved[:, k], perm, out=buffer[:, j])
+            else:
+                for name, arr, out in zip(names, saved, scratch):
+                    frame[name] = np.take(arr, perm, out=out) if out is not None else arr.take(perm)
+            drops.append(state['baseline'] - state['scorer'](state['predictor'], frame, state['y']))
+
+            n = r + 1
+            if settings['early_stop'] and n >= settings['min_repeats']:
+                values = np.asarray(drops)
+                std = values.std(ddof=1)
+                half = settings['t_crit'][n - 1] * std / np.sqrt(n)
+                if std == 0 or abs(values.mean()) > half:
+                    break
+    finally:
+        if buffer is not None:
+            buffer[:, cols] = saved
+        else:
+            for name, arr in zip(names, saved):
+                frame[name] = arr
+    return np.asarray(drops, dtype=np.float64)
@@ -0,0 +1,498 @@
+"""
+@author: Hao Qi
+
+Data drift monitoring: a compact reference profile of the training data (per-column quantile bins, quantiles,
+category frequencies and outlier bounds/rates) against which new batches are scored with PSI, Jensen-Shannon and
+binned Kolmogorov-Smirnov statistics, computed for all columns at once on (columns x bins) count matrices.
+Batches can be consumed in chunks (``DriftMonitor.update``), so only the counts are kept in memory.
+
+Example:
+---
+```python
+import my_funcs as my
+profile = my.DriftProfile.fit(X_train)          # once, at training time
+profile.save('profile.json')
+...
+profile = my.DriftProfile.load('profile.json')
+my.drift_report(profile, 'batch.parquet')       # ranked drift table, read in chunks
+```
+"""
+
+###############################################################################################################################
+
+import json
+import os
+import warnings
+import numpy as np
+import pandas as pd
+from my_core import _iter_chunks, _outlier_stats
+from my_trace import span, traced, traced_iter
+import my_arrow
+
+###############################################################################################################################
+
+PROFILE_QUANTILES = (0.01, 0.05, 0.25, 0.50, 0.75, 0.95, 0.99)
+
+class DriftProfile:
+    """
+    Reference profile of a training DataFrame, built with ``DriftProfile.fit``.
+
+    Attributes:
+    ---
+    - `num_columns` / `cat_columns (list)`: Profiled numeric and non-numeric columns (datetime-like columns are
+      not profiled).
+    - `cuts (np.ndarray)`: Interior bin edges (numeric columns x ``n_bins - 1``), taken at the reference quantiles.
+    - `quantiles (pd.DataFrame)`: Reference quantiles ``PROFILE_QUANTILES`` of the numeric columns.
+    - `lower_bound` / `upper_bound (np.ndarray)`: Outlier bounds from ``manage_outliers_frame`` rules.
+    - `categories (list)`: Most frequent reference categories of every non-numeric column.
+    - `reference (DriftMonitor)`: Counts of the training data on the bins/categories above.
+
+    Notes:
+    ---
+    - Numeric bins are right-closed, with one extra bin for missing values; non-numeric columns get one bin per kept
+      category plus 'other' (unseen or rare categories) and 'missing'.
+    - Size is O(columns x bins), independent of the number of training rows.
+    """
+    def __init__(self, num_columns, cuts, quantiles, lower_bound, upper_bound, cat_columns, categories):
+        self.num_columns = list(num_columns)
+        self.cuts = np.asarray(cuts, dtype=np.float64).reshape(len(self.num_columns), -1) if self.num_columns else np.empty((0, 0))
+        self.quantiles = pd.DataFrame(np.asarray(quantiles, dtype=np.float64).reshape(len(self.num_columns), len(PROFILE_QUANTILES)),
+                                      index=pd.Index(self.num_columns), columns=[f'q{q:g}' for q in PROFILE_QUANTILES])
+        self.lower_bound = np.asarray(lower_bound, dtype=np.float64)
+        self.upper_bound = np.asarray(upper_bound, dtype=np.float64)
+        self.cat_columns = list(cat_columns)
+        self.categories = [list(cats) for cats in categories]
+        self.reference = None
+
+    @property
+    def n_bins(self) -> int:
+        return self.cuts.shape[1] + 1
+
+    @classmethod
+    @traced('DriftProfile.fit')
+    def fit(cls,
+            df,
+            n_bins=10,
+            max_categories=50,
+            block_size=64,
+            **outlier_kwargs):
+        """
+        Profile the training data ``df``.
+
+        Parameters:
+        ---
+        - `df (pd.DataFrame)`: Training data (pyarrow Tables and Polars DataFrames are accepted too).
+        - `n_bins (int, optional)`: Number of quantile bins per numeric column (default is 10).
+        - `max_categories (int, optional)`: Most frequent categories kept per non-numeric column; the rest is pooled
+          into 'other' (default is 50).
+        - `block_size (int, optional)`: Number of numeric columns processed at once (default is 64).
+        - `**outlier_kwargs`: Outlier rule of ``manage_outliers_frame`` (``non_normal_crit``, ``n_std``,
+          ``multiplier``, ``MAD_threshold``, ``normal_cols``, ``alpha``, ``normality_test``, ...).
+
+        Returns:
+        ---
+        DriftProfile: The fitted profile (reference counts in ``profile.reference``).
+        """
+        df = my_arrow.as_pandas(df)
+        num_columns = [col for col in df.columns if pd.api.types.is_numeric_dtype(df[col])]
+        cat_columns = [col for col in df.columns if col not in set(num_columns)
+                       and not pd.api.types.is_datetime64_any_dtype(df[col])
+                       and not pd.api.types.is_timedelta64_dtype(df[col])]
+
+        inner = np.linspace(0, 1, n_bins + 1)[1:-1]
+        probs = np.concatenate([inner, PROFILE_QUANTILES])
+        cuts = np.empty((len(num_columns), n_bins - 1))
+        quantiles = np.empty((len(num_columns), len(PROFILE_QUANTILES)))
+        lower_bound = np.empty(len(num_columns))
+        upper_bound = np.empty(len(num_columns))
+        for start in range(0, len(num_columns), block_size):
+            cols = num_columns[start:start + block_size]
+            block = df[cols].to_numpy(dtype=np.float64, na_value=np.nan)
+            with warnings.catch_warnings(), span('DriftProfile.fit.quantiles', rows=block.shape[0], cols=len(cols)):
+                warnings.simplefilter('ignore', RuntimeWarning)
+                values = np.nanquantile(block, probs, axis=0).T
+            cuts[start:start + len(cols)] = values[:, :n_bins - 1]
+            quantiles[start:start + len(cols)] = values[:, n_bins - 1:]
+            out = _outlier_stats(block, cols, **outlier_kwargs)
+            lower_bound[start:start + len(cols)] = out['lower_bound']
+            upper_bound[start:start + len(cols)] = out['upper_bound']
+
+        categories = []
+        with span('DriftProfile.fit.categories', rows=len(df), cols=len(cat_columns)):
+            for col in cat_columns:
+                counts = df[col].value_counts(dropna=True, sort=True)
+                categories.append(counts.index[:max_categories].tolist())
+
+        profile = cls(num_columns, cuts, quantiles, lower_bound, upper_bound, cat_columns, categories)
+        profile.reference = DriftMonitor(profile).update(df, block_size=block_size)
+        return profile
+
+    def monitor(self):
+        """
+        New, empty ``DriftMonitor`` scoring batches against this profile.
+        """
+        return DriftMonitor(self)
+
+    def to_frame(self) -> pd.DataFrame:
+        """
+        Readable per-column summary: reference count, missing and outlier rates, mean/std and quantiles.
+        """
+        ref = self.reference
+        n = ref.num_counts.sum(axis=1)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            num = pd.DataFrame({'kind': 'numeric',
+                                'count': n - ref.num_counts[:, -1],
+                                'missing (%)': np.round(ref.num_counts[:, -1] / n * 100, 2),
+                                'outlier (%)': np.round(ref.outliers / (n - ref.num_counts[:, -1]) * 100, 2),
+                                'lower_bound': self.lower_bound,
+                                'upper_bound': self.upper_bound,
+                                'mean': ref.mean,
+                                'std': ref.std},
+                               index=pd.Index(self.num_columns))
+        num = pd.concat([num, self.quantiles], axis=1)
+        cat_n = np.array([counts.sum() for counts in ref.cat_counts], dtype=np.float64)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            cat = pd.DataFrame({'kind': 'categorical',
+                                'count': cat_n - np.array([counts[-1] for counts in ref.cat_counts]),
+                                'missing (%)': np.round(np.array([counts[-1] for counts in ref.cat_counts]) / cat_n * 100, 2),
+                                'n_categories': [len(cats) for cats in self.categories]},
+                               index=pd.Index(self.cat_columns))
+        return pd.concat([num, cat]) if len(cat) else num
+
+    def to_dict(self) -> dict:
+        """
+        JSON-serialisable state (bin edges, bounds, categories and reference counts).
+        """
+        ref = self.reference
+        return {'num_columns': self.num_columns,
+                'cuts': self.cuts.tolist(),
+                'quantiles': self.quantiles.to_numpy().tolist(),
+                'lower_bound': self.lower_bound.tolist(),
+                'upper_bound': self.upper_bound.tolist(),
+                'cat_columns': self.cat_columns,
+                'categories': self.categories,
+                'reference': ref.to_dict()}
+
+    @classmethod
+    def from_dict(cls, state):
+        """
+        Rebuild a profile from ``to_dict`` output.
+        """
+        profile = cls(state['num_columns'], state['cuts'], state['quantiles'], state['lower_bound'],
+                      state['upper_bound'], state['cat_columns'], state['categories'])
+        profile.reference = DriftMonitor.from_dict(profile, state['reference'])
+        return profile
+
+    def save(self, path):
+        """
+        Write the profile to a JSON file (categories must be JSON values: strings, numbers or booleans).
+        """
+        with open(os.fspath(path), 'w', encoding='utf-8') as file:
+            json.dump(self.to_dict(), file, default=str)
+
+    @classmethod
+    def load(cls, path):
+        """
+        Restore a profile saved with ``save``.
+        """
+        with open(os.fspath(path), encoding='utf-8') as file:
+            return cls.from_dict(json.load(file))
+
+###############################################################################################################################
+
+class DriftMonitor:
+    """
+    Mergeable accumulator of the bin/category counts of a batch on the bins of a ``DriftProfile``.
+
+    Parameters:
+    ---
+    - `profile (DriftProfile)`: Reference profile.
+
+    Notes:
+    ---
+    - ``update`` consumes one chunk of the batch (columns missing from the chunk are left untouched, columns not
+      in the profile are ignored); ``merge`` combines monitors built on other chunks or in other processes.
+    - ``report`` scores the accumulated batch against the profile's reference counts.
+    """
+    def __init__(self, profile):
+        self.profile = profile
+        k = len(profile.num_columns)
+        self.num_counts = np.zeros((k, profile.n_bins + 1), dtype=np.int64)
+        self.outliers = np.zeros(k, dtype=np.int64)
+        self.sum = np.zeros(k)
+        self.sum_sq = np.zeros(k)
+        self.cat_counts = [np.zeros(len(cats) + 2, dtype=np.int64) for cats in profile.categories]
+        self._num_pos = {col: i for i, col in enumerate(profile.num_columns)}
+        self._cat_pos = {col: i for i, col in enumerate(profile.cat_columns)}
+
+    @property
+    def n_rows(self) -> np.ndarray:
+        return self.num_counts.sum(axis=1)
+
+    @property
+    def mean(self) -> np.ndarray:
+        valid = self.n_rows - self.num_counts[:, -1]
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return np.where(valid > 0, self.sum / valid, np.nan)
+
+    @property
+    def std(self) -> np.ndarray:
+        valid = self.n_rows - self.num_counts[:, -1]
+        with np.errstate(invalid='ignore', divide='ignore'):
+            var = (self.sum_sq - valid * self.mean ** 2) / (valid - 1)
+        return np.where(valid > 1, np.sqrt(np.maximum(var, 0)), np.nan)
+
+    def update(self, chunk, block_size=64):
+        """
+        Consume one chunk (pandas, pyarrow or Polars) and return self.
+        """
+        chunk = my_arrow.as_pandas(chunk)
+        profile = self.profile
+        num = [col for col in chunk.columns if col in self._num_pos]
+        for start in range(0, len(num), block_size):
+            cols = num[start:start + block_size]
+            pos = np.array([self._num_pos[col] for col in cols], dtype=np.int64)
+            block = chunk[cols].to_numpy(dtype=np.float64, na_value=np.nan)
+            with span('DriftMonitor.update.bin', rows=block.shape[0], cols=len(cols)):
+                self.num_counts[pos] += _bin_counts(block, profile.cuts[pos])
+                self.outliers[pos] += ((block < profile.lower_bound[pos]) | (block > profile.upper_bound[pos])).sum(axis=0)
+                filled = np.where(np.isnan(block), 0.0, block)
+                self.sum[pos] += filled.sum(axis=0)
+                self.sum_sq[pos] += np.einsum('ij,ij->j', filled, filled)
+
+        cat = [col for col in chunk.columns if col in self._cat_pos]
+        with span('DriftMonitor.update.categories', rows=len(chunk), cols=len(cat)):
+            for col in cat:
+                p = self._cat_pos[col]
+                self.cat_counts[p] += _category_counts(chunk[col], profile.categories[p])
+        return self
+
+    def merge(self, other):
+        """
+        Merge another monitor on the same profile into this one (in place) and return self.
+        """
+        self.num_counts += other.num_counts
+        self.outliers += other.outliers
+        self.sum += other.sum
+        self.sum_sq += other.sum_sq
+        for counts, other_counts in zip(self.cat_counts, other.cat_counts):
+            counts += other_counts
+        return self
+
+    def report(self, thresholds=(0.1, 0.25), decimals=4) -> pd.DataFrame:
+        """
+        Drift table of the accumulated batch against the reference, one row per profiled column, ranked by PSI.
+
+        Parameters:
+        ---
+        - `thresholds (tuple, optional)`: PSI limits of 'moderate' and 'high' drift (default is (0.1, 0.25)).
+        - `decimals (int, optional)`: Number of decimal places of the statistics (default is 4).
+
+        Returns:
+        ---
+        pd.DataFrame: 'kind', 'n_ref', 'n_batch', missing and outlier percentages, 'psi', 'js' (Jensen-Shannon
+        divergence, base 2, in [0, 1]), 'ks' and 'ks_p_value' (numeric columns), reference/batch means,
+        'mean_shift_std' (mean shift in reference standard deviations) and 'drift' ('none', 'moderate', 'high'
+        or 'not in batch').
+
+        Notes:
+        ---
+        - PSI and JS use every bin, missing values and 'other' categories included; proportions are floored at 1e-4
+          for PSI.
+        - KS is the largest gap between the reference and batch CDFs at the bin edges, so it is a lower bound of the
+          exact two-sample statistic; its p-value uses the asymptotic Kolmogorov distribution.
+        """
+        ref = self.profile.reference
+        ref_counts = _stack_counts(ref.num_counts, ref.cat_counts)
+        new_counts = _stack_counts(self.num_counts, self.cat_counts)
+        n_ref = ref_counts.sum(axis=1)
+        n_new = new_counts.sum(axis=1)
+        k = self.num_counts.shape[0]
+
+        with span('DriftMonitor.report', cols=len(n_ref)):
+            psi = _psi(ref_counts, new_counts)
+            js = _jensen_shannon(ref_counts, new_counts)
+            ks = np.full(len(n_ref), np.nan)
+            ks_p = np.full(len(n_ref), np.nan)
+            ks[:k], ks_p[:k] = _binned_ks(ref.num_counts[:, :-1], self.num_counts[:, :-1])
+
+        missing = np.array([counts[-1] for counts in (*ref.num_counts, *ref.cat_counts)]), \
+                  np.array([counts[-1] for counts in (*self.num_counts, *self.cat_counts)])
+        outlier = np.full((2, len(n_ref)), np.nan)
+        mean = np.full((2, len(n_ref)), np.nan)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            outlier[0, :k] = ref.outliers / (n_ref[:k] - missing[0][:k]) * 100
+            outlier[1, :k] = self.outliers / (n_new[:k] - missing[1][:k]) * 100
+            mean[0, :k], mean[1, :k] = ref.mean, self.mean
+            shift = (mean[1] - mean[0]) / np.concatenate([ref.std, np.full(len(n_ref) - k, np.nan)])
+            report = pd.DataFrame({
+                'kind': ['numeric'] * k + ['categorical'] * (len(n_ref) - k),
+                'n_ref': n_ref.astype(np.int64),
+                'n_batch': n_new.astype(np.int64),
+                'missing_ref (%)': np.round(missing[0] / n_ref * 100, 2),
+                'missing_batch (%)': np.round(missing[1] / n_new * 100, 2),
+                'outlier_ref (%)': np.round(outlier[0], 2),
+                'outlier_batch (%)': np.round(outlier[1], 2),
+                'psi': psi,
+                'js': js,
+                'ks': ks,
+                'ks_p_value': ks_p,
+                'mean_ref': mean[0],
+                'mean_batch': mean[1],
+                'mean_shift_std': shift,
+            }, index=pd.Index(self.profile.num_columns + self.profile.cat_columns))
+
+        stats = ['psi', 'js', 'ks', 'ks_p_value', 'mean_ref', 'mean_batch', 'mean_shift_std']
+        report[stats] = report[stats].round(decimals)
+        report['drift'] = np.select([n_new == 0, psi >= thresholds[1], psi >= thresholds[0]],
+                                    ['not in batch', 'high', 'moderate'], 'none')
+        return report.sort_values(['psi', 'js'], ascending=False, na_position='last', kind='stable')
+
+    def to_dict(self) -> dict:
+        return {'num_counts': self.num_counts.tolist(),
+                'outliers': self.outliers.tolist(),
+                'sum': self.sum.tolist(),
+                'sum_sq': self.sum_sq.tolist(),
+                'cat_counts': [counts.tolist() for counts in self.cat_counts]}
+
+    @classmethod
+    def from_dict(cls, profile, state):
+        monitor = cls(profile)
+        monitor.num_counts = np.asarray(state['num_counts'], dtype=np.int64).reshape(monitor.num_counts.shape)
+        monitor.outliers = np.asarray(state['outliers'], dtype=np.int64)
+        monitor.sum = np.asarray(state['sum'], dtype=np.float64)
+        monitor.sum_sq = np.asarray(state['sum_sq'], dtype=np.float64)
+        monitor.cat_counts = [np.asarray(counts, dtype=np.int64) for counts in state['cat_counts']]
+        return monitor
+
+###############################################################################################################################
+
+def _bin_counts(block, cuts) -> np.ndarray:
+    """
+    Counts (columns x ``n_cuts + 2``) of a float block (rows x columns) on per-column right-closed bins given by
+    ``cuts`` (columns x n_cuts); the last bin counts the NaNs.
+    """
+    n_cols = block.shape[1]
+    n_bins = cuts.shape[1] + 2
+    # Bin index = number of cuts strictly below the value: one comparison pass per cut over the whole block,
+    # into small integer codes laid out like ``block`` and counted column by column
+    codes = np.zeros_like(block, dtype=np.uint8 if n_bins <= 255 else np.intp)
+    above = np.empty_like(block, dtype=bool)
+    for j in range(cuts.shape[1]):
+        np.greater(block, cuts[:, j], out=above)
+        codes += above
+    codes[np.isnan(block)] = n_bins - 1
+    out = np.empty((n_cols, n_bins), dtype=np.int64)
+    for j in range(n_cols):
+        out[j] = np.bincount(codes[:, j], minlength=n_bins)
+    return out
+
+def _category_counts(series, categories) -> np.ndarray:
+    """
+    Counts of ``categories`` in ``series``, followed by the count of other values and of missing values.
+    """
+    missing = series.isna().to_numpy()
+    codes = pd.Index(categories).get_indexer(series)
+    counts = np.bincount(codes[codes >= 0], minlength=len(categories))
+    n_missing = int(missing.sum())
+    return np.concatenate([counts, [len(series) - counts.sum() - n_missing, n_missing]])
+
+def _stack_counts(num_counts, cat_counts) -> np.ndarray:
+    """
+    Numeric and categorical counts as one zero-padded (columns x bins) float matrix.
+    """
+    width = max([num_counts.shape[1]] + [len(counts) for counts in cat_counts])
+    out = np.zeros((num_counts.shape[0] + len(cat_counts), width))
+    out[:num_counts.shape[0], :num_counts.shape[1]] = num_counts
+    for i, counts in enumerate(cat_counts, start=num_counts.shape[0]):
+        out[i, :len(counts)] = counts
+    return out
+
+def _proportions(counts) -> np.ndarray:
+    total = counts.sum(axis=1, keepdims=True)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.where(total > 0, counts / total, np.nan)
+
+def _psi(ref_counts, new_counts, floor=1e-4) -> np.ndarray:
+    """
+    Population Stability Index of every row of two count matrices; bins empty on both sides contribute nothing.
+    """
+    p, q = _proportions(ref_counts), _proportions(new_counts)
+    used = (ref_counts > 0) | (new_counts > 0)
+    p, q = np.maximum(p, floor), np.maximum(q, floor)
+    return np.where(used, (q - p) * np.log(q / p), 0.0).sum(axis=1)
+
+def _jensen_shannon(ref_counts, new_counts) -> np.ndarray:
+    """
+    Jensen-Shannon divergence (base 2) of every row of two count matrices.
+    """
+    p, q = _proportions(ref_counts), _proportions(new_counts)
+    m = (p + q) / 2
+    with np.errstate(invalid='ignore', divide='ignore'):
+        kl_p = np.where(p > 0, p * np.log2(p / m), 0.0).sum(axis=1)
+        kl_q = np.where(q > 0, q * np.log2(q / m), 0.0).sum(axis=1)
+    return np.clip((kl_p + kl_q) / 2, 0, 1)
+
+def _binned_ks(ref_counts, new_counts) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Two-sample KS statistic at the bin edges and its asymptotic p-value, for every row of two count matrices
+    (missing values excluded).
+    """
+    from scipy import stats
+
+    n, m = ref_counts.sum(axis=1), new_counts.sum(axis=1)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        gap = np.cumsum(ref_counts, axis=1) / n[:, None] - np.cumsum(new_counts, axis=1) / m[:, None]
+        ks = np.abs(gap).max(axis=1) if gap.shape[1] else np.full(len(n), np.nan)
+        ks = np.where((n > 0) & (m > 0), ks, np.nan)
+        p_value = stats.kstwobign.sf(ks * np.sqrt(n * m / (n + m)))
+    return ks, p_value
+
+###############################################################################################################################
+
+@traced()
+def drift_report(profile,
+                 source,
+                 chunksize=100_000,
+                 thresholds=(0.1, 0.25),
+                 decimals=4,
+                 **read_kwargs
+                 ) -> pd.DataFrame:
+    """
+    Score a batch against a reference profile, reading it in chunks.
+
+    Parameters:
+    ---
+    - `profile (DriftProfile)`: Reference profile from ``DriftProfile.fit`` (or ``DriftProfile.load``).
+    - `source`: Batch as a DataFrame (pandas, pyarrow or Polars), a CSV/Parquet path or an iterable of chunks.
+    - `chunksize (int, optional)`: Rows per chunk when reading a file or slicing a DataFrame (default is 100_000).
+    - `thresholds (tuple, optional)`: PSI limits of 'moderate' and 'high' drift (default is (0.1, 0.25)).
+    - `decimals (int, optional)`: Number of decimal places of the statistics (default is 4).
+    - `**read_kwargs`: Extra arguments of ``pd.read_csv`` for CSV paths.
+
+    Returns:
+    ---
+    pd.DataFrame: Drift table ranked by PSI, see ``DriftMonitor.report``.
+
+    Example:
+    ---
+    ```python
+    profile = DriftProfile.fit(X_train)
+    drift_report(profile, X_new).query("drift != 'none'")
+    ```
+    """
+    if my_arrow.backend(source) in ('pyarrow', 'polars'):
+        source = my_arrow.as_pandas(source)
+    columns = None
+    if isinstance(source, (str, os.PathLike)):
+        # Read only the profiled columns that the file has
+        profiled = set(profile.num_columns) | set(profile.cat_columns)
+        if os.fspath(source).endswith(('.parquet', '.pq')):
+            import pyarrow.parquet as pq
+            columns = [col for col in pq.read_schema(os.fspath(source)).names if col in profiled]
+        else:
+            columns = lambda col: col in profiled
+    monitor = DriftMonitor(profile)
+    for chunk in traced_iter(_iter_chunks(source, chunksize, columns, **read_kwargs), 'drift_report.read'):
+        monitor.update(chunk)
+    return monitor.report(thresholds, decimals)
@@ -0,0 +1,142 @@
+"""
+@author: Hao Qi
+
+Geo layer of ``my_funcs``: point maps over web basemap tiles.
+"""
+
+###############################################################################################################################
+
+import matplotlib.pyplot as plt
+import numpy as np
+import seaborn as sns
+from typing import Literal
+import contextily
+from my_core import _bin_points_2d, _scott_bandwidth_bins, _gaussian_smooth_fft
+from my_tiles import get_provider
+from my_trace import span, traced
+
+###############################################################################################################################
+
+@traced(stage='render')
+def geopoints_plot(longitude_ser,
+                   latitude_ser,
+                   plot_type: Literal['scatter', 'hexbin', 'density']='scatter',
+                   color='red',
+                   map_tile_source: Literal['positron', 'voyager', 'OpenStreetMap']='positron',
+                   attribute_col=None,
+                   figsize=(14,14),
+                   cmap='viridis_r',
+                   hb_gridsize=50,
+                   marker_size=6,
+                   alpha=0.2,
+                   raster=False,
+                   grid_size=512,
+                   bandwidth=None,
+                   agg: Literal['sum', 'mean']='sum',
+                   tile_cache=None,
+                   **kwargs
+                   ):
+    """
+    Plot geospatial points (longitude and latitude coordinates) on a map.
+
+    Parameters
+    ---
+    - `longitude_ser` (pandas.Series): Series of longitude values.
+    - `latitude_ser` (pandas.Series): Series of latitude values.
+    - `plot_type` (str, optional): Type of plot to be displayed. Options: 'scatter', 'hexbin', 'density'. Default is 'scatter'.
+    - `map_tile_source` (str, optional): Source of map tiles to be used as the background. Options: 'positron', 'voyager', 'OpenStreetMap'. Default is 'positron'.
+    - `attribute_col` (pandas.Series, optional): Series of attribute values to be represented by point color or size. Default is None.
+    - `figsize` (tuple, optional): Figure size. Default is (14, 14).
+    - `cmap` (str, optional): Colormap name for density and hexbin plot. Default is 'viridis_r' (inverse gradient).
+    - `hb_gridsize` (int, optional): Grid size for hexbin plot. Default is 50.
+    - `marker_size` (int, optional): Marker size for scatter plot. Default is 6.
+    - `alpha` (float, optional): Opacity of the plotted points. Should be between 0 and 1. Default is 0.2.
+    - `raster` (bool, optional): If True, points are pre-aggregated on a ``grid_size`` x ``grid_size`` grid and drawn as a
+      single image (``imshow``), so render time and memory depend on the grid and not on the number of points:
+      'scatter' and 'hexbin' show the binned counts (or aggregated ``attribute_col``), 'density' shows an FFT-based
+      binned Gaussian KDE. Recommended for millions of points. Default is False.
+    - `grid_size` (int, optional): Number of bins per axis when ``raster=True``. Default is 512.
+    - `bandwidth` (float or tuple, optional): Gaussian kernel std in grid bins (x, y) for the raster 'density'.
+      Default is None (Scott's rule).
+    - `agg` (str, optional): How ``attribute_col`` is aggregated per bin when ``raster=True``: 'sum' or 'mean'. Default is 'sum'.
+    - `tile_cache` (my_tiles.TileCache, optional): On-disk tile cache used for the basemap instead of fetching tiles
+      from the network on every call (supports a strict offline mode). Default is None.
+    - `**kwargs`: Additional keyword arguments to be passed to the underlying plotting functions.
+    """
+    map_source = get_provider(map_tile_source)
+        
+    _, ax = plt.subplots(figsize=figsize)
+
+    if raster is True:
+        with span('geopoints_plot.bin', rows=len(longitude_ser), grid_size=grid_size, plot_type=plot_type):
+            weights = None if attribute_col is None else np.asarray(attribute_col, dtype=np.float64)
+            grid, extent = _bin_points_2d(longitude_ser, latitude_ser, weights=weights, grid_size=grid_size)
+            if weights is not None and agg == 'mean':
+                # Count only the points kept in the weighted grid (missing attribute values are dropped there)
+                counts, _ = _bin_points_2d(longitude_ser, latitude_ser, weights=(~np.isnan(weights)).astype(np.float64),
+                                           grid_size=grid_size, extent=extent)
+            if plot_type == 'density':
+                if bandwidth is None:
+                    bandwidth = _scott_bandwidth_bins(longitude_ser, latitude_ser, extent, grid_size)
+                grid = _gaussian_smooth_fft(grid, np.broadcast_to(bandwidth, (2,))[::-1])
+                if weights is not None and agg == 'mean':
+                    counts = _gaussian_smooth_fft(counts, np.broadcast_to(bandwidth, (2,))[::-1])
+            if weights is not None and agg == 'mean':
+                with np.errstate(invalid='ignore', divide='ignore'):
+                    grid = np.where(counts > 1e-12, grid / counts, 0.0)
+        # Empty bins (and the FFT's negligible tails for density) are left transparent over the basemap
+        floor = 1e-3 * grid.max() if plot_type == 'density' else 0.0
+        ax.imshow(np.ma.masked_less_equal(grid, floor),
+                  extent=extent,
+                  origin='lower',
+                  aspect='auto',
+                  interpolation='nearest',
+                  cmap=cmap,
+                  alpha=alpha,
+                  **kwargs)
+
+    elif plot_type == 'scatter':
+        sns.scatterplot(x=longitude_ser,
+                        y=latitude_ser,
+                        s=marker_size,
+                        color=color,
+                        alpha=alpha,
+                        ax=ax,
+                        **kwargs)
+    
+    elif plot_type == 'hexbin':
+        hb = ax.hexbin(x=longitude_ser,
+                       y=latitude_ser,
+                       gridsize=hb_gridsize,
+                       lw=0,  # hexbin grid marker
+                       alpha=alpha,
+                       cmap=cmap,
+                       **kwargs)
+    
+    elif plot_type == 'density':
+        sns.kdeplot(x=longitude_ser,
+                    y=latitude_ser,
+                    n_levels=50,
+                    fill=True,
+                    alpha=alpha,
+                    cmap=cmap,
+                    weights=attribute_col,  # Intensidad de color basada en la variable 'price'
+                    ax=ax,
+                    **kwargs)
+
+    with span('geopoints_plot.basemap', stage='io', cached=tile_cache is not None):
+        if tile_cache is not None:
+            tile_cache.add_basemap(ax=ax, provider=map_source, zoom='auto', crs='EPSG:4326')
+        else:
+            contextily.add_basemap(
+                ax=ax,
+                zoom='auto',
+                crs='EPSG:4326',
+                source=map_source
+            )
+    
+    title_text = 'Count distribution'
+    if attribute_col is not None:
+        title_text = f"Spatial density distribution by '{attribute_col.name}' attribute"
+    ax.set_title(title_text)
+    plt.show()
@@ -0,0 +1,549 @@
+"""
+@author: Hao Qi
+
+Plotting layer of ``my_funcs``: bar, KDE, class-balance, association and feature-importance plots.
+"""
+
+###############################################################################################################################
+
+import warnings
+import matplotlib.pyplot as plt
+import numpy as np
+import pandas as pd
+import seaborn as sns
+from typing import Literal
+from my_core import (_category_counts, _binned_kde_by_class, _binned_quantiles, _contingency_counts,
+                     _feature_names, _select_extreme, aggregate_feature_importances, permutation_importance)
+from my_trace import span, traced
+
+###############################################################################################################################
+
+@traced(stage='render')
+def barh_plot(series,
+              sort=True,
+              extra_title=None,
+              figsize=(7,6),
+              xlim_expansion=1.15,
+              palette='tab10',
+              counts=False,
+              top_k=None,
+              **kwargs
+              ) -> plt.Axes:
+    """
+    Returns:
+    ---
+    - Create a horizontal bar plot for a categorical series.
+
+    Parameters:
+    ---
+    - ``series (pandas.Series)``: The categorical data to be plotted, or precomputed counts if ``counts=True``.
+    - ``sort (bool, optional)``: Whether to sort the bars by count. Default is True.
+    - ``xlim_expansion (float, optional)``: Factor to expand the x-axis limit. Default is 1.15.
+    - ``counts (bool, optional)``: If True, ``series`` already holds the counts (index = categories), e.g. the
+      output of ``value_counts`` or of a SQL/Spark aggregation. Default is False.
+    - ``top_k (int, optional)``: Show only the ``top_k`` most frequent categories plus an 'Other (k)' bar. Default is None.
+    - ``**kwargs``: Additional keyword arguments to pass to matplotlib's ``barh`` function. The seaborn ``countplot``
+      arguments accepted by earlier versions are translated: ``order`` (categories to show, in that order; overrides
+      ``sort``), ``color``, ``width``, ``saturation`` and ``ax``. Other ``countplot``-only arguments (``hue``,
+      ``hue_order``, ``dodge``, ``stat``, ...) cannot be applied to pre-counted bars and are ignored with a warning.
+
+    Notes:
+    ---
+    - The function creates a horizontal bar plot for the specified categorical series.
+    - The bars can be sorted by count if 'sort' is True.
+    - The function also annotates the bars with count and proportion information.
+    - The x-axis limit is expanded by a factor of 'xlim_expansion'.
+    - Raw data is counted exactly once (categorical codes or ``pd.factorize`` + ``np.bincount``) and the bars are drawn
+      from the aggregated values.
+
+    Example:
+    ---
+    ```python
+    # Sample data
+    data = pd.Series(['A', 'B', 'A', 'C', 'B', 'A', 'C', 'C', 'B', 'A'])
+
+    # Create a horizontal bar plot
+    barh_plot(data, sort=True, xlim_expansion=1.1, palette='viridis')
+    ```
+    """
+    order, ax, saturation, kwargs = _translate_countplot_kwargs(kwargs)
+    if counts is True:
+        labels = series.index.to_numpy()
+        values = series.to_numpy(dtype=np.int64)
+        n_valid = n_total = values.sum()
+    else:
+        with span('barh_plot.counts', rows=series.size):
+            values, labels = _category_counts(series)
+        n_valid, n_total = values.sum(), series.size
+    n_unique = len(labels)
+
+    if order is not None:
+        lookup = dict(zip(labels.tolist(), values.tolist()))
+        labels = np.array(list(order), dtype=object)
+        values = np.array([lookup.get(label, 0) for label in labels.tolist()], dtype=np.int64)
+    elif sort is True:
+        order = np.argsort(-values, kind='stable')
+        values, labels = values[order], labels[order]
+
+    if top_k is not None and top_k < len(labels):
+        keep = np.zeros(len(labels), dtype=bool)
+        keep[np.argpartition(-values, top_k - 1)[:top_k]] = True
+        values = np.append(values[keep], values[~keep].sum())
+        labels = np.append(labels[keep].astype(object), f'Other ({(~keep).sum()})')
+
+    if ax is None:
+        plt.figure(figsize=figsize)
+        ax = plt.gca()
+    else:
+        plt.sca(ax)
+    positions = np.arange(len(labels))
+    kwargs.setdefault('height', 0.5)
+    if 'color' in kwargs and saturation is not None:
+        kwargs['color'] = sns.desaturate(kwargs['color'], saturation)
+    kwargs.setdefault('color', sns.color_palette(palette, len(labels), desat=saturation))
+    ax.barh(positions,
+            values,
+            **kwargs
+            )
+    ax.set_yticks(positions, labels=[str(label) for label in labels])
+    ax.invert_yaxis()
+    ax.set_xlabel('count')
+
+    props = values / max(n_valid, 1)
+    for i, (count, prop) in enumerate(zip(values, props)):
+        plt.annotate(f' ({count}, {prop:.0%})', (count, i), fontsize=8)
+
+    suptitle_text = f"'{series.name}'"
+    if extra_title:
+        suptitle_text += f" | {extra_title}"
+    
+    plt.ylabel('')
+    plt.suptitle(suptitle_text, fontsize='xx-large')
+    plt.title(f"n = {n_valid}/{n_total} | n_unique = {n_unique} | sort = {sort}")
+    # Set xlimit
+    _, xlim_r = plt.xlim()
+    plt.xlim(right=xlim_r*xlim_expansion)
+    return plt.gca()
+
+_COUNTPLOT_ONLY_KWARGS = ('hue', 'hue_order', 'dodge', 'stat', 'fill', 'gap', 'native_scale', 'formatter', 'legend',
+                          'log_scale', 'orient', 'hue_norm', 'data', 'x', 'y')
+
+def _translate_countplot_kwargs(kwargs) -> tuple:
+    """
+    Split the seaborn ``countplot`` arguments that ``barh_plot`` used to forward into (order, ax, saturation, barh kwargs).
+    """
+    kwargs = dict(kwargs)
+    order = kwargs.pop('order', None)
+    ax = kwargs.pop('ax', None)
+    if 'width' in kwargs:
+        kwargs['height'] = kwargs.pop('width')
+    saturation = kwargs.pop('saturation', None)
+    ignored = [key for key in _COUNTPLOT_ONLY_KWARGS if key in kwargs]
+    if ignored:
+        warnings.warn(f"barh_plot draws pre-counted bars with matplotlib; seaborn countplot arguments {ignored} are ignored.",
+                      stacklevel=4)
+        for key in ignored:
+            kwargs.pop(key)
+    return order, ax, saturation, kwargs
+
+###############################################################################################################################
+
+@traced(stage='render')
+def kdeplot_by_class(
+    df: pd.DataFrame,
+    x_num: str,
+    y_cat: str,
+    figsize=(8,6),
+    binned=None,
+    exact_threshold=100_000,
+    gridsize=512
+):
+    """
+    Plot kernel density estimation (KDE) plot grouped by a categorical variable.
+
+    Parameters:
+    ---
+    - df (pd.DataFrame): The pandas DataFrame containing the data.
+    - x_num (str): The name of the numerical column to be plotted on the x-axis.
+    - y_cat (str): The name of the categorical column to be used for grouping.
+    - figsize (tuple, optional): The size of the figure (width, height). Defaults to (8, 6).
+    - binned (bool, optional): Use the binned density engine (True) or seaborn's exact KDE (False).
+      Defaults to None: binned when the data has more than ``exact_threshold`` rows.
+    - exact_threshold (int, optional): Row count above which the binned engine is used by default. Defaults to 100_000.
+    - gridsize (int, optional): Number of bins of the shared grid of the binned engine. Defaults to 512.
+
+    Returns:
+    ---
+    - fig (plt.Figure): The resulting matplotlib Figure object.
+
+    Notes:
+    ---
+    - The binned engine bins ``x_num`` once onto a grid shared by all classes (a single ``np.bincount`` on
+      (class, bin) pairs) and smooths every class with an FFT Gaussian kernel (Scott's bandwidth, densities scaled
+      by class proportion like seaborn's ``common_norm``). The class medians come from the same histogram,
+      so render time no longer depends on the number of rows.
+    """
+    fig, ax = plt.subplots(figsize=figsize)
+
+    if binned is None:
+        binned = len(df) > exact_threshold
+
+    if binned is True:
+        with span('kdeplot_by_class.binned_kde', rows=len(df), gridsize=gridsize):
+            grid, densities, classes, hist, edges = _binned_kde_by_class(df[x_num], df[y_cat], gridsize=gridsize)
+        colors = sns.color_palette('tab10', len(classes))
+        for density, name, color in zip(densities, classes, colors):
+            ax.fill_between(grid, density, color=color, alpha=0.25, linewidth=0)
+            ax.plot(grid, density, color=color, label=name)
+        ax.set_ylim(bottom=0)
+        ax.legend(title=y_cat)
+        cats_indexes = classes
+        cats_medians = _binned_quantiles(hist, edges, 0.5)
+    else:
+        sns.kdeplot(
+            data=df,
+            x=x_num,
+            hue=y_cat,
+            fill=True,
+            palette='tab10',
+            ax=ax
+        )
+
+        temp = df.groupby(y_cat, observed=False)[x_num].median()
+        cats_indexes = temp.index
+        cats_medians = temp.values
+
+    y_axis = plt.ylim()[1] / 2
+    position_decrease = 1
+    for index, median in zip(cats_indexes, cats_medians):
+        ax.axvline(median, ls='--', alpha=0.2, color='blue')
+        plt.annotate(
+            text=f"{index}: {median}",
+            xy=(median, y_axis / position_decrease),
+            fontsize=6,
+            color='blue',
+        )
+        
+        position_decrease += 0.8
+
+    ax.set_ylabel('')
+    ax.set_xlabel('')
+    fig.suptitle(x_num, fontweight='bold')
+
+    return fig
+
+###############################################################################################################################
+
+@traced(stage='render')
+def class_balance_barhplot(x,
+                           y,
+                           text_size=9,
+                           figsize=(8,6),
+                           top_n=None,
+                           other_by: Literal['frequency', 'deviation']='frequency'
+                           ):
+    """
+    Plot class balance bar horizontal plot.
+
+    Parameters:
+    -----------
+    x : pandas.Series
+        Input feature.
+    y : pandas.Series
+        Target variable.
+    text_size : int, optional
+        Font size for annotation text (default is 9).
+    figsize : tuple, optional
+        Figure size (width, height) in inches (default is (8, 6)).
+    top_n : int, optional
+        Show only ``top_n`` categories of ``x`` and collapse the rest into a single 'Other (k)' bar
+        (default is None, show every category).
+    other_by : str, optional
+        How the ``top_n`` categories are chosen: 'frequency' (most frequent) or 'deviation' (class distribution
+        farthest from the overall one, total variation distance) (default is 'frequency').
+
+    Returns:
+    --------
+    fig : matplotlib.figure.Figure
+        Matplotlib figure object.
+
+    Notes:
+    ------
+    - A single integer-coded contingency table (``np.bincount``) is built; percentages are derived from the counts.
+    - Plot cost scales with the number of bars displayed, not with the cardinality of ``x``.
+    """
+    fig, ax = plt.subplots(figsize=figsize)
+
+    with span('class_balance_barhplot.counts', rows=len(x)):
+        counts, x_labels, y_labels = _contingency_counts(x, y)
+    # Same order as pd.crosstab(...).sort_index(ascending=False)
+    counts, x_labels = counts[::-1], x_labels[::-1]
+
+    if top_n is not None and top_n < len(x_labels):
+        totals = counts.sum(axis=1)
+        if other_by == 'frequency':
+            score = totals
+        elif other_by == 'deviation':
+            overall = counts.sum(axis=0) / totals.sum()
+            score = 0.5 * np.abs(counts / totals[:, None] - overall).sum(axis=1)
+        else:
+            raise ValueError("other_by must be one of the list: ['frequency', 'deviation']!")
+        keep = np.zeros(len(x_labels), dtype=bool)
+        keep[np.argpartition(-score, top_n - 1)[:top_n]] = True
+        other = counts[~keep].sum(axis=0, keepdims=True)
+        counts = np.vstack([other, counts[keep]])
+        x_labels = np.concatenate([[f'Other ({(~keep).sum()})'], x_labels[keep]])
+
+    pct = counts / counts.sum(axis=1, keepdims=True)
+    positions = np.arange(len(x_labels))
+
+    # Binary or multiclass classification:
+    n_y_classes = len(y_labels)
+    colors = ['red', 'green'] if n_y_classes == 2 else [f'C{k % 10}' for k in range(n_y_classes)]
+    left = np.zeros(len(x_labels))
+    for k in range(n_y_classes):
+        ax.barh(positions, pct[:, k], left=left, height=0.5, color=colors[k], alpha=0.7, label=y_labels[k])
+        left += pct[:, k]
+    ax.set_yticks(positions, labels=[str(label) for label in x_labels])
+    ax.set_ylabel(x.name)
+
+    if n_y_classes > 2:
+        pct_text = [' / '.join(row) for row in np.round(pct, 2).astype(str)]
+        count_text = [' / '.join(row) for row in counts.astype(str)]
+        for i, (p_text, n_text) in enumerate(zip(pct_text, count_text)):
+            ax.annotate(
+                text=f'p: {p_text}\nn: {n_text}',
+                xy=(0.1, i),
+                va='center',
+                alpha=0.8,
+                color='blue'
+            )
+
+    elif n_y_classes == 2:
+        for i in positions:
+            ax.annotate(text=f"{pct[i, 0]:.2f} | n={counts[i, 0]}",
+                        xy=(0 + 0.01, i),
+                        fontsize=text_size,
+                        alpha=0.8,
+                        color='blue'
+                        )
+            ax.annotate(text=f"{pct[i, 1]:.2f} | n={counts[i, 1]}",
+                        xy=(0.92 - 0.1, i),
+                        fontsize=text_size,
+                        alpha=0.8,
+                        color='blue'
+                        )
+            
+    ax.legend(bbox_to_anchor=(1,1))
+    ax.set_title(f"Class distribution of '{y.name}' for categories in '{x.name}'")
+    fig.suptitle(x.name, fontsize=15, fontweight='bold')
+    
+    return fig
+
+###############################################################################################################################
+
+@traced(stage='render')
+def association_barplot(df_widefmt: pd.DataFrame,
+                        y: pd.Series=None,
+                        abs_value=False,
+                        extra_title=None,
+                        xlim_expansion=1.15,
+                        text_size=8,
+                        text_right_size=0.0003,
+                        palette='coolwarm',
+                        figsize=(6,5),
+                        title_size=14,
+                        no_decimals=False,
+                        ascending=False,
+                        sort=True,
+                        **kwargs
+                        ) -> plt.Axes:
+    """
+    - Generate a barplot to visualize the association of predictors with a target variable.
+    - Equivalent for Pearson corr df: 
+    - `df_pearson = pd.DataFrame(X.select_dtypes(np.number).apply(lambda x: np.corrcoef(x, y)[0,1])).T`
+    - All predictors and metrics at once: `target_association(X, y).loc[['Pearson']]`
+
+    Parameters
+    ---
+    - `df_widefmt (pd.DataFrame)`: Wide-format DataFrame containing predictor variables.
+    - `y (pd.Series)`: Target variable.
+    - `palette (str or list of str, optional)`: Color palette for the barplot. Default is 'Reds'.
+    - `extra_title (str, optional)`: Additional title text to be appended to the plot title. Default is None.
+    - `figsize (tuple, optional)`: Figure size in inches. Default is (7, 6).
+    - `xlim_expansion (float, optional)`: Expansion factor for the x-axis limit. Default is 1.15.
+    - `text_size (int, optional)`: Font size for annotation text. Default is 8.
+    - `text_right_size (float, optional)`: Adjustment for the horizontal position of annotation text. Default is 0.001.
+    - `**kwargs`: Additional keyword arguments to be passed to seaborn.barplot.
+
+    Notes
+    ---
+    - The function sorts the predictor variables based on their association with the target variable in descending order.
+    - The barplot is annotated with the corresponding association metric values.
+    - The title of the plot includes the number of predictors and the name of the target variable.
+    - If extra_title is provided, it is appended to the plot title.
+    - The x-axis limit is adjusted based on xlim_expansion.
+    - The resulting plot is displayed using matplotlib.pyplot.show().
+    """
+    metric_col = df_widefmt.T.columns[0]
+    
+    if sort is True:
+        df_longfmt = df_widefmt.T.sort_values(metric_col, ascending=ascending)
+    else:
+        df_longfmt = df_widefmt.T
+    
+    hue = None
+    if abs_value is True:
+        df_longfmt['Sign'] = df_longfmt[metric_col].apply(lambda row: 'Negative' if row < 0 else 'Positive')
+        df_longfmt[metric_col] = abs(df_longfmt[metric_col])
+        df_longfmt.sort_values(metric_col, ascending=False, inplace=True)
+        hue = df_longfmt['Sign']
+        
+    plt.figure(figsize=figsize)
+    
+    sns.barplot(x=df_longfmt[metric_col], y=df_longfmt.index,
+                hue=hue, hue_order=['Negative', 'Positive'],
+                palette=palette, **kwargs)
+    
+    if no_decimals is True:
+        for i, col in enumerate(df_longfmt.index):
+            plt.annotate(text=f'{df_longfmt[metric_col][col]}',
+                    xy=(df_longfmt[metric_col][col] + text_right_size, i),
+                    fontsize=text_size)
+    else:
+        for i, col in enumerate(df_longfmt.index):
+            plt.annotate(text=f'{df_longfmt[metric_col][col]:.3f}',
+                        xy=(df_longfmt[metric_col][col] + text_right_size, i),
+                        fontsize=text_size)
+    
+    if y is not None:
+        title_text = f"{len(df_longfmt.index)} Predictors association wrt '{y.name}'"
+    else:
+        title_text = f"{len(df_longfmt.index)} Predictors"
+        
+    if extra_title:
+        title_text += f" | {extra_title}"
+    
+    plt.ylabel('Predictors')
+    plt.title(title_text, fontsize=title_size)
+    _, xlim_r = plt.xlim()
+    plt.xlim(right=xlim_r*xlim_expansion)
+    plt.tight_layout()
+    if abs_value is True:
+        plt.legend(loc='lower right', fontsize=9)
+    plt.show()
+    return plt.gca()
+
+###############################################################################################################################
+
+@traced(stage='render')
+def feature_importance_plot(tree_predictor,
+                            n_rows:int=None,
+                            return_df=False,
+                            bottom=False,
+                            figsize=(8,6),
+                            palette='tab10',
+                            method: Literal['impurity', 'permutation']='impurity',
+                            X: pd.DataFrame=None,
+                            y=None,
+                            scoring=None,
+                            n_repeats=5,
+                            groups: dict=None,
+                            n_jobs=None,
+                            random_state=0,
+                            cache_path: str=None
+                            ) -> plt.Axes | pd.DataFrame:
+    """
+    Returns:
+    --
+    - Plot feature importance based on a tree-based predictor (impurity) or any fitted predictor (permutation).
+    - With a list of fitted predictors (e.g. the fold models of a CV ensemble), plot the mean importance across models.
+
+    Parameters:
+    --
+    - ``tree_predictor (object)``: A tree-based predictor (e.g., DecisionTreeClassifier, RandomForestRegressor).
+    With ``method='permutation'`` any fitted predictor/``Pipeline`` with ``predict``/``score`` is accepted.
+    A list of tree-based predictors is aggregated with ``aggregate_feature_importances`` (impurity only); None reads ``cache_path``.
+    - ``bottom (bool, optional)``: If True, plot the bottom features; if False, plot the top features. Default is False.
+    - ``n_rows (int, optional)``: Number of features to include in the plot. If None, all features are included. Default is None.
+    - ``figsize (tuple, optional)``: Figure size. Default is (8, 6).
+    - ``palette (str or list, optional)``: Color palette for the barplot. Default is 'viridis'.
+    - ``return_df (bool, optional)``: Returns the df with feature importance measure (%) and feature names (index). Default is False.
+    A subset df of the top or bottom features is possible.
+    - ``method (str, optional)``: 'impurity' uses ``feature_importances_`` (%); 'permutation' uses ``permutation_importance``
+    (mean decrease of the score when a feature is shuffled). Default is 'impurity'.
+    - ``X, y (optional)``: Evaluation data, required when ``method='permutation'`` (ideally a held-out set).
+    - ``scoring, n_repeats, groups, n_jobs, random_state (optional)``: Passed to ``permutation_importance``.
+    - ``cache_path (str, optional)``: Passed to ``aggregate_feature_importances`` when ``tree_predictor`` is a list or None.
+
+    """
+    # Bottom or top features
+    if bottom is False:
+        sort_type = 'Top'
+    else:
+        sort_type = 'Bottom'
+    
+    ensemble = tree_predictor is None or isinstance(tree_predictor, (list, tuple))
+    if ensemble:
+        if method != 'impurity':
+            raise ValueError("A list of predictors is only supported with method='impurity'!")
+        df_agg = aggregate_feature_importances(tree_predictor, cache_path=cache_path)
+        df_feature = df_agg[['feature_importance']]
+    elif method == 'permutation':
+        if X is None or y is None:
+            raise ValueError("'X' and 'y' are required when method='permutation'!")
+        df_perm = permutation_importance(tree_predictor, X, y, scoring=scoring, n_repeats=n_repeats, groups=groups,
+                                         n_jobs=n_jobs, random_state=random_state)
+        df_feature = df_perm[['feature_importance']]
+    elif method == 'impurity':
+        df_feature = pd.DataFrame({'feature_importance': tree_predictor.feature_importances_ * 100},
+                                  index=_feature_names(tree_predictor))
+    else:
+        raise ValueError(f"Invalid method '{method}'. Use 'impurity' or 'permutation'.")
+    
+    # number of rows/features
+    if n_rows:
+        n = min(n_rows, df_feature.shape[0])
+    else: 
+        n = df_feature.shape[0]
+        
+    sub_feature = df_feature.iloc[_select_extreme(df_feature['feature_importance'].to_numpy(), n, bottom)]
+    
+    if return_df:
+        return df_agg.loc[sub_feature.index] if ensemble else sub_feature
+    
+    plt.figure(figsize=figsize)
+    sns.barplot(y=sub_feature.index, x=sub_feature['feature_importance'], palette=palette, hue=sub_feature.index, legend=False)
+
+    if ensemble or method == 'permutation':
+        df_std = df_agg if ensemble else df_perm
+        plt.errorbar(x=sub_feature['feature_importance'], y=np.arange(n),
+                     xerr=df_std.loc[sub_feature.index, 'std'], fmt='none', ecolor='black', elinewidth=0.8, capsize=2)
+    for idx, measure in enumerate(sub_feature['feature_importance']):
+        text = f'{measure:.{4 if method == "permutation" else 2}f}'
+        if ensemble:
+            rank_mean, rank_std = df_agg.loc[sub_feature.index[idx], ['rank_mean', 'rank_std']]
+            text += f' (rank {rank_mean:.1f} ± {rank_std:.1f})'
+        plt.annotate(xy=(measure, idx), text=text, fontsize='x-small')
+
+    x_left, x_right = plt.xlim()
+    plt.xlim(right=x_right + (1 if method == 'impurity' and not ensemble else 0.1 * (x_right - x_left)))
+    if ensemble:
+        model_name = f"{df_agg['n_models'].max()} x {df_agg.attrs.get('model', 'models')}"
+    else:
+        model_name = tree_predictor.__class__.__name__
+    plt.title(f'Feature importance ({sort_type} {n} out of {df_feature.shape[0]}) | {model_name}', fontsize='large')
+    
+    plt.ylabel('Features')
+    if ensemble:
+        plt.xlabel('Mean feature importance in % across models (± std; mean ± std rank)', fontsize='small')
+    elif method == 'permutation':
+        plt.xlabel(f"Mean decrease in {df_perm.attrs['scoring']} when permuted "
+                   f"(baseline {df_perm.attrs['baseline_score']:.4f}, up to {n_repeats} repeats, ± std)", fontsize='small')
+    else:
+        try:
+            criterion = tree_predictor.criterion
+        except:
+            criterion = 'UNKOWN'
+        plt.xlabel(f'Total amount {criterion} decreased by splits in % (averaged over all trees if RF)', fontsize='small')
+    plt.show()
@@ -0,0 +1,149 @@
+"""
+@author: Hao Qi
+
+Batch EDA report: renders the per-column plots of ``my_funcs`` in parallel to image files plus an index HTML.
+"""
+
+###############################################################################################################################
+
+import html
+import json
+import os
+import time
+import traceback
+import warnings
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Literal
+import pandas as pd
+
+###############################################################################################################################
+
+def eda_report(df: pd.DataFrame,
+               target: str,
+               out_dir: str,
+               fmt: Literal['png', 'svg']='png',
+               n_jobs: int=None,
+               columns: list=None,
+               max_categories=50,
+               dpi=100
+               ) -> pd.DataFrame:
+    """
+    Render a full EDA of ``df`` with respect to ``target`` into ``out_dir``.
+
+    Parameters:
+    ---
+    - `df (pd.DataFrame)`: Data including the target column.
+    - `target (str)`: Name of the (categorical) target column.
+    - `out_dir (str)`: Output directory for the images, ``index.html`` and ``timings.json``.
+    - `fmt (str, optional)`: Image format, 'png' or 'svg' (default is 'png').
+    - `n_jobs (int, optional)`: Number of worker processes (default is None, ``os.cpu_count()``).
+    - `columns (list, optional)`: Predictors to include (default is None, every column except the target).
+    - `max_categories (int, optional)`: Categorical columns with more levels are skipped by the per-category plots
+      (default is 50).
+    - `dpi (int, optional)`: Resolution of png images (default is 100).
+
+    Returns:
+    ---
+    pd.DataFrame: One row per plot with the column, plot type, file, render time in seconds and error (if any).
+
+    Notes:
+    ---
+    - Plots are rendered in worker processes with the non-interactive Agg backend; every figure is closed after saving.
+    - Categorical predictors: ``barh_plot`` and ``class_balance_barhplot``. Numeric predictors: ``kdeplot_by_class``.
+      Plus the target's ``barh_plot`` and one ``association_barplot`` per metric of ``target_association``.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    columns = [col for col in (df.columns if columns is None else columns) if col != target]
+
+    tasks = [(f'{target}__barh', 'barh_plot', target, None)]
+    for col in columns:
+        if pd.api.types.is_numeric_dtype(df[col]) and not pd.api.types.is_bool_dtype(df[col]):
+            tasks.append((f'{col}__kde', 'kdeplot_by_class', col, target))
+        elif df[col].nunique() <= max_categories:
+            tasks.append((f'{col}__barh', 'barh_plot', col, None))
+            tasks.append((f'{col}__class_balance', 'class_balance_barhplot', col, target))
+    tasks.append(('association__cramersV', 'association_barplot', 'cramersV', target))
+    if not pd.api.types.is_numeric_dtype(df[target]):
+        tasks.append(('association__mutual_info', 'association_barplot', 'mutual_info', target))
+    else:
+        tasks.append(('association__pearson', 'association_barplot', 'pearson', target))
+
+    start = time.perf_counter()
+    records = []
+    with ProcessPoolExecutor(max_workers=n_jobs, initializer=_init_worker, initargs=(df[columns + [target]],)) as executor:
+        futures = [executor.submit(_render, task, out_dir, fmt, dpi) for task in tasks]
+        for future in as_completed(futures):
+            records.append(future.result())
+    total_seconds = time.perf_counter() - start
+
+    order = {task[0]: i for i, task in enumerate(tasks)}
+    timings = pd.DataFrame(records).sort_values('name', key=lambda ser: ser.map(order)).reset_index(drop=True)
+    with open(os.path.join(out_dir, 'timings.json'), 'w') as file:
+        json.dump({'total_seconds': total_seconds, 'plots': timings.to_dict(orient='records')}, file, indent=2)
+    _write_index(timings, out_dir, target, total_seconds)
+    return timings
+
+###############################################################################################################################
+
+_REPORT_DF = None
+
+def _init_worker(df):
+    global _REPORT_DF
+    import matplotlib
+    matplotlib.use('Agg', force=True)
+    _REPORT_DF = df
+
+def _render(task, out_dir, fmt, dpi) -> dict:
+    """
+    Draw one plot in a worker process, save it and close every figure.
+    """
+    import matplotlib.pyplot as plt
+    import my_funcs as my
+    name, func, col, target = task
+    df = _REPORT_DF
+    file_name = f'{_safe_name(name)}.{fmt}'
+    start = time.perf_counter()
+    error = None
+    try:
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore')  # plt.show() on Agg, seaborn palette deprecations...
+            if func == 'barh_plot':
+                my.barh_plot(df[col])
+            elif func == 'kdeplot_by_class':
+                my.kdeplot_by_class(df, col, target)
+            elif func == 'class_balance_barhplot':
+                my.class_balance_barhplot(df[col], df[target])
+            elif func == 'association_barplot':
+                X = df.drop(columns=target)
+                df_assoc = my.target_association(X, df[target], methods=[col]).dropna(axis=1)
+                my.association_barplot(df_assoc, df[target], figsize=(6, max(5, 0.25 * X.shape[1])))
+            fig = plt.gcf()
+            fig.savefig(os.path.join(out_dir, file_name), format=fmt, dpi=dpi, bbox_inches='tight')
+    except Exception:
+        error = traceback.format_exc(limit=3)
+        file_name = None
+    finally:
+        plt.close('all')
+    return {'name': name, 'plot': func, 'column': col, 'file': file_name,
+            'seconds': round(time.perf_counter() - start, 4), 'error': error}
+
+def _safe_name(name) -> str:
+    return ''.join(char if char.isalnum() or char in '-_.' else '_' for char in str(name))
+
+def _write_index(timings: pd.DataFrame, out_dir, target, total_seconds):
+    rows = []
+    for record in timings.itertuples():
+        if record.file:
+            body = f'<img src="{html.escape(record.file)}" loading="lazy">'
+        else:
+            body = f'<pre>{html.escape(str(record.error))}</pre>'
+        rows.append(f'<section><h3>{html.escape(str(record.column))} &middot; {record.plot} '
+                    f'<small>({record.seconds:.2f} s)</small></h3>{body}</section>')
+    page = (f'<!DOCTYPE html><html><head><meta charset="utf-8"><title>EDA report: {html.escape(str(target))}</title>'
+            '<style>body{font-family:sans-serif;margin:2em}img{max-width:100%}section{margin-bottom:2em}</style>'
+            f'</head><body><h1>EDA report: {html.escape(str(target))}</h1>'
+            f'<p>{len(timings)} plots rendered in {total_seconds:.1f} s '
+            f'({timings["error"].notna().sum()} errors). Per-plot timings in <code>timings.json</code>.</p>'
+            + '\n'.join(rows) + '</body></html>')
+    with open(os.path.join(out_dir, 'index.html'), 'w', encoding='utf-8') as file:
+        file.write(page)
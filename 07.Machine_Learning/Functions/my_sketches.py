@@ -0,0 +1,305 @@
+"""
+@author: Hao Qi
+
+Mergeable approximate sketches used by the describe helpers in ``my_funcs``.
+"""
+
+###############################################################################################################################
+
+import numpy as np
+import pandas as pd
+
+###############################################################################################################################
+
+class TDigest:
+    """
+    Merging t-digest for approximate quantiles with bounded memory.
+
+    Parameters:
+    ---
+    - `delta (int, optional)`: Compression parameter; roughly the maximum number of centroids kept (default is 200).
+    - `buffer_size (int, optional)`: Number of raw values buffered before they are compressed into centroids (default is 50_000).
+
+    Notes:
+    ---
+    - Values are added in batches with ``update``; only the buffer (not the whole column) is ever sorted.
+    - Two digests are combined with ``merge`` so partial results from chunks or worker processes can be reduced.
+    """
+    def __init__(self, delta=200, buffer_size=50_000):
+        self.delta = delta
+        self.buffer_size = buffer_size
+        self.means = np.empty(0, dtype=np.float64)
+        self.weights = np.empty(0, dtype=np.float64)
+        self.min = np.inf
+        self.max = -np.inf
+        self._buffer_means = []
+        self._buffer_weights = []
+        self._buffered = 0
+
+    def update(self, values):
+        """
+        Add a batch of values (NaNs are ignored).
+        """
+        values = np.asarray(values, dtype=np.float64).ravel()
+        values = values[~np.isnan(values)]
+        if values.size == 0:
+            return self
+        self.min = min(self.min, values.min())
+        self.max = max(self.max, values.max())
+        self._buffer_means.append(values)
+        self._buffer_weights.append(np.ones(values.size))
+        self._buffered += values.size
+        if self._buffered >= self.buffer_size:
+            self._compress()
+        return self
+
+    def merge(self, other):
+        """
+        Merge another digest into this one (in place) and return self.
+        """
+        other._compress()
+        if other.weights.size == 0:
+            return self
+        self._buffer_means.append(other.means)
+        self._buffer_weights.append(other.weights)
+        self._buffered += other.means.size
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self._compress()
+        return self
+
+    @property
+    def count(self):
+        self._compress()
+        return self.weights.sum()
+
+    def _compress(self):
+        if self._buffered == 0:
+            return
+        means = np.concatenate([self.means] + self._buffer_means)
+        weights = np.concatenate([self.weights] + self._buffer_weights)
+        self._buffer_means = []
+        self._buffer_weights = []
+        self._buffered = 0
+
+        order = np.argsort(means, kind='stable')
+        means = means[order]
+        weights = weights[order]
+
+        total = weights.sum()
+        q_left = (np.cumsum(weights) - weights) / total
+        # k1 scale function: clusters are small near the tails and large around the median.
+        k = self.delta / (2 * np.pi) * np.arcsin(2 * q_left - 1)
+        _, cluster = np.unique(np.floor(k).astype(np.int64), return_inverse=True)
+
+        new_weights = np.bincount(cluster, weights=weights)
+        self.means = np.bincount(cluster, weights=means * weights) / new_weights
+        self.weights = new_weights
+
+    def quantile(self, q):
+        """
+        Approximate quantile(s) ``q`` (scalar or array-like in [0, 1]).
+        """
+        self._compress()
+        q = np.asarray(q, dtype=np.float64)
+        if self.weights.size == 0:
+            return np.full(q.shape, np.nan)
+        if self.weights.size == 1:
+            return np.full(q.shape, self.means[0])
+        total = self.weights.sum()
+        # Centroid centres in cumulative-weight space, anchored on the exact min/max.
+        centres = (np.cumsum(self.weights) - self.weights / 2) / total
+        xp = np.concatenate([[0.0], centres, [1.0]])
+        fp = np.concatenate([[self.min], self.means, [self.max]])
+        return np.interp(q, xp, fp)
+
+###############################################################################################################################
+
+class HyperLogLog:
+    """
+    HyperLogLog distinct-count sketch over pandas-hashed values.
+
+    Parameters:
+    ---
+    - `p (int, optional)`: Number of index bits; the sketch keeps ``2**p`` registers (default is 14, ~0.8% error).
+
+    Notes:
+    ---
+    - Values are hashed with ``pd.util.hash_array`` so any dtype pandas can hash is supported.
+    - Two sketches with the same ``p`` are combined with ``merge`` (register-wise maximum).
+    """
+    def __init__(self, p=14):
+        self.p = p
+        self.m = 1 << p
+        self.registers = np.zeros(self.m, dtype=np.uint8)
+
+    def update(self, values):
+        """
+        Add a batch of values (missing values are ignored).
+        """
+        values = pd.Series(values)
+        values = values[values.notna()].to_numpy()
+        if values.size == 0:
+            return self
+        hashes = pd.util.hash_array(values)
+        index = (hashes >> np.uint64(64 - self.p)).astype(np.int64)
+        # Rank of the first set bit, taken on the next 32 bits so float log2 stays exact.
+        rest = ((hashes >> np.uint64(32 - self.p)) & np.uint64(0xFFFFFFFF)).astype(np.float64)
+        bit_length = np.where(rest > 0, np.floor(np.log2(np.maximum(rest, 1))) + 1, 0)
+        rank = (33 - bit_length).astype(np.uint8)
+        np.maximum.at(self.registers, index, rank)
+        return self
+
+    def merge(self, other):
+        """
+        Merge another sketch into this one (in place) and return self.
+        """
+        if other.p != self.p:
+            raise ValueError("Cannot merge HyperLogLog sketches with different 'p'!")
+        np.maximum(self.registers, other.registers, out=self.registers)
+        return self
+
+    def estimate(self):
+        """
+        Approximate number of distinct values seen.
+        """
+        m = self.m
+        alpha = 0.7213 / (1 + 1.079 / m)
+        raw = alpha * m * m / np.sum(np.exp2(-self.registers.astype(np.float64)))
+        zeros = np.count_nonzero(self.registers == 0)
+        if raw <= 2.5 * m and zeros > 0:
+            # Linear counting for the small-range regime.
+            return m * np.log(m / zeros)
+        return raw
+
+###############################################################################################################################
+
+class DescribeAccumulator:
+    """
+    Mergeable per-column accumulator behind ``my_funcs.describe_custom_stream``.
+
+    Parameters:
+    ---
+    - `tdigest_delta (int, optional)`: Compression of the per-column t-digest (default is 200).
+    - `hll_p (int, optional)`: Precision bits of the per-column HyperLogLog (default is 14).
+
+    Notes:
+    ---
+    - Keeps count, mean and sum of squared deviations (combined with Chan's parallel formula), min/max,
+      a t-digest and a HyperLogLog per column, so memory does not grow with the number of rows.
+    - ``update`` consumes one DataFrame chunk; ``merge`` combines accumulators built on other chunks
+      or in other processes (accumulators are picklable).
+    """
+    def __init__(self, tdigest_delta=200, hll_p=14):
+        self.tdigest_delta = tdigest_delta
+        self.hll_p = hll_p
+        self.columns = []
+        self.numeric = np.empty(0, dtype=bool)
+        self.count = np.empty(0)
+        self.mean = np.empty(0)
+        self.m2 = np.empty(0)
+        self.min = np.empty(0)
+        self.max = np.empty(0)
+        self.digests = []
+        self.sketches = []
+
+    def _add_columns(self, columns):
+        new = [col for col in columns if col not in self._positions]
+        if not new:
+            return
+        k = len(new)
+        self.columns.extend(new)
+        self.numeric = np.concatenate([self.numeric, np.ones(k, dtype=bool)])
+        self.count = np.concatenate([self.count, np.zeros(k)])
+        self.mean = np.concatenate([self.mean, np.zeros(k)])
+        self.m2 = np.concatenate([self.m2, np.zeros(k)])
+        self.min = np.concatenate([self.min, np.full(k, np.inf)])
+        self.max = np.concatenate([self.max, np.full(k, -np.inf)])
+        self.digests.extend(TDigest(delta=self.tdigest_delta) for _ in new)
+        self.sketches.extend(HyperLogLog(p=self.hll_p) for _ in new)
+
+    @property
+    def _positions(self):
+        return {col: i for i, col in enumerate(self.columns)}
+
+    def _combine(self, pos, count, mean, m2, vmin, vmax):
+        # Chan et al. pairwise update, vectorized over the columns in ``pos``
+        n_a = self.count[pos]
+        n = n_a + count
+        with np.errstate(invalid='ignore', divide='ignore'):
+            delta = mean - self.mean[pos]
+            self.mean[pos] = np.where(n > 0, self.mean[pos] + delta * count / n, 0.0)
+            self.m2[pos] = np.where(n > 0, self.m2[pos] + m2 + delta * delta * n_a * count / n, 0.0)
+        self.count[pos] = n
+        self.min[pos] = np.minimum(self.min[pos], vmin)
+        self.max[pos] = np.maximum(self.max[pos], vmax)
+
+    def update(self, chunk: pd.DataFrame):
+        """
+        Consume one DataFrame chunk and return self.
+        """
+        self._add_columns(chunk.columns)
+        positions = self._positions
+        pos = np.array([positions[col] for col in chunk.columns], dtype=np.int64)
+        is_num = np.array([pd.api.types.is_numeric_dtype(dtype) for dtype in chunk.dtypes], dtype=bool)
+
+        num_pos = pos[is_num]
+        if num_pos.size:
+            block = chunk.iloc[:, np.flatnonzero(is_num)].to_numpy(dtype=np.float64, na_value=np.nan)
+            valid = ~np.isnan(block)
+            count = valid.sum(axis=0).astype(np.float64)
+            with np.errstate(invalid='ignore', divide='ignore'):
+                mean = np.where(count > 0, np.where(valid, block, 0.0).sum(axis=0) / count, 0.0)
+            dev = np.where(valid, block - mean, 0.0)
+            m2 = (dev * dev).sum(axis=0)
+            vmin = np.where(valid, block, np.inf).min(axis=0)
+            vmax = np.where(valid, block, -np.inf).max(axis=0)
+            self._combine(num_pos, count, mean, m2, vmin, vmax)
+            for j, p in enumerate(num_pos):
+                self.digests[p].update(block[:, j])
+                self.sketches[p].update(block[:, j])
+
+        for j in np.flatnonzero(~is_num):
+            p = pos[j]
+            ser = chunk.iloc[:, j]
+            self.numeric[p] = False
+            self.count[p] += ser.count()
+            self.sketches[p].update(ser.to_numpy())
+        return self
+
+    def merge(self, other):
+        """
+        Merge another accumulator into this one (in place) and return self.
+        """
+        self._add_columns(other.columns)
+        positions = self._positions
+        pos = np.array([positions[col] for col in other.columns], dtype=np.int64)
+        if pos.size == 0:
+            return self
+        self._combine(pos, other.count, other.mean, other.m2, other.min, other.max)
+        self.numeric[pos] &= other.numeric
+        for j, p in enumerate(pos):
+            self.digests[p].merge(other.digests[j])
+            self.sketches[p].merge(other.sketches[j])
+        return self
+
+    def result(self) -> pd.DataFrame:
+        """
+        Unrounded, unsorted summary table with the ``describe_custom`` columns.
+        """
+        columns = ['count', 'nunique', 'mean', 'std', 'CV', 'q1_25', 'q2_50', 'q3_75', 'min', 'max']
+        out = np.full((len(self.columns), len(columns)), np.nan)
+        out[:, 0] = self.count
+        out[:, 1] = [np.round(sketch.estimate()) for sketch in self.sketches]
+
+        num = self.numeric & (self.count > 0)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            std = np.sqrt(self.m2 / (self.count - 1))
+            out[num, 2] = self.mean[num]
+            out[num, 3] = np.where(self.count > 1, std, np.nan)[num]
+            out[num, 4] = out[num, 3] / out[num, 2]
+        for p in np.flatnonzero(num):
+            out[p, 5:8] = self.digests[p].quantile([0.25, 0.50, 0.75])
+        out[num, 8] = self.min[num]
+        out[num, 9] = self.max[num]
+        return pd.DataFrame(out, index=pd.Index(self.columns), columns=columns)
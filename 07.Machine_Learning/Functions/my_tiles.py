@@ -0,0 +1,294 @@
+"""
+@author: Hao Qi
+
+Persistent on-disk cache of basemap tiles for ``my_funcs.geopoints_plot``.
+
+Tiles are stored as ``{cache_dir}/{provider}/{z}/{x}/{y}.png`` with size-bounded LRU eviction,
+so repeated maps of the same region render without network access. Prefetch a region from the
+command line before going offline:
+
+    python my_tiles.py prefetch --cache-dir ./tiles --bbox 29.5 -11.8 40.5 -0.9 --zoom 5 8 --provider positron
+"""
+
+###############################################################################################################################
+
+import argparse
+import io
+import math
+import os
+import urllib.error
+import urllib.request
+import warnings
+import numpy as np
+from PIL import Image
+from my_trace import span
+
+###############################################################################################################################
+
+TILE_PROVIDERS = {
+    'positron': 'CartoDB.Positron',
+    'voyager': 'CartoDB.Voyager',
+    'OpenStreetMap': 'OpenStreetMap.Mapnik',
+}
+
+TILE_SIZE = 256
+EARTH_RADIUS = 6378137.0
+
+###############################################################################################################################
+
+def get_provider(map_tile_source: str):
+    """
+    Return the contextily/xyzservices provider for one of the supported ``map_tile_source`` names.
+    """
+    if map_tile_source not in TILE_PROVIDERS:
+        raise Exception(f"map_tile_source must be one of the list: {list(TILE_PROVIDERS)}!")
+    import contextily
+    provider = contextily.providers
+    for attr in TILE_PROVIDERS[map_tile_source].split('.'):
+        provider = provider[attr]
+    return provider
+
+def lonlat_to_tile(lon, lat, zoom) -> tuple[int, int]:
+    """
+    XYZ (slippy map) tile indices containing a longitude/latitude point at ``zoom``.
+    """
+    n = 2 ** zoom
+    lat = np.clip(lat, -85.05112878, 85.05112878)
+    x = int(np.clip(np.floor((lon + 180.0) / 360.0 * n), 0, n - 1))
+    y = int(np.clip(np.floor((1.0 - np.arcsinh(np.tan(np.radians(lat))) / np.pi) / 2.0 * n), 0, n - 1))
+    return x, y
+
+def tiles_for_bbox(west, south, east, north, zoom) -> list[tuple[int, int]]:
+    """
+    All (x, y) tiles covering a longitude/latitude bounding box at ``zoom``.
+    """
+    x_min, y_min = lonlat_to_tile(west, north, zoom)
+    x_max, y_max = lonlat_to_tile(east, south, zoom)
+    return [(x, y) for x in range(x_min, x_max + 1) for y in range(y_min, y_max + 1)]
+
+def tile_bounds_mercator(x, y, zoom) -> tuple[float, float, float, float]:
+    """
+    (left, right, bottom, top) of a tile in Web Mercator (EPSG:3857) metres.
+    """
+    size = 2 * math.pi * EARTH_RADIUS / 2 ** zoom
+    left = -math.pi * EARTH_RADIUS + x * size
+    top = math.pi * EARTH_RADIUS - y * size
+    return left, left + size, top - size, top
+
+def auto_zoom(west, south, east, north, max_zoom=None) -> int:
+    """
+    Same automatic zoom rule as ``contextily.add_basemap(zoom='auto')``.
+    """
+    zoom_lon = math.ceil(math.log2(360 * 2.0 / max(abs(east - west), 1e-9)))
+    zoom_lat = math.ceil(math.log2(360 * 2.0 / max(abs(north - south), 1e-9)))
+    zoom = max(min(zoom_lon, zoom_lat), 0)
+    return zoom if max_zoom is None else min(zoom, max_zoom)
+
+def mercator_to_lonlat(image, extent) -> tuple[np.ndarray, tuple]:
+    """
+    Reproject a Web Mercator image to a regular longitude/latitude grid.
+    Longitude is linear in both systems, so only rows are resampled (nearest row for each output latitude).
+    """
+    left, right, bottom, top = extent
+    to_lat = lambda v: np.degrees(2 * np.arctan(np.exp(v / EARTH_RADIUS)) - np.pi / 2)
+    lat_top, lat_bottom = to_lat(top), to_lat(bottom)
+    n_rows = image.shape[0]
+    # Latitude at the centre of each output row, from top to bottom, and its Mercator y
+    lat = lat_top - (np.arange(n_rows) + 0.5) * (lat_top - lat_bottom) / n_rows
+    y = EARTH_RADIUS * np.log(np.tan(np.pi / 4 + np.radians(lat) / 2))
+    rows = np.clip(((top - y) / (top - bottom) * n_rows).astype(np.int64), 0, n_rows - 1)
+    lon_extent = (np.degrees(left / EARTH_RADIUS), np.degrees(right / EARTH_RADIUS), lat_bottom, lat_top)
+    return image[rows], lon_extent
+
+###############################################################################################################################
+
+class TileCache:
+    """
+    Size-bounded LRU tile cache on disk, keyed by provider/zoom/x/y.
+
+    Parameters:
+    ---
+    - `cache_dir (str)`: Directory where tiles are stored (created if needed).
+    - `max_bytes (int, optional)`: Maximum total size of cached tiles; least recently used tiles are evicted
+      beyond it (default is 512 MB).
+    - `offline (bool, optional)`: Strict offline mode: only cached (or ``source_dir``) tiles are served and
+      missing tiles are left blank with a warning; the network is never used (default is False).
+    - `source_dir (str, optional)`: Local tile directory with the same ``{provider}/{z}/{x}/{y}.png`` layout used as
+      the upstream source instead of the tile servers, e.g. tiles copied to air-gapped workers (default is None).
+    - `timeout (float, optional)`: Network timeout in seconds per tile (default is 10).
+
+    Example:
+    ---
+    ```python
+    cache = TileCache('./tiles', offline=True)
+    geopoints_plot(df['longitude'], df['latitude'], tile_cache=cache)
+    ```
+    """
+    def __init__(self, cache_dir, max_bytes=512 * 2**20, offline=False, source_dir=None, timeout=10):
+        self.cache_dir = os.fspath(cache_dir)
+        self.max_bytes = max_bytes
+        self.offline = offline
+        self.source_dir = None if source_dir is None else os.fspath(source_dir)
+        self.timeout = timeout
+        self.hits = 0
+        self.misses = 0
+        self.failures = 0
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self._size = sum(os.path.getsize(path) for path in self._cached_files())
+
+    @property
+    def size_bytes(self) -> int:
+        return self._size
+
+    def _cached_files(self):
+        for root, _, files in os.walk(self.cache_dir):
+            for name in files:
+                if name.endswith('.png'):
+                    yield os.path.join(root, name)
+
+    @staticmethod
+    def _relpath(provider, z, x, y):
+        return os.path.join(provider.name, str(z), str(x), f'{y}.png')
+
+    def get_tile(self, provider, z, x, y) -> bytes | None:
+        """
+        Tile bytes from the cache, the local ``source_dir`` or (unless offline) the provider's server.
+        Returns None if the tile is unavailable; failed downloads (HTTP errors, timeouts, DNS failures) are counted in
+        ``failures`` instead of raising, so one bad tile leaves a blank square rather than aborting the map.
+        """
+        relpath = self._relpath(provider, z, x, y)
+        path = os.path.join(self.cache_dir, relpath)
+        if os.path.exists(path):
+            self.hits += 1
+            os.utime(path)  # mark as recently used
+            with span('TileCache.get_tile', stage='io', source='cache', zoom=z), open(path, 'rb') as file:
+                return file.read()
+
+        self.misses += 1
+        data = None
+        if self.source_dir is not None and os.path.exists(os.path.join(self.source_dir, relpath)):
+            with span('TileCache.get_tile', stage='io', source='local', zoom=z):
+                with open(os.path.join(self.source_dir, relpath), 'rb') as file:
+                    data = file.read()
+        elif not self.offline and self.source_dir is None:
+            request = urllib.request.Request(provider.build_url(x=x, y=y, z=z),
+                                             headers={'User-Agent': 'my_tiles/1.0'})
+            with span('TileCache.get_tile', stage='io', source='network', zoom=z) as current:
+                try:
+                    with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                        data = response.read()
+                except (urllib.error.URLError, OSError) as error:
+                    self.failures += 1
+                    current.set(error=type(error).__name__)
+        if data is not None:
+            self._store(path, data)
+        return data
+
+    def _store(self, path, data):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f'{path}.{os.getpid()}.tmp'
+        with open(tmp_path, 'wb') as file:
+            file.write(data)
+        os.replace(tmp_path, path)
+        self._size += len(data)
+        if self._size > self.max_bytes:
+            self.evict()
+
+    def evict(self, target_bytes=None):
+        """
+        Delete least recently used tiles until the cache is below ``target_bytes`` (default 90% of ``max_bytes``).
+        """
+        target_bytes = int(0.9 * self.max_bytes) if target_bytes is None else target_bytes
+        files = sorted(((os.stat(path).st_mtime, os.path.getsize(path), path) for path in self._cached_files()))
+        self._size = sum(size for _, size, _ in files)
+        for _, size, path in files:
+            if self._size <= target_bytes:
+                break
+            os.remove(path)
+            self._size -= size
+
+    def prefetch(self, bbox, zooms, provider) -> int:
+        """
+        Download (or copy from ``source_dir``) every tile covering ``bbox = (west, south, east, north)``
+        for each zoom in ``zooms``. Returns the number of tiles available in the cache.
+        """
+        available = 0
+        for zoom in np.atleast_1d(zooms):
+            for x, y in tiles_for_bbox(*bbox, int(zoom)):
+                available += self.get_tile(provider, int(zoom), x, y) is not None
+        return available
+
+    def mosaic(self, bbox, zoom, provider) -> tuple[np.ndarray, tuple]:
+        """
+        Stitch the tiles covering ``bbox`` into one RGBA image.
+        Returns the image and its extent ``(left, right, bottom, top)`` in Web Mercator.
+        """
+        tiles = tiles_for_bbox(*bbox, zoom)
+        xs = sorted({x for x, _ in tiles})
+        ys = sorted({y for _, y in tiles})
+        image = np.zeros((len(ys) * TILE_SIZE, len(xs) * TILE_SIZE, 4), dtype=np.uint8)
+        missing = 0
+        for x, y in tiles:
+            data = self.get_tile(provider, zoom, x, y)
+            if data is None:
+                missing += 1
+                continue
+            tile = np.asarray(Image.open(io.BytesIO(data)).convert('RGBA').resize((TILE_SIZE, TILE_SIZE)))
+            row, col = ys.index(y) * TILE_SIZE, xs.index(x) * TILE_SIZE
+            image[row:row + TILE_SIZE, col:col + TILE_SIZE] = tile
+        if missing:
+            warnings.warn(f"{missing} of {len(tiles)} tiles not available (offline or failed download) for zoom {zoom}; "
+                          "left blank.")
+        left, _, _, top = tile_bounds_mercator(xs[0], ys[0], zoom)
+        _, right, bottom, _ = tile_bounds_mercator(xs[-1], ys[-1], zoom)
+        return image, (left, right, bottom, top)
+
+    def add_basemap(self, ax, provider, zoom='auto', crs='EPSG:4326', interpolation='bilinear', attribution=True):
+        """
+        Cached replacement of ``contextily.add_basemap`` for axes in EPSG:4326 or EPSG:3857.
+        """
+        xmin, xmax, ymin, ymax = ax.axis()
+        if crs == 'EPSG:4326':
+            bbox = (xmin, ymin, xmax, ymax)
+        elif crs == 'EPSG:3857':
+            to_lon = lambda v: np.degrees(v / EARTH_RADIUS)
+            to_lat = lambda v: np.degrees(2 * np.arctan(np.exp(v / EARTH_RADIUS)) - np.pi / 2)
+            bbox = (to_lon(xmin), to_lat(ymin), to_lon(xmax), to_lat(ymax))
+        else:
+            raise ValueError("crs must be one of the list: ['EPSG:4326', 'EPSG:3857']!")
+        if zoom == 'auto':
+            zoom = auto_zoom(*bbox, max_zoom=provider.get('max_zoom'))
+
+        image, extent = self.mosaic(bbox, zoom, provider)
+        if crs == 'EPSG:4326':
+            image, extent = mercator_to_lonlat(image, extent)
+        ax.imshow(image, extent=extent, interpolation=interpolation, aspect=ax.get_aspect(), zorder=0)
+        ax.axis((xmin, xmax, ymin, ymax))
+        if attribution and provider.get('attribution'):
+            import contextily
+            contextily.add_attribution(ax, provider['attribution'])
+        return ax
+
+###############################################################################################################################
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Basemap tile cache for geopoints_plot.')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    prefetch = subparsers.add_parser('prefetch', help='Download the tiles covering a bounding box.')
+    prefetch.add_argument('--cache-dir', required=True)
+    prefetch.add_argument('--bbox', type=float, nargs=4, required=True, metavar=('WEST', 'SOUTH', 'EAST', 'NORTH'))
+    prefetch.add_argument('--zoom', type=int, nargs=2, required=True, metavar=('MIN', 'MAX'))
+    prefetch.add_argument('--provider', default='positron', choices=list(TILE_PROVIDERS))
+    prefetch.add_argument('--source-dir', default=None)
+    prefetch.add_argument('--max-bytes', type=int, default=512 * 2**20)
+
+    args = parser.parse_args(argv)
+    cache = TileCache(args.cache_dir, max_bytes=args.max_bytes, source_dir=args.source_dir)
+    zooms = range(args.zoom[0], args.zoom[1] + 1)
+    available = cache.prefetch(args.bbox, zooms, get_provider(args.provider))
+    print(f"{available} tiles cached ({cache.size_bytes / 2**20:.1f} MB) in '{cache.cache_dir}'"
+          f" | {cache.failures} failed downloads")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,309 @@
+"""
+@author: Hao Qi
+
+Instrumentation of the ``my_funcs`` helpers: nested per-stage spans ('compute', 'render', 'io') with row/column
+counts and optional peak traced memory, plus the helpers' printed messages, emitted to a pluggable sink.
+Disabled by default: spans then cost a single global check and messages are printed as usual.
+
+Example:
+---
+```python
+import my_funcs as my
+with my.tracing() as sink:                       # in-memory collector
+    df.apply(my.manage_outliers, mode='check')   # decisions go to the sink instead of stdout
+sink.summary()                                   # time per function/stage
+```
+"""
+
+###############################################################################################################################
+
+import contextlib
+import functools
+import json
+import logging
+import os
+import threading
+import time
+import tracemalloc
+
+###############################################################################################################################
+
+_SINK = None            # None: tracing disabled
+_MEMORY = False         # record the traced-memory peak of every span
+_MESSAGES = True        # route echo() messages to the sink instead of stdout
+_STARTED_TRACEMALLOC = False
+_LOCAL = threading.local()
+
+def enable_tracing(sink=None, memory=False, messages=True):
+    """
+    Start emitting spans (and messages) to ``sink``.
+
+    Parameters:
+    ---
+    - `sink (object, optional)`: Object with an ``emit(record)`` method or a callable taking the record dict
+      (default is a new ``CollectorSink``).
+    - `memory (bool, optional)`: Record the peak memory of every span with ``tracemalloc``; this slows down
+      allocation-heavy code (default is False).
+    - `messages (bool, optional)`: Send the helpers' printed output (e.g. ``manage_outliers`` decisions) to the sink
+      instead of stdout (default is True).
+
+    Returns:
+    ---
+    object: The sink in use.
+    """
+    global _SINK, _MEMORY, _MESSAGES, _STARTED_TRACEMALLOC
+    sink = CollectorSink() if sink is None else sink
+    _SINK = sink.emit if hasattr(sink, 'emit') else sink
+    _MESSAGES = messages
+    _MEMORY = memory
+    if memory and not tracemalloc.is_tracing():
+        tracemalloc.start()
+        _STARTED_TRACEMALLOC = True
+    return sink
+
+def disable_tracing():
+    """
+    Stop tracing (spans become no-ops and messages are printed again).
+    """
+    global _SINK, _MEMORY, _STARTED_TRACEMALLOC
+    _SINK = None
+    _MEMORY = False
+    if _STARTED_TRACEMALLOC:
+        tracemalloc.stop()
+        _STARTED_TRACEMALLOC = False
+
+@contextlib.contextmanager
+def tracing(sink=None, memory=False, messages=True):
+    """
+    Context manager version of ``enable_tracing``; the previous state is restored on exit.
+    """
+    global _SINK, _MEMORY, _MESSAGES
+    previous = (_SINK, _MEMORY, _MESSAGES)
+    sink = enable_tracing(sink, memory, messages)
+    try:
+        yield sink
+    finally:
+        if previous[0] is None:
+            disable_tracing()
+        _SINK, _MEMORY, _MESSAGES = previous
+
+###############################################################################################################################
+
+class _NullSpan:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def set(self, **attrs):
+        pass
+
+_NULL_SPAN = _NullSpan()
+
+class _Span:
+    """
+    Timed region; emitted to the sink on exit as a record with 'type' = 'span'.
+    """
+    def __init__(self, name, stage, rows, cols, attrs):
+        self.record = {'type': 'span', 'name': name, 'stage': stage, 'rows': rows, 'cols': cols, **attrs}
+        self._peak = 0
+
+    def set(self, **attrs):
+        """
+        Add attributes (e.g. counts only known inside the span) to the record.
+        """
+        self.record.update(attrs)
+
+    def __enter__(self):
+        stack = _stack()
+        self.record['parent'] = stack[-1].record['name'] if stack else None
+        self.record['depth'] = len(stack)
+        if _MEMORY:
+            current, peak = tracemalloc.get_traced_memory()
+            if stack:
+                stack[-1]._peak = max(stack[-1]._peak, peak)
+            tracemalloc.reset_peak()
+            self._start_memory = current
+        stack.append(self)
+        self.record['start'] = time.time()
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.record['duration_s'] = time.perf_counter() - self._start
+        stack = _stack()
+        stack.pop()
+        if _MEMORY and tracemalloc.is_tracing():
+            peak = max(self._peak, tracemalloc.get_traced_memory()[1])
+            self.record['peak_mb'] = (peak - self._start_memory) / 2**20
+            if stack:
+                stack[-1]._peak = max(stack[-1]._peak, peak)
+        if exc_type is not None:
+            self.record['error'] = exc_type.__name__
+        sink = _SINK
+        if sink is not None:
+            sink(self.record)
+        return False
+
+def _stack():
+    stack = getattr(_LOCAL, 'stack', None)
+    if stack is None:
+        stack = _LOCAL.stack = []
+    return stack
+
+def _shape(obj):
+    shape = getattr(obj, 'shape', None)
+    if shape is None:
+        return None, None
+    return (shape[0], shape[1] if len(shape) > 1 else 1) if len(shape) else (None, None)
+
+def span(name, stage='compute', rows=None, cols=None, **attrs):
+    """
+    Context manager timing a stage of a helper, e.g. ``with span('get_cramersV.crosstab', rows=len(x)):``.
+
+    Parameters:
+    ---
+    - `name (str)`: Span name, by convention ``'<function>.<stage name>'``.
+    - `stage (str, optional)`: 'compute', 'render' or 'io' (default is 'compute').
+    - `rows`, `cols` (int, optional): Size of the data handled by the span (default is None).
+    - `**attrs`: Extra attributes added to the record.
+
+    Returns:
+    ---
+    A span with a ``set(**attrs)`` method (a shared no-op object when tracing is disabled).
+    """
+    if _SINK is None:
+        return _NULL_SPAN
+    return _Span(name, stage, rows, cols, attrs)
+
+def traced(name=None, stage='compute'):
+    """
+    Decorator wrapping every call of a helper in a span; rows/columns are taken from the first argument's shape.
+    """
+    def decorator(func):
+        span_name = func.__name__ if name is None else name
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if _SINK is None:
+                return func(*args, **kwargs)
+            rows, cols = _shape(args[0]) if args else (None, None)
+            with _Span(span_name, stage, rows, cols, {}):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+def traced_iter(iterable, name, stage='io'):
+    """
+    Iterate ``iterable`` timing every ``next`` in a span (e.g. reading file chunks); rows/columns come from each item.
+    Returns ``iterable`` unchanged when tracing is disabled.
+    """
+    if _SINK is None:
+        return iterable
+    return _traced_iter(iter(iterable), name, stage)
+
+def _traced_iter(iterator, name, stage):
+    while True:
+        with span(name, stage) as current:
+            item = next(iterator, _NULL_SPAN)
+            if item is not _NULL_SPAN:
+                rows, cols = _shape(item)
+                current.set(rows=rows, cols=cols)
+        if item is _NULL_SPAN:
+            return
+        yield item
+
+def echo(*values, sep=' ', end='\n'):
+    """
+    ``print`` replacement for the helpers' messages: printed when tracing is disabled, otherwise emitted to the sink
+    as a record with 'type' = 'message' (attached to the innermost open span).
+    """
+    if _SINK is None or not _MESSAGES:
+        print(*values, sep=sep, end=end)
+        return
+    stack = _stack()
+    _SINK({'type': 'message', 'name': stack[-1].record['name'] if stack else None, 'start': time.time(),
+           'text': sep.join(map(str, values))})
+
+###############################################################################################################################
+
+class CollectorSink:
+    """
+    In-memory sink keeping every record; ``to_frame()`` and ``summary()`` turn the spans into DataFrames.
+    """
+    def __init__(self):
+        self.records = []
+
+    def emit(self, record):
+        self.records.append(record)
+
+    def clear(self):
+        self.records.clear()
+
+    @property
+    def messages(self) -> list:
+        return [record['text'] for record in self.records if record['type'] == 'message']
+
+    def to_frame(self):
+        """
+        pd.DataFrame: One row per span, in start order.
+        """
+        import pandas as pd
+        spans = [record for record in self.records if record['type'] == 'span']
+        df = pd.DataFrame(spans).drop(columns='type', errors='ignore')
+        return df.sort_values('start', kind='stable').reset_index(drop=True) if len(df) else df
+
+    def summary(self):
+        """
+        pd.DataFrame: Calls, total/mean/max seconds (and max peak MB if recorded) per span name and stage,
+        sorted by total time.
+        """
+        df = self.to_frame()
+        if not len(df):
+            return df
+        aggs = {'calls': ('duration_s', 'size'), 'total_s': ('duration_s', 'sum'),
+                'mean_s': ('duration_s', 'mean'), 'max_s': ('duration_s', 'max')}
+        if 'peak_mb' in df:
+            aggs['peak_mb'] = ('peak_mb', 'max')
+        return df.groupby(['name', 'stage'], sort=False).agg(**aggs).sort_values('total_s', ascending=False)
+
+class LoggingSink:
+    """
+    Sink writing one log line per record to ``logger`` (name or ``logging.Logger``).
+    """
+    def __init__(self, logger='my_funcs', level=logging.INFO):
+        self.logger = logging.getLogger(logger) if isinstance(logger, str) else logger
+        self.level = level
+
+    def emit(self, record):
+        if record['type'] == 'message':
+            self.logger.log(self.level, '%s', record['text'])
+            return
+        size = ''.join(f' {key}={record[key]}' for key in ('rows', 'cols') if record.get(key) is not None)
+        peak = f" peak={record['peak_mb']:.1f}MB" if record.get('peak_mb') is not None else ''
+        self.logger.log(self.level, '%s%s [%s] %.4fs%s%s', '  ' * record['depth'], record['name'], record['stage'],
+                        record['duration_s'], size, peak)
+
+class JsonLinesSink:
+    """
+    Sink appending one JSON object per record to the file at ``path`` (lines are flushed as they are written).
+    """
+    def __init__(self, path):
+        self.path = os.fspath(path)
+        self._file = open(self.path, 'a', encoding='utf-8', buffering=1)
+        self._lock = threading.Lock()
+
+    def emit(self, record):
+        line = json.dumps(record, default=str)
+        with self._lock:
+            self._file.write(line + '\n')
+
+    def close(self):
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
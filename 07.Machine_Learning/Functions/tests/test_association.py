@@ -0,0 +1,22 @@
+import numpy as np
+import pandas as pd
+
+import my_funcs as my
+
+
+def test_target_association_chunks_match_and_agree_with_get_cramersV():
+    rng = np.random.default_rng(0)
+    n = 3000
+    X = pd.DataFrame({'a': rng.normal(size=n), 'b': rng.integers(0, 2, n), 'c': rng.choice(list('xyz'), n),
+                      'd': rng.exponential(size=n)})
+    X.loc[::7, 'a'] = np.nan
+    y = pd.Series(rng.integers(0, 3, n).astype(float))
+    y[::11] = np.nan
+
+    whole = my.target_association(X, y)
+    pd.testing.assert_frame_equal(my.target_association(X, y, chunk_size=1), whole)
+
+    known = y.notna()
+    for col in X.columns:
+        expected = my.get_cramersV(X.loc[known, col], y[known])
+        assert np.isclose(whole.loc['CramersV: min(nunique, 5) bins', col], expected)
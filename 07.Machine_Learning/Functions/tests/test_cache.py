@@ -0,0 +1,33 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import my_funcs as my
+
+
+@pytest.fixture
+def frame():
+    rng = np.random.default_rng(0)
+    return pd.DataFrame({'a': rng.normal(size=20_000), 'b': rng.integers(0, 10, 20_000),
+                         'c': rng.choice(['x', 'y', 'z'], 20_000)})
+
+
+def test_single_row_edit_is_a_cache_miss(frame):
+    cache = my.ResultCache()
+    describe = my.cached(my.describe_custom, cache)
+    describe(frame)
+    describe(frame)
+    assert (cache.hits, cache.misses) == (1, 1)
+
+    frame.loc[5000, 'a'] = 1e9  # in place, far from the first/last rows
+    result = describe(frame)
+    assert cache.misses == 2
+    assert result.loc['a', 'max'] == 1e9
+
+
+def test_sampled_fingerprint_is_opt_in(frame):
+    full = my.frame_fingerprint(frame)
+    sampled = my.frame_fingerprint(frame, sample_rows=1024)
+    frame.loc[5000, 'a'] = 1e9
+    assert my.frame_fingerprint(frame) != full
+    assert my.frame_fingerprint(frame, sample_rows=1024) == sampled
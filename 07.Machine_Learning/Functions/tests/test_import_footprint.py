@@ -0,0 +1,7 @@
+import my_funcs as my
+
+
+def test_compute_only_import_loads_no_heavy_modules():
+    report = my.check_import_footprint()
+    assert report['heavy_modules'] == []
+    assert report['ok'], report
@@ -0,0 +1,42 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import my_funcs as my
+
+
+@pytest.fixture
+def int_frame():
+    values = np.arange(101, dtype=np.int64)
+    values[-1] = 10_000  # one clear outlier
+    return pd.DataFrame({'a': values, 'b': np.linspace(0, 1, 101), 'c': ['x'] * 101})
+
+
+@pytest.mark.parametrize('mode', ['winsor', 'miss'])
+def test_transformer_int_columns_match_frame_function(int_frame, mode):
+    transformer = my.OutlierTransformer(mode=mode).fit(int_frame)
+    out = transformer.transform(int_frame)
+    expected = my.manage_outliers_frame(int_frame, mode=mode)
+
+    assert out['a'].dtype == np.float64
+    assert out['c'].dtype == int_frame['c'].dtype
+    pd.testing.assert_frame_equal(out, expected)
+    assert int_frame['a'].dtype == np.int64  # input left untouched
+
+
+def test_transformer_miss_sets_nan_on_int_column(int_frame):
+    out = my.OutlierTransformer(mode='miss').fit_transform(int_frame)
+    assert np.isnan(out['a'].iloc[-1])
+    assert out['a'].iloc[:-1].notna().all()
+
+
+def test_sample_normality_test_draws_among_valid_values():
+    rng = np.random.default_rng(0)
+    sparse = np.full(200_000, np.nan)
+    sparse[rng.choice(sparse.size, 60, replace=False)] = rng.normal(size=60)
+    df = pd.DataFrame({'sparse': sparse})
+
+    sample = my.manage_outliers_frame(df, normality_test='sample')
+    full = my.manage_outliers_frame(df, normality_test='full')
+    pd.testing.assert_frame_equal(sample, full)
+    assert sample.loc['sparse', 'normality'] == 'normal'